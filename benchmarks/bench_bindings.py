@@ -0,0 +1,56 @@
+import sys
+
+from benchmarks.common import measure, report
+from src.helpers.winapi.consts import GWL_STYLE, WM_NULL
+
+"""
+ Per call cost of hot WinApi functions, pywin32 vs ctypes prototypes, Windows only:
+ python -m benchmarks.bench_bindings
+"""
+
+CALLS = 20000
+
+
+def bench_backend(name, api, hwnd):
+    def repeat(func):
+        def run():
+            for _ in range(CALLS):
+                func()
+        return run
+
+    cases = [
+        ('GetWindowText', lambda: api.GetWindowText(hwnd)),
+        ('GetWindowLong', lambda: api.GetWindowLong(hwnd, GWL_STYLE)),
+        ('GetWindowThreadProcessId', lambda: api.GetWindowThreadProcessId(hwnd)),
+        ('PostMessage(WM_NULL)', lambda: api.PostMessage(hwnd, WM_NULL, 0, 0)),
+        ('IsWindow', lambda: api.IsWindow(hwnd)),
+    ]
+    for case, func in cases:
+        sec = measure(repeat(func), repeats=3)
+        report(f'{name:<8} {case}', sec, CALLS)
+
+    hwnds = []
+    sec = measure(lambda: api.EnumWindows(lambda h, extra: extra.append(h) or True, hwnds), repeats=3)
+    report(f'{name:<8} EnumWindows ({len(hwnds) // 3} windows)', sec)
+
+
+def main():
+    if sys.platform != 'win32':
+        print('Bindings benchmark requires Windows with pywin32, simulated backend has no bindings to compare')
+        return
+
+    from src.helpers.winapi.backend import Win32Backend
+    from src.helpers.winapi.ctypes_backend import CtypesBackend
+
+    win32_api, ctypes_api = Win32Backend(), CtypesBackend()
+    hwnd = win32_api.GetForegroundWindow()
+    print(f'{CALLS} calls each on foreground hwnd {hwnd}: {win32_api.GetWindowText(hwnd)!r}\n')
+    assert ctypes_api.GetWindowText(hwnd) == win32_api.GetWindowText(hwnd)
+    assert ctypes_api.GetWindowThreadProcessId(hwnd) == tuple(win32_api.GetWindowThreadProcessId(hwnd))
+
+    bench_backend('pywin32', win32_api, hwnd)
+    bench_backend('ctypes', ctypes_api, hwnd)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+import time
+
+from benchmarks.common import simulated_desktop, report
+from src.helpers.winapi.cursor_tracker import CursorTracker
+from src.helpers.winapi.other import get_window_info_under_cursor
+from src.helpers.winapi.window_events import HookEventSource
+
+"""
+ Hovered window sampled at 1 kHz for a virtual second, cursor moving during a tenth of samples:
+ python -m benchmarks.bench_cursor
+"""
+
+SAMPLES = 1000
+MOVE_EVERY = 10
+LATENCIES_SEC = (0.0, 0.00002)
+
+
+def run_samples(desktop, sample):
+    """ WinApi calls and wall time of SAMPLES samples, moving cursor between some of them """
+    # generated windows share one rect, so the hovered window stays the same while cursor moves over it
+    points = [(i * 7 % 800, i * 3 % 600) for i in range(1, SAMPLES // MOVE_EVERY + 1)]
+    calls = desktop.calls
+    start = time.perf_counter()
+    for i in range(SAMPLES):
+        if i % MOVE_EVERY == 0:
+            desktop.move_cursor(points[i // MOVE_EVERY])
+        sample()
+    return time.perf_counter() - start, desktop.calls - calls
+
+
+def main():
+    for latency_sec in LATENCIES_SEC:
+        with simulated_desktop(processes=10, latency_sec=latency_sec) as desktop:
+            print(f'WinApi call latency {latency_sec * 1e6:.0f} us')
+            sec, calls = run_samples(desktop, get_window_info_under_cursor)
+            report(f'  uncached, {calls / SAMPLES:.2f} calls/sample', sec, SAMPLES)
+
+            tracker = CursorTracker()
+            sec, calls = run_samples(desktop, tracker.sample)
+            report(f'  tracker polling, {calls / SAMPLES:.2f} calls/sample', sec, SAMPLES)
+
+            source = HookEventSource()
+            tracker = CursorTracker()
+            tracker.attach(source)
+            source.start()
+            sec, calls = run_samples(desktop, tracker.sample)
+            source.stop()
+            report(f'  tracker with hooks, {calls / SAMPLES:.2f} calls/sample', sec, SAMPLES)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import argparse
+
+from benchmarks.common import simulated_desktop, measure, report
+from src.helpers.winapi.hierarchy import WindowHierarchy
+from src.helpers.winapi.processes import get_process_windows, filter_process_windows, get_child_windows
+from src.helpers.winapi.registry import WindowRegistry
+from src.helpers.winapi.snapshot import WindowSnapshot
+from src.helpers.winapi.window_stream import find_first_window, iter_process_windows, WindowFilter
+from src.helpers.winapi.windows import is_any_window_maxed
+from src.messages import WinMsg, EnumArg, PostMessage, run_test_message, wm_args, compile_messages, run_plan_step
+from src.helpers.winapi.consts import WM_KEYDOWN
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Enumeration, filter and send throughput on simulated desktop')
+    parser.add_argument('--processes', type=int, default=100)
+    parser.add_argument('--children', type=int, default=33, help='child windows per top-level window')
+    parser.add_argument('--latency-us', type=float, default=0.0, help='emulated cost of each WinApi call')
+    args = parser.parse_args()
+
+    with simulated_desktop(processes=args.processes, children_per_window=args.children,
+                           latency_sec=args.latency_us / 1e6) as desktop:
+        total = len(desktop.windows)
+        print(f'Simulated desktop: {len(desktop.processes)} processes, {total} windows\n')
+
+        calls = desktop.calls
+        wnds = get_process_windows()
+        print(f'WinApi calls per refresh: {desktop.calls - calls}')
+        report('get_process_windows', measure(get_process_windows), total)
+
+        hierarchy = WindowHierarchy()
+        report('WindowHierarchy.refresh (top-level only)', measure(hierarchy.refresh), total)
+        report('WindowHierarchy.children (one root)',
+               measure(lambda: get_child_windows(hierarchy.top_level[0].hwnd)))
+        report('filter_process_windows(list, module_exe)',
+               measure(lambda: filter_process_windows(wnds, module_exe='app7.exe')), total)
+        report('WindowRegistry build', measure(lambda: WindowRegistry(wnds)), total)
+        registry = WindowRegistry(wnds)
+        report('WindowRegistry.query(module_exe)', measure(lambda: registry.query(module_exe='app7.exe')))
+        report('WindowRegistry.query(pid, visible)',
+               measure(lambda: registry.query(pid=wnds[-1].pid, visible=True)))
+        report('is_any_window_maxed(module)', measure(lambda: is_any_window_maxed('app7.exe')))
+
+        report('find_first_window(module_exe, visible)',
+               measure(lambda: find_first_window(module_exe='app7.exe', visible=True)))
+        report('next(iter_process_windows(module_exe))',
+               measure(lambda: next(iter_process_windows(WindowFilter(module_exe='app7.exe')))))
+        report('list(iter_process_windows(module_exe))',
+               measure(lambda: list(iter_process_windows(WindowFilter(module_exe='app7.exe')))))
+
+        prev = WindowSnapshot.capture()
+        desktop.destroy_window(desktop.top_level[-1])
+        desktop.SetWindowText(desktop.top_level[0], 'renamed')
+        snapshot = WindowSnapshot.capture()
+        print(f'Snapshot diff: {snapshot.diff(prev).summary()}')
+        report('WindowSnapshot.diff', measure(lambda: snapshot.diff(prev)), total)
+
+        hwnd = desktop.top_level[0]
+        msg = WinMsg(PostMessage, EnumArg(wm_args, WM_KEYDOWN), 'VK_TAB')
+        sends = 10000
+
+        def send():
+            for _ in range(sends):
+                run_test_message(hwnd, msg)
+        report(f'run_test_message(PostMessage) x{sends}', measure(send), sends)
+
+        plan = compile_messages([msg])
+
+        def send_compiled():
+            for _ in range(sends):
+                for step in plan:
+                    run_plan_step(hwnd, step)
+        report(f'run_plan_step(PostMessage) x{sends}', measure(send_compiled), sends)
+
+
+if __name__ == '__main__':
+    main()
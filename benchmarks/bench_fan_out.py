@@ -0,0 +1,59 @@
+import time
+
+from benchmarks.common import simulated_desktop, report
+from src.helpers.winapi.consts import WM_KEYDOWN, WM_KEYUP, WM_CHAR
+from src.messages import WinMsg, EnumArg, PostMessage, wm_args, compile_messages, run_plan_step
+from src.send_schedule import Schedule, sequential_schedule, fan_out_schedule
+
+"""
+ Time of sending a 12-message PostMessage sequence to many hwnds, sequential vs fan-out:
+ python -m benchmarks.bench_fan_out
+"""
+
+DELAY_SEC = 0.005
+TARGETS = (1, 10, 50)
+
+
+def run_blocking(schedule: Schedule):
+    """ Same deadlines as QDeadlineScheduler, but sleeping, Qt is not needed """
+    deadline = time.perf_counter()
+    for action, delay_sec in schedule:
+        wait = deadline - time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+        action()
+        deadline += delay_sec
+
+
+def send(hwnd, step):
+    run_plan_step(hwnd, step)
+
+
+def main():
+    messages = []
+    for char in 'abcdef':
+        messages += [WinMsg(PostMessage, EnumArg(wm_args, WM_KEYDOWN), char),
+                     WinMsg(PostMessage, EnumArg(wm_args, WM_KEYUP), char)]
+    messages[-1] = WinMsg(PostMessage, EnumArg(wm_args, WM_CHAR), 'f')
+    plan = compile_messages(messages, DELAY_SEC)
+    print(f'{len(plan)} messages, {DELAY_SEC * 1000:.0f} ms delay after each\n')
+
+    with simulated_desktop(processes=60, windows_per_process=1, children_per_window=0) as desktop:
+        for count in TARGETS:
+            hwnds = desktop.top_level[:count]
+            for name, make_schedule in (('sequential', sequential_schedule), ('fan-out', fan_out_schedule)):
+                for hwnd in hwnds:
+                    desktop.pop_messages(hwnd)
+
+                start = time.perf_counter()
+                run_blocking(make_schedule(hwnds, plan, send))
+                report(f'{name:<10} to {count:>3} hwnds', time.perf_counter() - start, count * len(plan))
+
+                # per target order must be same as in plan
+                expected = desktop.pop_messages(hwnds[0])
+                assert all(desktop.pop_messages(hwnd) == expected for hwnd in hwnds[1:])
+                assert len(expected) == len(plan)
+
+
+if __name__ == '__main__':
+    main()
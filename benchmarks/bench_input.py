@@ -0,0 +1,35 @@
+from benchmarks.common import simulated_desktop, measure, report
+from src.helpers.winapi.hotkey_events import type_text
+from src.helpers.winapi.keyboard import keyboard_tables
+from src.helpers.winapi.send_input import InputBatch
+
+"""
+ Synthetic input with one SendInput array vs one keybd_event/mouse_event call per event:
+ python -m benchmarks.bench_input
+"""
+
+TEXT = ('The quick brown fox jumps over the lazy dog. ' * 12)[:500]
+LATENCY_SEC = 0.00002
+
+
+def main():
+    with simulated_desktop(processes=10, latency_sec=LATENCY_SEC) as desktop:
+        desktop.foreground_hwnd = desktop.top_level[0]
+        events = keyboard_tables.current().text_to_key_events(TEXT)
+        print(f'{len(TEXT)} chars, {len(events)} key events, {LATENCY_SEC * 1e6:.0f} us per WinApi call\n')
+
+        for name, batched in (('per event', False), ('SendInput', True)):
+            calls = desktop.calls
+            sec = measure(lambda: InputBatch().key_events(events).send(batched), repeats=3)
+            report(f'type 500 chars, {name} ({(desktop.calls - calls) // 3} calls)', sec, len(events))
+            desktop.pop_messages(desktop.foreground_hwnd)
+
+            calls = desktop.calls
+            sec = measure(lambda: InputBatch().drag(400, 300, steps=100).send(batched), repeats=3)
+            report(f'drag 100 steps, {name} ({(desktop.calls - calls) // 3} calls)', sec, 102)
+
+        report('type_text (translation + SendInput)', measure(lambda: type_text(TEXT), repeats=3), len(TEXT))
+
+
+if __name__ == '__main__':
+    main()
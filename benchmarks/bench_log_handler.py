@@ -0,0 +1,77 @@
+import os
+import sys
+import threading
+import time
+from typing import List
+
+from PySide6.QtCore import QMutex, QMutexLocker, QtMsgType
+from PySide6.QtWidgets import QApplication, QTextEdit
+
+from lib.qt.qt_log_sink import QLogSink
+from lib.qt.qt_traced_thread import QSafeThreadedPrint
+
+"""
+ Per call latency of Qt message handler in worker threads, while the UI thread only drains the sink.
+ Previous handler held a global QMutex around printing, it is reproduced for comparison:
+ python -m benchmarks.bench_log_handler
+"""
+
+THREADS = 4
+CALLS = 20000
+
+
+def locked_print_handler(mutex: QMutex, out):
+    def handler(mode, context, msg):
+        cur_thread_name = threading.current_thread().name
+        with QMutexLocker(mutex):
+            print(f"{cur_thread_name:>10}   {msg}", file=out)
+    return handler
+
+
+def worker_loop(handler, latencies: List[int]):
+    perf_counter_ns = time.perf_counter_ns
+    for i in range(CALLS):
+        start = perf_counter_ns()
+        handler(QtMsgType.QtInfoMsg, None, f'message {i}')
+        latencies += [perf_counter_ns() - start]
+
+
+def run_threads(handler) -> List[int]:
+    results = [[] for _ in range(THREADS)]
+    threads = [threading.Thread(target=worker_loop, args=(handler, result), name=f'worker{i}')
+               for i, result in enumerate(results)]
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        # UI thread keeps draining as it does on timer
+        QApplication.processEvents()
+        time.sleep(0.005)
+    return sorted(latency for result in results for latency in result)
+
+
+def print_latencies(name, latencies: List[int]):
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] / 1000
+    print(f'{name:<32} p50 {percentile(0.5):>8.2f} us   p99 {percentile(0.99):>8.2f} us   '
+          f'max {latencies[-1] / 1000:>10.2f} us')
+
+
+def main():
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    _ = QApplication(sys.argv)
+    text_edit = QTextEdit()
+
+    with open(os.devnull, 'w') as devnull:
+        print_latencies('QMutex held print', run_threads(locked_print_handler(QMutex(), devnull)))
+
+        sink = QLogSink(text_edit, echo_stdout=False)
+        QSafeThreadedPrint.sink = sink
+        print_latencies('queued record', run_threads(QSafeThreadedPrint.log_handler))
+        QSafeThreadedPrint.sink = None
+        sink.close()
+
+    print(f'\nLog blocks kept in widget: {text_edit.document().blockCount()} (capped), calls: {THREADS * CALLS}')
+
+
+if __name__ == '__main__':
+    main()
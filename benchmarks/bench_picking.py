@@ -0,0 +1,105 @@
+import random
+import time
+from typing import Callable, List, Tuple
+
+import src.helpers.winapi.backend as backend
+from benchmarks.common import simulated_desktop
+from src.helpers.winapi.other import get_window_info_under_cursor
+from src.helpers.winapi.window_events import HookEventSource, PollingEventSource, FOREGROUND_CHANGED
+
+"""
+ Window picking in virtual time: WinApi calls while the user is idle and reaction to focus changes.
+ python -m benchmarks.bench_picking
+"""
+
+IDLE_SEC = 10.0
+FOCUS_CHANGES = 50
+FIXED_INTERVAL_SEC = 0.1
+
+# poll() -> (seconds until next poll, focus change noticed)
+Poll = Callable[[], Tuple[float, bool]]
+
+
+def fixed_poll() -> Poll:
+    """ As picking was: window under cursor and foreground window every 100 ms """
+    state = {'focus': backend.api.GetForegroundWindow()}
+
+    def poll():
+        get_window_info_under_cursor()
+        focus = backend.api.GetForegroundWindow()
+        focused, state['focus'] = focus != state['focus'], focus
+        return FIXED_INTERVAL_SEC, focused
+    return poll
+
+
+def adaptive_poll() -> Poll:
+    source = PollingEventSource()
+    kinds = set()
+    source.subscribe(lambda event: kinds.add(event.kind))
+    source.start()
+
+    def poll():
+        kinds.clear()
+        return source.poll(), FOREGROUND_CHANGED in kinds
+    return poll
+
+
+def idle_calls_per_sec(desktop, poll: Poll) -> float:
+    calls, now = desktop.calls, 0.0
+    while now < IDLE_SEC:
+        now += poll()[0]
+    return (desktop.calls - calls) / IDLE_SEC
+
+
+def focus_lags(desktop, poll: Poll, targets: List[int]) -> List[float]:
+    """ Each focus change happens at a random moment after a second of idle polling """
+    rng = random.Random(1)
+    lags = []
+    now = 0.0
+    for hwnd in targets:
+        change_at = now + 1.0 + rng.random() * 0.2
+        changed = False
+        while True:
+            if not changed and now >= change_at:
+                desktop.SetForegroundWindow(hwnd)
+                changed = True
+            interval, focused = poll()
+            if focused:
+                lags += [now - change_at]
+                break
+            now += interval
+    return lags
+
+
+def print_result(name, calls_per_sec, lags: List[float]):
+    print(f'{name:<24} idle {calls_per_sec:>6.1f} calls/s   focus lag mean {sum(lags) / len(lags) * 1000:>6.1f} ms '
+          f'max {max(lags) * 1000:>6.1f} ms')
+
+
+def main():
+    with simulated_desktop(processes=FOCUS_CHANGES) as desktop:
+        targets = desktop.top_level[1:FOCUS_CHANGES + 1]
+        desktop.SetForegroundWindow(desktop.top_level[0])
+
+        for name, make_poll in (('fixed 100 ms polling', fixed_poll), ('adaptive polling', adaptive_poll)):
+            calls_per_sec = idle_calls_per_sec(desktop, make_poll())
+            desktop.SetForegroundWindow(desktop.top_level[0])
+            print_result(name, calls_per_sec, focus_lags(desktop, make_poll(), targets))
+            desktop.SetForegroundWindow(desktop.top_level[0])
+
+        # hooks are called as changes happen, nothing runs while idle
+        source = HookEventSource()
+        noticed = []
+        source.subscribe(lambda event: noticed.append(event.time_sec))
+        source.start()
+        lags = []
+        for hwnd in targets:
+            changed_at = time.perf_counter()
+            desktop.SetForegroundWindow(hwnd)
+            lags += [noticed[-1] - changed_at]
+        source.stop()
+        print_result('WinEvent hooks', 0.0, lags)
+
+
+if __name__ == '__main__':
+    main()
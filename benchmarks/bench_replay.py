@@ -0,0 +1,45 @@
+import argparse
+import tempfile
+from pathlib import Path
+
+import src.message_trace as message_trace
+from benchmarks.common import simulated_desktop
+from src.helpers.winapi.consts import WM_KEYDOWN, WM_KEYUP
+from src.replay import Replayer, trace_events, retarget
+
+"""
+ Timing fidelity of trace replay at several speeds, events are streamed from the trace file:
+ python -m benchmarks.bench_replay --events 2000 --interval-ms 1
+"""
+
+
+def write_trace(path: Path, events, interval_ns, hwnd):
+    recorder = message_trace.TraceRecorder(path)
+    post_message = message_trace.api_id('PostMessage')
+    for i in range(events):
+        msg = WM_KEYDOWN if i % 2 == 0 else WM_KEYUP
+        recorder.record(i * interval_ns, hwnd, post_message, msg, ord('A') + i // 2 % 26, 0, 0, 0)
+    recorder.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--events', type=int, default=2000)
+    parser.add_argument('--interval-ms', type=float, default=1.0)
+    args = parser.parse_args()
+
+    path = Path(tempfile.mkdtemp()) / 'replay.trace'
+    with simulated_desktop(processes=4) as desktop:
+        recorded_hwnd, *targets = desktop.top_level[:4]
+        write_trace(path, args.events, int(args.interval_ms * 1e6), recorded_hwnd)
+
+        for speed in (1.0, 10.0, None):
+            events = retarget(trace_events(path), {recorded_hwnd: targets})
+            stats = Replayer(speed).run(events)
+            for hwnd in targets:
+                desktop.pop_messages(hwnd)
+            print(f'{"max" if speed is None else f"x{speed:g}":>5}: {stats.summary()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+import argparse
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import src.sequence_file as sequence_file
+from benchmarks.common import simulated_desktop, report
+
+"""
+ Load time of a sequence library: parse and validate on the first load, cached plans later:
+ python -m benchmarks.bench_sequences --files 500 --steps 200
+"""
+
+
+def write_library(directory: Path, files, steps):
+    chars = 'abcdefghijklmnopqrstuvwxyz0123456789'
+    for i in range(files):
+        data = {'name': f'sequence {i}', 'target': {'module': 'notepad.exe'}, 'delay_sec': 0.01,
+                'steps': [{'api': 'PostMessage', 'msg': 'WM_KEYDOWN' if j % 2 == 0 else 'WM_KEYUP',
+                           'key': chars[(i + j // 2) % len(chars)]} for j in range(steps)]}
+        (directory / f'sequence_{i:04}.json').write_text(json.dumps(data), encoding='utf-8')
+
+
+def load_all(paths):
+    return sum(len(sequence_file.load_sequence(path).steps) for path in paths)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--files', type=int, default=500)
+    parser.add_argument('--steps', type=int, default=200)
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp())
+    library, sequence_file.CACHE_DIR = root / 'sequences', root / 'cache'
+    library.mkdir()
+    write_library(library, args.files, args.steps)
+    paths = sequence_file.sequence_files(library)
+
+    with simulated_desktop(processes=1):
+        for name in ('first load, parse and validate', 'cached plans'):
+            start = time.perf_counter()
+            steps = load_all(paths)
+            report(f'{name}, {len(paths)} files', time.perf_counter() - start, steps)
+    shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
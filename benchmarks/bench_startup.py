@@ -0,0 +1,78 @@
+import argparse
+import importlib.util
+import subprocess
+import sys
+import time
+from statistics import median
+from typing import List, Tuple
+
+"""
+ Cold start regression check: imports app modules in fresh interpreters, exits with 1 if over budget.
+ python -m benchmarks.bench_startup --budget-ms 400
+ Headless runner is always measured, GUI src.main when PySide6 is installed.
+"""
+
+DEFAULT_BUDGET_MS = 400
+HEADLESS_MODULES = ['src.run_headless']
+GUI_MODULES = ['src.main']
+
+
+def import_time_sec(modules: List[str]) -> Tuple[float, str]:
+    """ Wall time of a fresh interpreter importing modules, and its -X importtime report """
+    code = 'import ' + ', '.join(modules)
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f'Import failed:\n{result.stderr[-2000:]}')
+    return elapsed, result.stderr
+
+
+def slowest_imports(report: str, count=10) -> List[Tuple[int, str]]:
+    """ (cumulative us, module) from -X importtime lines: 'import time: self | cumulative | name' """
+    rows = []
+    for line in report.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        rows += [(int(cumulative), name.rstrip())]
+    # only top level imports of each chain are interesting
+    rows = [(us, name) for us, name in rows if not name.startswith('    ' * 3)]
+    return sorted(rows, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    entries = [HEADLESS_MODULES] + ([GUI_MODULES] if importlib.util.find_spec('PySide6') else [])
+    empty_sec = median(import_time_sec(['sys'])[0] for _ in range(args.repeats))
+    print(f'Interpreter start: {empty_sec * 1000:.1f} ms, budget {args.budget_ms:.0f} ms')
+
+    imports_ms = {}
+    for modules in entries:
+        # first run fills OS file cache and const tables cache, as any real start after the first one
+        import_time_sec(modules)
+        runs = [import_time_sec(modules) for _ in range(args.repeats)]
+        name = ', '.join(modules)
+        imports_ms[name] = (median(sec for sec, _ in runs) - empty_sec) * 1000
+
+        print(f'\nimport {name}: {imports_ms[name]:.1f} ms')
+        for us, module in slowest_imports(runs[-1][1]):
+            print(f'{us / 1000:>8.1f} ms  {module}')
+
+    if len(imports_ms) > 1:
+        headless_ms, gui_ms = imports_ms.values()
+        print(f'\nHeadless start is {gui_ms / max(headless_ms, 0.001):.1f}x faster than GUI')
+
+    over_budget = {name: ms for name, ms in imports_ms.items() if ms > args.budget_ms}
+    for name, ms in over_budget.items():
+        print(f'\nStartup budget of {name} exceeded by {ms - args.budget_ms:.1f} ms')
+    if over_budget:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
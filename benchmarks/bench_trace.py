@@ -0,0 +1,64 @@
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import src.message_trace as message_trace
+from benchmarks.common import simulated_desktop, measure, report
+from src.messages import message_presets, compile_messages, run_plan_step
+
+"""
+ Cost of trace recording on the send path and load time of a large trace into columns:
+ python -m benchmarks.bench_trace --records 1000000
+"""
+
+SENDS = 50000
+
+
+def send_loop(hwnd, plan):
+    for _ in range(SENDS // len(plan)):
+        for step in plan:
+            run_plan_step(hwnd, step)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=1000000)
+    args = parser.parse_args()
+
+    trace_dir = Path(tempfile.mkdtemp())
+    # send_click needs cursor state, keys only
+    plan = compile_messages(message_presets[1:])
+    sends = SENDS // len(plan) * len(plan)
+
+    with simulated_desktop(processes=1) as desktop:
+        hwnd = desktop.top_level[0]
+        untraced = measure(lambda: send_loop(hwnd, plan), repeats=3)
+        desktop.pop_messages(hwnd)
+
+        message_trace.start_recording(trace_dir / 'sends.trace')
+        traced = measure(lambda: send_loop(hwnd, plan), repeats=3)
+        message_trace.stop_recording()
+        desktop.pop_messages(hwnd)
+
+    report(f'send loop x{sends}, not recorded', untraced, sends)
+    report(f'send loop x{sends}, recorded', traced, sends)
+    print(f'Recording overhead: {(traced - untraced) / sends * 1e9:.0f} ns per step\n')
+
+    path = trace_dir / 'large.trace'
+    recorder = message_trace.TraceRecorder(path)
+    start = time.perf_counter()
+    post_message = message_trace.api_id('PostMessage')
+    for i in range(args.records):
+        recorder.record(i, 0x10010, post_message, 0x100, i & 0xFF, 0, 1, 1000)
+    recorder.close()
+    report(f'record x{args.records}', time.perf_counter() - start, args.records)
+
+    start = time.perf_counter()
+    columns = message_trace.TraceColumns.load(path)
+    report(f'load columns, {path.stat().st_size / 2 ** 20:.0f} MB', time.perf_counter() - start, len(columns))
+    print(columns.summary())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+import sys
+import threading
+import time
+
+from benchmarks.common import simulated_desktop, report
+from src.helpers.winapi.consts import WM_KEYDOWN
+from src.messages import WinMsg, EnumArg, PostMessage, wm_args, compile_messages, run_plan_step
+
+"""
+ Throughput of a worker thread send loop with and without a trace function, as installed by pydevd.settrace().
+ Tracer here is a minimal line tracer, so the traced result is a lower bound of real debugger cost:
+ python -m benchmarks.bench_tracing
+"""
+
+SENDS = 50000
+
+
+def line_tracer(frame, event, arg):
+    # pydevd does much more per event, like breakpoint lookups
+    return line_tracer
+
+
+def worker_loop(hwnd, plan, traced, result):
+    if traced:
+        sys.settrace(line_tracer)
+    start = time.perf_counter()
+    for _ in range(SENDS // len(plan)):
+        for step in plan:
+            run_plan_step(hwnd, step)
+    result += [time.perf_counter() - start]
+    sys.settrace(None)
+
+
+def run_in_thread(hwnd, plan, traced) -> float:
+    result = []
+    thread = threading.Thread(target=worker_loop, args=(hwnd, plan, traced, result))
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def main():
+    plan = compile_messages([WinMsg(PostMessage, EnumArg(wm_args, WM_KEYDOWN), 'VK_TAB')])
+    with simulated_desktop(processes=1) as desktop:
+        hwnd = desktop.top_level[0]
+        untraced = min(run_in_thread(hwnd, plan, traced=False) for _ in range(3))
+        desktop.pop_messages(hwnd)
+        traced = min(run_in_thread(hwnd, plan, traced=True) for _ in range(3))
+        desktop.pop_messages(hwnd)
+
+    report(f'worker send loop x{SENDS}, untraced', untraced, SENDS)
+    report(f'worker send loop x{SENDS}, traced', traced, SENDS)
+    print(f'\nTracing slowdown: {traced / untraced:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
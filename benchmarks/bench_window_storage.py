@@ -0,0 +1,77 @@
+import argparse
+import random
+import tracemalloc
+from dataclasses import dataclass
+
+from benchmarks.common import simulated_desktop, measure, report
+from src.helpers.winapi.processes import get_process_windows, filter_process_windows, get_process_window_columns
+from src.helpers.winapi.registry import WindowRegistry
+from src.helpers.winapi.window_columns import WindowColumns, np
+from src.helpers.winapi.window_info import WindowInfo
+
+
+@dataclass(init=True)
+class DictWindowInfo:
+    """ WindowInfo before __slots__ """
+    hwnd: int
+    root_parent_hwnd: int
+    pid: int
+    module_path: str
+    style: int
+    visible: bool
+    title: str
+
+
+def traced_size(build):
+    """ Bytes allocated by build() and still alive """
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Memory and time of window storage variants')
+    parser.add_argument('--processes', type=int, default=300)
+    parser.add_argument('--children', type=int, default=33, help='child windows per top-level window')
+    args = parser.parse_args()
+
+    with simulated_desktop(processes=args.processes, children_per_window=args.children) as _:
+        wnds = get_process_windows()
+        total = len(wnds)
+        print(f'{total} windows, NumPy: {np is not None}\n')
+        # titles and module strings are shared by all variants, only storage overhead is compared
+        fields = [(w.hwnd, w.root_parent_hwnd, w.pid, w.module_path, w.style, w.visible, w.title) for w in wnds]
+
+        _, dict_size = traced_size(lambda: [DictWindowInfo(*f) for f in fields])
+        _, slots_size = traced_size(lambda: [WindowInfo(*f) for f in fields])
+        columns, columns_size = traced_size(lambda: WindowColumns.from_infos(wnds))
+        for name, size in (('dataclass list', dict_size), ('__slots__ list', slots_size), ('columns', columns_size)):
+            print(f'{name:<48} {size / 1024:>10.0f} KiB   {size / total:>6.0f} B/window')
+        print()
+
+        report('get_process_windows', measure(get_process_windows), total)
+        report('get_process_window_columns', measure(get_process_window_columns), total)
+
+        legacy = [DictWindowInfo(*f) for f in fields]
+        report('sort dataclass list by lambda',
+               measure(lambda: sorted(legacy, key=lambda w: (w.pid, w.root_parent_hwnd or w.hwnd))), total)
+        report('WindowColumns.sort_order', measure(columns.sort_order), total)
+        # enumeration order of a real desktop is not sorted by pid
+        random.Random(0).shuffle(legacy)
+        shuffled_columns = WindowColumns.from_infos(legacy)
+        report('sort shuffled dataclass list by lambda',
+               measure(lambda: sorted(legacy, key=lambda w: (w.pid, w.root_parent_hwnd or w.hwnd))), total)
+        report('WindowColumns.sort_order shuffled', measure(shuffled_columns.sort_order), total)
+
+        report('filter_process_windows(module_exe)',
+               measure(lambda: filter_process_windows(wnds, module_exe='app7.exe')), total)
+        report('WindowRegistry.query(module_exe) incl. build',
+               measure(lambda: WindowRegistry(wnds).query(module_exe='app7.exe')), total)
+        report('WindowColumns.filter(module_exe)', measure(lambda: columns.filter(module_exe='app7.exe')), total)
+        report('WindowColumns.filter(visible)', measure(lambda: columns.filter()), total)
+
+
+if __name__ == '__main__':
+    main()
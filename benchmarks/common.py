@@ -0,0 +1,43 @@
+import time
+from contextlib import contextmanager
+from statistics import median
+from typing import Callable
+
+import src.helpers.winapi.backend as backend
+from src.helpers.winapi.keyboard import keyboard_tables
+from src.helpers.winapi.simulated_backend import SimulatedDesktop
+
+"""
+ Benchmarks run against SimulatedDesktop by default, so they can run on Linux CI:
+ python -m benchmarks.bench_enumeration
+"""
+
+
+@contextmanager
+def simulated_desktop(**generate_kwargs):
+    """ Temporarily replaces WinApi backend with a generated SimulatedDesktop """
+    desktop = SimulatedDesktop.generate(**generate_kwargs)
+    prev_api = backend.set_backend(desktop)
+    # tables of a generated desktop are built for it, not loaded from or written to the cache on disk
+    prev_keyboard = keyboard_tables.cache_dir, keyboard_tables.tables
+    keyboard_tables.cache_dir, keyboard_tables.tables = None, {}
+    try:
+        yield desktop
+    finally:
+        backend.set_backend(prev_api)
+        keyboard_tables.cache_dir, keyboard_tables.tables = prev_keyboard
+
+
+def measure(func: Callable, repeats=5) -> float:
+    """ Median of wall time in seconds """
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times += [time.perf_counter() - start]
+    return median(times)
+
+
+def report(name, sec, count=None):
+    rate = f'   {count / sec:>12,.0f} /s' if count and sec > 0 else ''
+    print(f'{name:<48} {sec * 1000:>10.2f} ms{rate}')
@@ -0,0 +1,92 @@
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from PySide6.QtCore import QObject, QTimer, Qt, Signal, Slot, qDebug
+
+
+class QDeadlineScheduler(QObject):
+    """
+    Runs steps at absolute deadlines in the event loop of own thread, replaces a loop of sleeps:
+
+    for action, delay_sec in steps:
+        action()
+        sleep(delay_sec)
+
+    Deadline of each step is start time plus delays of all previous steps,
+    so time spent in actions and timer inaccuracy do not accumulate (drift compensation).
+    Late steps run immediately to catch up, but at most MAX_SLICE_SEC at once,
+    then control returns to the event loop, so thread quit is never blocked, which is also how a run is stopped.
+    """
+    MAX_SLICE_SEC = 0.005
+
+    step_done = Signal(int)
+    # True if all steps were done, False if an action raised
+    finished = Signal(bool)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self.on_timeout)
+
+        self.steps: List[Tuple[Callable, float]] = []
+        self.n = 0
+        self.next_deadline = 0.0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.max_lag_sec = 0.0
+
+    def start(self, steps: Sequence[Tuple[Callable, float]]):
+        """ steps: (action, delay in seconds from this step deadline to the next one), delay may be 0 """
+        assert not self.is_running()
+        self.steps = list(steps)
+        self.n = 0
+        self.max_lag_sec = 0.0
+        self.started_at = self.next_deadline = time.perf_counter()
+        self.finished_at = None
+        self.timer.start(0)
+
+    def is_running(self) -> bool:
+        return self.started_at is not None and self.finished_at is None
+
+    def finish(self, completed):
+        self.timer.stop()
+        self.finished_at = time.perf_counter()
+        qDebug(f'QDeadlineScheduler.finish, completed: {completed}')
+        self.finished.emit(completed)
+
+    @Slot()
+    def on_timeout(self):
+        slice_end = time.perf_counter() + self.MAX_SLICE_SEC
+        now = time.perf_counter()
+        while self.n < len(self.steps) and self.next_deadline <= now < slice_end:
+            self.max_lag_sec = max(self.max_lag_sec, now - self.next_deadline)
+            action, delay_sec = self.steps[self.n]
+            try:
+                action()
+            except:
+                self.finish(False)
+                raise
+
+            self.step_done.emit(self.n)
+            self.n += 1
+            self.next_deadline += delay_sec
+            now = time.perf_counter()
+
+        if self.n == len(self.steps):
+            self.finish(True)
+            return
+
+        wait_msec = max(0, round((self.next_deadline - now) * 1000))
+        self.timer.start(wait_msec)
+
+    def elapsed_sec(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    def achieved_rate(self) -> float:
+        """ Steps per second since start """
+        elapsed = self.elapsed_sec()
+        return self.n / elapsed if elapsed > 0 else 0.0
@@ -0,0 +1,91 @@
+import logging
+import sys
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Deque, Optional, Tuple
+
+from PySide6.QtCore import QObject, QTimer, Slot
+from PySide6.QtWidgets import QTextEdit
+
+
+class QLogSink(QObject):
+    """
+    Log lines from any thread are only appended to a ring buffer,
+    UI thread flushes them on timer: one append to the text widget and one stdout write per batch.
+    Visible document is capped by block count, full history goes to rotating file if file_path is given.
+    If UI can't keep up, oldest pending lines are dropped and counted, instead of growing memory.
+    """
+
+    def __init__(self, text_edit: QTextEdit, parent: QObject = None, flush_msec=50, max_blocks=5000,
+                 max_pending=100000, file_path: Optional[Path] = None, file_max_bytes=5 * 1024 * 1024,
+                 file_backups=3, echo_stdout=True):
+        super().__init__(parent)
+        self.text_edit = text_edit
+        self.text_edit.document().setMaximumBlockCount(max_blocks)
+        self.echo_stdout = echo_stdout
+
+        # (visible in widget, line), deque append and popleft are thread safe
+        self.pending: Deque[Tuple[bool, str]] = deque(maxlen=max_pending)
+        # approximate, counted without lock
+        self.dropped = 0
+
+        self.file_logger: Optional[logging.Logger] = None
+        if file_path:
+            self.file_logger = self.create_file_logger(file_path, file_max_bytes, file_backups)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.flush)
+        self.timer.start(flush_msec)
+
+    @staticmethod
+    def create_file_logger(file_path: Path, max_bytes, backups) -> Optional[logging.Logger]:
+        try:
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            handler = RotatingFileHandler(file_path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+        except OSError as e:
+            print(f'Log file is disabled: {e}')
+            return None
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger = logging.getLogger(f'{__name__}.{file_path}')
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        logger.addHandler(handler)
+        return logger
+
+    def write(self, msg: str, visible=True):
+        """ Safe from any thread, never touches widgets """
+        if len(self.pending) == self.pending.maxlen:
+            self.dropped += 1
+        self.pending.append((visible, msg))
+
+    @Slot()
+    def flush(self):
+        count = len(self.pending)
+        if not count:
+            return
+
+        batch = [self.pending.popleft() for _ in range(count)]
+        dropped, self.dropped = self.dropped, 0
+
+        all_lines = '\n'.join(msg for _, msg in batch)
+        visible_lines = [msg for visible, msg in batch if visible]
+        if dropped:
+            notice = f'... {dropped} log lines dropped, UI could not keep up'
+            visible_lines.insert(0, notice)
+            all_lines = notice + '\n' + all_lines
+
+        if visible_lines:
+            self.text_edit.append('\n'.join(visible_lines))
+        if self.echo_stdout:
+            sys.stdout.write(all_lines + '\n')
+        if self.file_logger:
+            self.file_logger.info(all_lines)
+
+    @Slot()
+    def close(self):
+        self.timer.stop()
+        self.flush()
+        if self.file_logger:
+            for handler in self.file_logger.handlers:
+                handler.close()
@@ -1,15 +1,51 @@
+import os
 import sys
 import threading
 from abc import abstractmethod
+from datetime import datetime
+from typing import Optional
 
-import pydevd
-from PySide6.QtCore import QThread, QObject, Signal, Slot, QDeadlineTimer, qWarning, QMutex, QMutexLocker, \
-    qInstallMessageHandler, qDebug, qCritical
+from PySide6.QtCore import QThread, QObject, Signal, Slot, QDeadlineTimer, qWarning, qInstallMessageHandler, \
+    qDebug, qCritical, QtMsgType
 from typing_extensions import override
 
+from lib.qt.qt_log_sink import QLogSink
+
 from src.helpers.virtual_methods import virutalmethod
 
 
+ENV_THREAD_TRACE = 'QT_THREAD_TRACE'
+
+
+def default_thread_trace() -> bool:
+    """ QT_THREAD_TRACE=1 or 0 forces, otherwise threads are traced only if debugger (pydevd) is already loaded """
+    value = os.environ.get(ENV_THREAD_TRACE)
+    if value is not None:
+        return value == '1'
+    return 'pydevd' in sys.modules
+
+
+# pydevd trace function slows every line of traced thread, so without debugger it is not installed at all
+thread_trace_enabled = default_thread_trace()
+
+
+def set_thread_trace(enabled: bool):
+    """ Affects threads and workers started later, running ones can be traced by QWorker.trace_requested """
+    global thread_trace_enabled
+    thread_trace_enabled = enabled
+
+
+def settrace(force=False):
+    """ Traces current thread for debugger, pydevd is heavy so it is imported on first use """
+    if not (thread_trace_enabled or force):
+        return
+    try:
+        import pydevd
+    except ImportError:
+        return
+    pydevd.settrace(suspend=False)
+
+
 class QTracedThread(QThread):
     QUIT_DEADLINE_MS = 500
     TERMINATION_DEADLINE_MS = 5000
@@ -22,7 +58,7 @@ class QTracedThread(QThread):
     @override
     def run(self):
         # controls timer events tracing even when worker is used
-        pydevd.settrace(suspend=False)
+        settrace()
 
         qDebug('QTracedThread.run')
         self.started_fix.emit()
@@ -61,11 +97,15 @@ class QTracedThread(QThread):
 class QWorker(QObject):
     finished = Signal()
     started = Signal()
+    # emit from any thread to attach debugger to already running worker,
+    # queued into worker thread since settrace() affects only the calling thread
+    trace_requested = Signal()
 
     def __init__(self, *args, **kwargs):
         super(QWorker, self).__init__(*args, **kwargs)
         # self.on_finished better before other connections, therefore in __init__, not on_run
         self.finished.connect(self.on_finished)
+        self.trace_requested.connect(self.on_trace_requested)
 
     @abstractmethod
     def on_run(self):
@@ -74,7 +114,7 @@ class QWorker(QObject):
     @Slot()
     def run(self):
         # was nessesary for QTimer events traced and possibly for others
-        pydevd.settrace(suspend=False)
+        settrace()
         qDebug('QWorker.run')
 
         try:
@@ -89,6 +129,11 @@ class QWorker(QObject):
     def on_finished(self):
         pass
 
+    @Slot()
+    def on_trace_requested(self):
+        qDebug('QWorker.on_trace_requested')
+        settrace(force=True)
+
 
 '''
 class QReusableWorker(QObject):
@@ -129,29 +174,39 @@ class QReusableWorker(QObject):
 
 
 class QSafeThreadedPrint:
-    mutex = QMutex()
-    final_handler = None
+    """
+    Qt message handler runs in the thread which logged, so it only formats the record and enqueues it to the sink,
+    without locks and widget access. UI thread drains the sink on its own timer.
+    """
+    sink: Optional[QLogSink] = None
+
+    LEVELS = {QtMsgType.QtDebugMsg: 'D', QtMsgType.QtInfoMsg: 'I', QtMsgType.QtWarningMsg: 'W',
+              QtMsgType.QtCriticalMsg: 'C', QtMsgType.QtFatalMsg: 'F'}
+    VISIBLE_MODES = (QtMsgType.QtInfoMsg,)
 
     @staticmethod
-    def log_handler(mode, context, msg):
+    def format_record(mode, msg) -> str:
         # debugger is not attached by default for new threads
         # this may help to detect untraced cases
         # deb_on = sys.gettrace() is not None
         # deb_info = f"Debuger attached: {deb_on}"
+        timestamp = datetime.now().strftime('%H:%M:%S.%f')[:-3]
+        level = QSafeThreadedPrint.LEVELS.get(mode, '?')
+        return f"{timestamp} {level} {threading.current_thread().name:>10}   {msg}"
 
-        # test, always main one?
-        cur_thread_name = threading.current_thread().name
-        with QMutexLocker(QSafeThreadedPrint.mutex):
-            if QSafeThreadedPrint.final_handler:
-                QSafeThreadedPrint.final_handler(mode, context, f"{cur_thread_name:>10}   {msg}")
+    @staticmethod
+    def log_handler(mode, context, msg):
+        sink = QSafeThreadedPrint.sink
+        if sink:
+            sink.write(QSafeThreadedPrint.format_record(mode, msg), visible=mode in QSafeThreadedPrint.VISIBLE_MODES)
 
     @staticmethod
-    def install_safe_qt_message_handler(final_handler):
+    def install_safe_qt_message_handler(sink: QLogSink):
         """
-        Thread safely redirects qDebug, qWarning, etc to final_handler(msg)
-        also adds debug info
+        Thread safely redirects qDebug, qWarning, etc to sink
+        also adds time, level and thread name
         """
-        assert QSafeThreadedPrint.final_handler is None
-        QSafeThreadedPrint.final_handler = final_handler
+        assert QSafeThreadedPrint.sink is None
+        QSafeThreadedPrint.sink = sink
 
         qInstallMessageHandler(QSafeThreadedPrint.log_handler)
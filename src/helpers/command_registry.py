@@ -0,0 +1,50 @@
+from typing import Callable, Dict, Optional, Any, Set
+
+# handler(hwnd, key, enum_value), key and enum_value are already resolved integers or None
+CommandHandler = Callable[[int, Optional[int], Optional[int]], Any]
+
+# command (function shown in UI) -> handler which calls it with resolved arguments
+command_handlers: Dict[Callable, CommandHandler] = {}
+# handlers which neither need focus nor wait for target, so targets can be interleaved
+background_handlers: Set[CommandHandler] = set()
+
+
+def register_command(cmd: Callable, background=False):
+    """
+    Decorator of a handler, any module can add commands without touching message dispatch:
+
+    @register_command(send_click)
+    def run_send_click(hwnd, key, enum_value): ...
+
+    background: handler only posts to hwnd queue, like PostMessage
+    """
+    def decorator(handler: CommandHandler) -> CommandHandler:
+        assert cmd not in command_handlers, f'Command {cmd.__name__} is already registered'
+        command_handlers[cmd] = handler
+        if background:
+            background_handlers.add(handler)
+        return handler
+    return decorator
+
+
+def is_background_handler(handler: CommandHandler) -> bool:
+    return handler in background_handlers
+
+
+def get_command_handler(cmd: Callable) -> CommandHandler:
+    handler = command_handlers.get(cmd)
+    if handler is None:
+        raise NotImplementedError(f'No handler registered for command {getattr(cmd, "__name__", cmd)}')
+    return handler
+
+
+def get_command_by_name(name: str) -> Callable:
+    """ By __name__ of command, as stored in message traces and sequence files """
+    for cmd in command_handlers:
+        if getattr(cmd, '__name__', None) == name:
+            return cmd
+    raise NotImplementedError(f'No handler registered for command {name}')
+
+
+def get_command_handler_by_name(name: str) -> CommandHandler:
+    return command_handlers[get_command_by_name(name)]
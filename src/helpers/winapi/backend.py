@@ -0,0 +1,165 @@
+"""
+ All WinApi calls of helpers go through backend.api, which allows to swap pywin32 with
+ SimulatedDesktop to profile and load test hot paths outside of Windows.
+
+ Modules must keep the module reference, not the function, since backend can be switched:
+ import src.helpers.winapi.backend as backend
+ backend.api.GetWindowText(hwnd)
+
+ Backend is selected by WINAPI_BACKEND env var: 'win32' (default on Windows), 'ctypes' (win32 with hot calls
+ bound via ctypes) or 'simulated'.
+"""
+
+import os
+import sys
+from typing import Sequence, Dict, Any
+
+from src.helpers.winapi.backend_base import WinApiBackend, WinApiError, WinEventCallback
+from src.helpers.winapi.consts import WINEVENT_OUTOFCONTEXT
+from src.helpers.winapi.input_events import InputEvent, INPUT, to_input_array
+
+ENV_BACKEND = 'WINAPI_BACKEND'
+MAX_LONG_PATH = 32767
+
+
+class Win32Backend(WinApiBackend):
+    """ pywin32 functions are bound directly to the instance, so no wrapper call overhead """
+
+    system = 'win32'
+
+    def __init__(self):
+        import pywintypes
+        import win32api
+        import win32gui
+        import win32process
+
+        self.pywintypes_error = pywintypes.error
+        self.enum_windows = win32gui.EnumWindows
+        self.enum_child_windows = win32gui.EnumChildWindows
+        self.GetWindowText = win32gui.GetWindowText
+        self.SetWindowText = win32gui.SetWindowText
+        self.GetWindowLong = win32api.GetWindowLong
+        self.GetWindowThreadProcessId = win32process.GetWindowThreadProcessId
+        self.GetWindowPlacement = win32gui.GetWindowPlacement
+        self.GetWindowRect = win32gui.GetWindowRect
+        self.GetClientRect = win32gui.GetClientRect
+        self.ScreenToClient = win32gui.ScreenToClient
+        self.IsWindow = win32gui.IsWindow
+        self.GetForegroundWindow = win32gui.GetForegroundWindow
+        self.SetForegroundWindow = win32gui.SetForegroundWindow
+        self.WindowFromPoint = win32gui.WindowFromPoint
+        self.GetCursorPos = win32api.GetCursorPos
+        self.OpenProcess = win32api.OpenProcess
+        self.CloseHandle = win32api.CloseHandle
+        self.GetModuleFileNameEx = win32process.GetModuleFileNameEx
+        self.GetProcessTimes = win32process.GetProcessTimes
+        self.SendMessage = win32api.SendMessage
+        self.PostMessage = win32api.PostMessage
+        self.keybd_event = win32api.keybd_event
+        self.mouse_event = win32api.mouse_event
+        self.VkKeyScan = win32api.VkKeyScan
+        self.VkKeyScanEx = win32api.VkKeyScanEx
+        self.GetKeyboardLayout = win32api.GetKeyboardLayout
+
+        # not wrapped by pywin32
+        import ctypes
+        from ctypes import windll, wintypes, create_unicode_buffer, byref, POINTER
+        self.query_image_name = windll.kernel32.QueryFullProcessImageNameW
+        self.query_image_name.argtypes = [wintypes.HANDLE, wintypes.DWORD, wintypes.LPWSTR, POINTER(wintypes.DWORD)]
+        self.query_image_name.restype = wintypes.BOOL
+        self.image_name_buffer = create_unicode_buffer(MAX_LONG_PATH)
+        self.image_name_size = wintypes.DWORD()
+        self.byref = byref
+
+        self.send_input = windll.user32.SendInput
+        self.send_input.argtypes = [wintypes.UINT, POINTER(INPUT), ctypes.c_int]
+        self.send_input.restype = wintypes.UINT
+        self.input_size = ctypes.sizeof(INPUT)
+
+        self.win_event_proc_type = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+                                                      wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+        self.set_win_event_hook = windll.user32.SetWinEventHook
+        self.set_win_event_hook.argtypes = [wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE,
+                                            self.win_event_proc_type, wintypes.DWORD, wintypes.DWORD, wintypes.DWORD]
+        self.set_win_event_hook.restype = wintypes.HANDLE
+        self.unhook_win_event = windll.user32.UnhookWinEvent
+        self.unhook_win_event.argtypes = [wintypes.HANDLE]
+        self.unhook_win_event.restype = wintypes.BOOL
+        # hook: ctypes callback, which must live as long as the hook
+        self.win_event_procs: Dict[int, Any] = {}
+
+    def EnumWindows(self, callback, extra):
+        # when callback returns False to stop enumeration, pywin32 raises error with code 0
+        try:
+            self.enum_windows(callback, extra)
+        except self.pywintypes_error as e:
+            if e.winerror != 0:
+                raise
+
+    def EnumChildWindows(self, hwnd, callback, extra):
+        try:
+            self.enum_child_windows(hwnd, callback, extra)
+        except self.pywintypes_error as e:
+            if e.winerror != 0:
+                raise
+
+    def QueryFullProcessImageName(self, handle) -> str:
+        self.image_name_size.value = MAX_LONG_PATH
+        if not self.query_image_name(int(handle), 0, self.image_name_buffer, self.byref(self.image_name_size)):
+            raise WinApiError(f'QueryFullProcessImageName failed for handle {int(handle)}')
+        return self.image_name_buffer.value
+
+    def SendInput(self, events: Sequence[InputEvent]) -> int:
+        if not events:
+            return 0
+        return self.send_input(len(events), to_input_array(events), self.input_size)
+
+    def SetWinEventHook(self, event_min, event_max, callback: WinEventCallback) -> int:
+        def on_win_event(_hook, event, hwnd, id_object, id_child, _thread_id, _time_msec):
+            callback(event, hwnd or 0, id_object, id_child)
+
+        proc = self.win_event_proc_type(on_win_event)
+        hook = self.set_win_event_hook(event_min, event_max, None, proc, 0, 0, WINEVENT_OUTOFCONTEXT)
+        if not hook:
+            raise WinApiError(f'SetWinEventHook failed for events {event_min:#x}..{event_max:#x}')
+        self.win_event_procs[hook] = proc
+        return hook
+
+    def UnhookWinEvent(self, hook):
+        self.unhook_win_event(hook)
+        self.win_event_procs.pop(hook, None)
+
+    def press_alt(self):
+        # pyautogui is slow to import and only needed here
+        import pyautogui
+        pyautogui.press("alt")
+
+
+
+# pywin32 functions are bound to the instance in __init__ instead of overriding abstract methods
+Win32Backend.__abstractmethods__ = frozenset()
+
+
+def create_backend(name: str) -> WinApiBackend:
+    if name == 'win32':
+        return Win32Backend()
+    elif name == 'ctypes':
+        from src.helpers.winapi.ctypes_backend import CtypesBackend
+        return CtypesBackend()
+    elif name == 'simulated':
+        from src.helpers.winapi.simulated_backend import SimulatedDesktop
+        return SimulatedDesktop()
+    else:
+        raise ValueError(f'Unknown WinApi backend: {name}')
+
+
+def set_backend(new_api: WinApiBackend) -> WinApiBackend:
+    """ Returns previous backend, so it can be restored """
+    global api
+    prev_api = api
+    api = new_api
+    return prev_api
+
+
+default_backend = 'win32' if sys.platform == 'win32' else 'simulated'
+api: WinApiBackend = create_backend(os.environ.get(ENV_BACKEND, default_backend))
@@ -0,0 +1,166 @@
+"""
+ Interface of WinApi backends, without side effects on import, so backends can import it
+ while backend module creates the default one.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Callable, Tuple, Any, Dict, Sequence
+
+from src.helpers.winapi.input_events import InputEvent, KeyInput, KEYEVENTF_UNICODE
+
+# callback(event, hwnd, id_object, id_child)
+WinEventCallback = Callable[[int, int, int, int], None]
+
+
+class WinApiError(Exception):
+    """ Mimics pywintypes.error for backends without pywin32 """
+    pass
+
+
+class WinApiBackend(ABC):
+    """
+    Method names and signatures intentionally repeat pywin32 functions,
+    so that swap of backend does not change the calling code.
+    """
+    # system which answers the calls, data derived from them (keyboard tables) is cached per system
+    system: str
+
+    @abstractmethod
+    def EnumWindows(self, callback: Callable[[int, Any], bool], extra):
+        raise NotImplementedError
+
+    @abstractmethod
+    def EnumChildWindows(self, hwnd, callback: Callable[[int, Any], bool], extra):
+        raise NotImplementedError
+
+    @abstractmethod
+    def GetWindowText(self, hwnd) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def SetWindowText(self, hwnd, text):
+        raise NotImplementedError
+
+    @abstractmethod
+    def GetWindowLong(self, hwnd, index) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def GetWindowThreadProcessId(self, hwnd) -> Tuple[int, int]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def GetWindowPlacement(self, hwnd) -> Tuple:
+        raise NotImplementedError
+
+    @abstractmethod
+    def GetWindowRect(self, hwnd) -> Tuple[int, int, int, int]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def GetClientRect(self, hwnd) -> Tuple[int, int, int, int]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def ScreenToClient(self, hwnd, point) -> Tuple[int, int]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def IsWindow(self, hwnd) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def GetForegroundWindow(self) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def SetForegroundWindow(self, hwnd):
+        raise NotImplementedError
+
+    @abstractmethod
+    def WindowFromPoint(self, point) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def GetCursorPos(self) -> Tuple[int, int]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def OpenProcess(self, access, inherit, pid):
+        raise NotImplementedError
+
+    @abstractmethod
+    def CloseHandle(self, handle):
+        raise NotImplementedError
+
+    @abstractmethod
+    def GetModuleFileNameEx(self, handle, module) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def QueryFullProcessImageName(self, handle) -> str:
+        """ Unlike GetModuleFileNameEx, requires only PROCESS_QUERY_LIMITED_INFORMATION """
+        raise NotImplementedError
+
+    @abstractmethod
+    def GetProcessTimes(self, handle) -> Dict:
+        raise NotImplementedError
+
+    @abstractmethod
+    def SendMessage(self, hwnd, msg, wparam, lparam):
+        raise NotImplementedError
+
+    @abstractmethod
+    def PostMessage(self, hwnd, msg, wparam, lparam):
+        raise NotImplementedError
+
+    @abstractmethod
+    def keybd_event(self, vk, scan, flags, extra_info):
+        raise NotImplementedError
+
+    @abstractmethod
+    def mouse_event(self, flags, dx, dy, data, extra_info):
+        raise NotImplementedError
+
+    def SendInput(self, events: Sequence[InputEvent]) -> int:
+        """
+        Returns number of inserted events. This is a per event fallback,
+        backends override it with one call for all events.
+        """
+        for event in events:
+            if isinstance(event, KeyInput):
+                if event.flags & KEYEVENTF_UNICODE:
+                    raise WinApiError('Unicode input requires SendInput')
+                self.keybd_event(event.vk, event.scan, event.flags, 0)
+            else:
+                self.mouse_event(event.flags, event.dx, event.dy, event.data, 0)
+        return len(events)
+
+    @abstractmethod
+    def VkKeyScan(self, char) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def VkKeyScanEx(self, char, hkl) -> int:
+        """ Low byte is virtual key, high byte is shift state, -1 if char is not on the layout """
+        raise NotImplementedError
+
+    @abstractmethod
+    def GetKeyboardLayout(self, thread_id) -> int:
+        """ thread_id 0 is current thread """
+        raise NotImplementedError
+
+    @abstractmethod
+    def press_alt(self):
+        """ Unlocks SetForegroundWindow, which is rejected unless input was recently received """
+        raise NotImplementedError
+
+    def SetWinEventHook(self, event_min, event_max, callback: WinEventCallback) -> int:
+        """
+        Out of context hook: callback is called in the thread which set the hook while it pumps messages,
+        Qt event loop does. Returns hook handle. Backends without hooks raise NotImplementedError.
+        """
+        raise NotImplementedError
+
+    def UnhookWinEvent(self, hook):
+        raise NotImplementedError
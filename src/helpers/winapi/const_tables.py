@@ -0,0 +1,74 @@
+"""
+ Named constant tables for UI dropdowns and key name lookups.
+ Scanning win32con (thousands of names) at every start is replaced by a JSON cache,
+ which is regenerated when source module of constants changes.
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import src.helpers.winapi.consts as win32con
+from src.helpers.python_extensions import get_named_consts
+
+CACHE_PATH = Path(__file__).parents[3] / 'data' / 'cache' / 'const_tables.json'
+FORMAT_VERSION = 1
+
+# table name: (mask, excluded names)
+TABLE_MASKS = {
+    'VK': ('VK_*', []),
+    'WM': ('WM_*', ['WM_KEYFIRST']),
+    'KEYEVENTF': ('KEYEVENTF_*', []),
+}
+
+NamedConsts = List[Tuple[str, int]]
+
+
+def consts_source_key() -> str:
+    """ Changes when pywin32 is updated or fallback subset is edited """
+    paths = [win32con.__file__, getattr(sys.modules.get('win32con'), '__file__', None)]
+    return repr([(path, os.stat(path).st_mtime_ns, os.stat(path).st_size) for path in paths if path])
+
+
+def generate_tables() -> Dict[str, NamedConsts]:
+    return {name: get_named_consts(win32con, mask, int, [], exclude) for name, (mask, exclude) in TABLE_MASKS.items()}
+
+
+def load_cached_tables(source_key) -> Dict[str, NamedConsts]:
+    try:
+        data = json.loads(CACHE_PATH.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+    if data.get('version') != FORMAT_VERSION or data.get('source') != source_key:
+        return {}
+    return {name: [tuple(item) for item in table] for name, table in data['tables'].items()}
+
+
+def save_tables(source_key, tables: Dict[str, NamedConsts]):
+    try:
+        CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        data = {'version': FORMAT_VERSION, 'source': source_key, 'tables': tables}
+        CACHE_PATH.write_text(json.dumps(data), encoding='utf-8')
+    except OSError as e:
+        print(f'Constant tables are not cached: {e}')
+
+
+def load_tables() -> Dict[str, NamedConsts]:
+    source_key = consts_source_key()
+    tables = load_cached_tables(source_key)
+    if tables.keys() != TABLE_MASKS.keys():
+        tables = generate_tables()
+        save_tables(source_key, tables)
+    return tables
+
+
+_tables = load_tables()
+
+
+def named_consts(table, place_on_top: List[int] = ()) -> NamedConsts:
+    """ Copy of cached table, sorted by name, values of place_on_top first """
+    members = list(_tables[table])
+    members.sort(key=lambda m: m[1] in place_on_top, reverse=True)
+    return members
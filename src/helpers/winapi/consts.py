@@ -0,0 +1,114 @@
+"""
+ WinApi constants used by helpers.
+ win32con is a plain python module of pywin32, but pywin32 is not installable outside Windows,
+ so a minimal subset is kept here for the simulated backend (benchmarks, CI on Linux).
+
+ Import without warning:
+ from src.helpers.winapi.consts import *  # noqa: F403
+"""
+
+try:
+    from win32con import *  # noqa: F401, F403
+except ImportError:
+    GWL_STYLE = -16
+
+    WS_CHILD = 0x40000000
+    WS_VISIBLE = 0x10000000
+    WS_MINIMIZE = 0x20000000
+    WS_MAXIMIZE = 0x01000000
+    WS_OVERLAPPEDWINDOW = 0x00CF0000
+
+    PROCESS_VM_READ = 0x0010
+    PROCESS_QUERY_INFORMATION = 0x0400
+    PROCESS_ALL_ACCESS = 0x001F0FFF
+
+    SW_SHOWNORMAL = 1
+    SW_SHOWMINIMIZED = 2
+    SW_SHOWMAXIMIZED = 3
+
+    WM_NULL = 0x0000
+    WM_SETTEXT = 0x000C
+    WM_GETTEXT = 0x000D
+    WM_CLOSE = 0x0010
+    WM_KEYFIRST = 0x0100
+    WM_KEYDOWN = 0x0100
+    WM_KEYUP = 0x0101
+    WM_CHAR = 0x0102
+    WM_DEADCHAR = 0x0103
+    WM_SYSKEYDOWN = 0x0104
+    WM_SYSKEYUP = 0x0105
+    WM_SYSCHAR = 0x0106
+    WM_MOUSEMOVE = 0x0200
+    WM_LBUTTONDOWN = 0x0201
+    WM_LBUTTONUP = 0x0202
+    WM_RBUTTONDOWN = 0x0204
+    WM_RBUTTONUP = 0x0205
+
+    VK_LBUTTON = 0x01
+    VK_RBUTTON = 0x02
+    VK_CANCEL = 0x03
+    VK_BACK = 0x08
+    VK_TAB = 0x09
+    VK_CLEAR = 0x0C
+    VK_RETURN = 0x0D
+    VK_SHIFT = 0x10
+    VK_CONTROL = 0x11
+    VK_MENU = 0x12
+    VK_PAUSE = 0x13
+    VK_CAPITAL = 0x14
+    VK_ESCAPE = 0x1B
+    VK_SPACE = 0x20
+    VK_PRIOR = 0x21
+    VK_NEXT = 0x22
+    VK_END = 0x23
+    VK_HOME = 0x24
+    VK_LEFT = 0x25
+    VK_UP = 0x26
+    VK_RIGHT = 0x27
+    VK_DOWN = 0x28
+    VK_INSERT = 0x2D
+    VK_DELETE = 0x2E
+    VK_LWIN = 0x5B
+    VK_RWIN = 0x5C
+    VK_NUMPAD0 = 0x60
+    VK_NUMPAD1 = 0x61
+    VK_NUMPAD2 = 0x62
+    VK_NUMPAD3 = 0x63
+    VK_NUMPAD4 = 0x64
+    VK_NUMPAD5 = 0x65
+    VK_NUMPAD6 = 0x66
+    VK_NUMPAD7 = 0x67
+    VK_NUMPAD8 = 0x68
+    VK_NUMPAD9 = 0x69
+    VK_F1 = 0x70
+    VK_F2 = 0x71
+    VK_F3 = 0x72
+    VK_F4 = 0x73
+    VK_F5 = 0x74
+    VK_F6 = 0x75
+    VK_F7 = 0x76
+    VK_F8 = 0x77
+    VK_F9 = 0x78
+    VK_F10 = 0x79
+    VK_F11 = 0x7A
+    VK_F12 = 0x7B
+    VK_LSHIFT = 0xA0
+    VK_RSHIFT = 0xA1
+    VK_LCONTROL = 0xA2
+    VK_RCONTROL = 0xA3
+    VK_LMENU = 0xA4
+    VK_RMENU = 0xA5
+
+    KEYEVENTF_EXTENDEDKEY = 0x0001
+    KEYEVENTF_KEYUP = 0x0002
+
+# missing in older win32con, values are fixed by WinApi anyway
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+
+# WinEvent hooks, not in win32con
+WINEVENT_OUTOFCONTEXT = 0x0000
+EVENT_SYSTEM_FOREGROUND = 0x0003
+EVENT_OBJECT_LOCATIONCHANGE = 0x800B
+EVENT_OBJECT_NAMECHANGE = 0x800C
+OBJID_WINDOW = 0
+OBJID_CURSOR = -9
@@ -0,0 +1,124 @@
+"""
+ Hot path functions of user32 prototyped once via ctypes with fixed argtypes and restype,
+ without pywin32 argument conversion and exception translation. Everything else is inherited from pywin32.
+ Selected with WINAPI_BACKEND=ctypes.
+"""
+
+import ctypes
+import threading
+from ctypes import wintypes
+from typing import List
+
+from src.helpers.winapi.backend import Win32Backend, WinApiError
+
+TITLE_BUFFER_SIZE = 1024
+
+
+class CtypesBackend(Win32Backend):
+    """ Same names and results as Win32Backend, so callers do not change """
+
+    OVERRIDDEN = ('GetWindowText', 'GetWindowLong', 'GetWindowThreadProcessId', 'PostMessage', 'SendMessage',
+                  'IsWindow', 'GetForegroundWindow')
+
+    def __init__(self):
+        super().__init__()
+        # pywin32 functions are bound to instance by Win32Backend and would shadow methods below
+        self.pywin32_send_message = self.SendMessage
+        for name in self.OVERRIDDEN:
+            del self.__dict__[name]
+
+        user32 = ctypes.WinDLL('user32', use_last_error=True)
+
+        def prototype(name, restype, *argtypes):
+            func = getattr(user32, name)
+            func.argtypes = argtypes
+            func.restype = restype
+            return func
+
+        self.get_window_text = prototype('GetWindowTextW', ctypes.c_int, wintypes.HWND, wintypes.LPWSTR, ctypes.c_int)
+        self.get_window_text_length = prototype('GetWindowTextLengthW', ctypes.c_int, wintypes.HWND)
+        self.get_window_long = prototype('GetWindowLongW', wintypes.LONG, wintypes.HWND, ctypes.c_int)
+        self.get_window_thread_process_id = prototype('GetWindowThreadProcessId', wintypes.DWORD,
+                                                      wintypes.HWND, wintypes.LPDWORD)
+        self.post_message = prototype('PostMessageW', wintypes.BOOL,
+                                      wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM)
+        self.send_message = prototype('SendMessageW', wintypes.LPARAM,
+                                      wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM)
+        self.is_window = prototype('IsWindow', wintypes.BOOL, wintypes.HWND)
+        self.get_foreground_window = prototype('GetForegroundWindow', wintypes.HWND)
+
+        self.enum_proc_type = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+        self.ctypes_enum_windows = prototype('EnumWindows', wintypes.BOOL, self.enum_proc_type, wintypes.LPARAM)
+        self.ctypes_enum_child_windows = prototype('EnumChildWindows', wintypes.BOOL,
+                                                   wintypes.HWND, self.enum_proc_type, wintypes.LPARAM)
+
+        # buffers are reused by every call, but per thread: UI thread and refresh worker enumerate concurrently
+        self.local = threading.local()
+
+    def buffers(self):
+        local = self.local
+        try:
+            return local.title_buffer, local.pid, local.pid_ref
+        except AttributeError:
+            local.title_buffer = ctypes.create_unicode_buffer(TITLE_BUFFER_SIZE)
+            local.pid = wintypes.DWORD()
+            local.pid_ref = ctypes.byref(local.pid)
+            return local.title_buffer, local.pid, local.pid_ref
+
+    def GetWindowText(self, hwnd) -> str:
+        title_buffer = self.buffers()[0]
+        length = self.get_window_text(hwnd, title_buffer, TITLE_BUFFER_SIZE)
+        if length < TITLE_BUFFER_SIZE - 1:
+            return title_buffer.value
+        # possibly truncated, rare enough for a one-off buffer
+        size = self.get_window_text_length(hwnd) + 1
+        buffer = ctypes.create_unicode_buffer(size)
+        self.get_window_text(hwnd, buffer, size)
+        return buffer.value
+
+    def GetWindowLong(self, hwnd, index) -> int:
+        return self.get_window_long(hwnd, index)
+
+    def GetWindowThreadProcessId(self, hwnd):
+        _, pid, pid_ref = self.buffers()
+        thread_id = self.get_window_thread_process_id(hwnd, pid_ref)
+        return thread_id, pid.value
+
+    def PostMessage(self, hwnd, msg, wparam, lparam):
+        if not self.post_message(hwnd, msg, wparam, lparam):
+            raise WinApiError(f'PostMessage failed, error {ctypes.get_last_error()}')
+
+    def SendMessage(self, hwnd, msg, wparam, lparam):
+        if not isinstance(lparam, int) or not isinstance(wparam, int):
+            # strings and buffers are converted by pywin32
+            return self.pywin32_send_message(hwnd, msg, wparam, lparam)
+        return self.send_message(hwnd, msg, wparam, lparam)
+
+    def IsWindow(self, hwnd) -> bool:
+        return bool(self.is_window(hwnd))
+
+    def GetForegroundWindow(self) -> int:
+        return self.get_foreground_window() or 0
+
+    def enum_proc(self, callback, extra, errors: List[BaseException]):
+        """ Exception in callback stops enumeration and is kept for re-raise, ctypes would only print it """
+        def proc(hwnd, _):
+            try:
+                return bool(callback(hwnd, extra))
+            except BaseException as e:
+                errors.append(e)
+                return False
+        return self.enum_proc_type(proc)
+
+    def EnumWindows(self, callback, extra):
+        # callback returning False stops enumeration, not an error here
+        errors: List[BaseException] = []
+        self.ctypes_enum_windows(self.enum_proc(callback, extra, errors), 0)
+        if errors:
+            raise errors[0]
+
+    def EnumChildWindows(self, hwnd, callback, extra):
+        errors: List[BaseException] = []
+        self.ctypes_enum_child_windows(hwnd, self.enum_proc(callback, extra, errors), 0)
+        if errors:
+            raise errors[0]
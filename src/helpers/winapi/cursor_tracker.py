@@ -0,0 +1,106 @@
+import math
+import time
+from typing import Dict, Tuple, Optional
+
+import src.helpers.winapi.backend as backend
+from src.helpers.winapi.windows import get_title
+from src.helpers.winapi.window_events import WindowEventSource, WindowEvent, CURSOR_MOVED, NAME_CHANGED, \
+    FOREGROUND_CHANGED
+
+"""
+ Hovered window and cursor idle time, cheap enough to be sampled at 1 kHz.
+ Without events each sample costs one GetCursorPos, with pushed events (WinEvent hooks) none while nothing changes.
+"""
+
+
+class TitleCache:
+    """ hwnd -> title, an entry is refreshed after ttl_sec or when invalidated by name change event """
+
+    # expired entries are dropped when cache grows over it
+    MAX_ENTRIES = 1024
+
+    def __init__(self, ttl_sec=0.5):
+        self.ttl_sec = ttl_sec
+        # hwnd: (title, time of GetWindowText)
+        self.entries: Dict[int, Tuple[str, float]] = {}
+        self.misses = 0
+
+    def get(self, hwnd, now: float) -> str:
+        entry = self.entries.get(hwnd)
+        if entry and now - entry[1] < self.ttl_sec:
+            return entry[0]
+
+        self.misses += 1
+        title = get_title(hwnd) if hwnd else ''
+        if len(self.entries) >= self.MAX_ENTRIES:
+            self.entries = {hwnd: entry for hwnd, entry in self.entries.items() if now - entry[1] < self.ttl_sec}
+        self.entries[hwnd] = (title, now)
+        return title
+
+    def invalidate(self, hwnd: Optional[int] = None):
+        """ All entries if hwnd is None """
+        if hwnd is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(hwnd, None)
+
+
+class CursorTracker:
+    """
+    WindowFromPoint only when cursor moved or after hit_test_ttl_sec, since windows can move under still cursor,
+    GetWindowText only on title cache miss. Uses monotonic perf_counter() for idle time.
+    """
+
+    def __init__(self, ignore_distance_px=0, title_ttl_sec=0.5, hit_test_ttl_sec=0.1):
+        self.ignore_distance_px = ignore_distance_px
+        self.hit_test_ttl_sec = hit_test_ttl_sec
+        self.titles = TitleCache(title_ttl_sec)
+
+        now = time.perf_counter()
+        self.cursor: Optional[Tuple[int, int]] = None
+        self.hwnd = 0
+        self.hit_test_time = -math.inf
+        self.last_move_time = now
+
+        # with pushed events cursor is queried only after CURSOR_MOVED
+        self.cursor_from_events = False
+        self.cursor_dirty = True
+        self.hit_tests = 0
+
+    def attach(self, source: WindowEventSource):
+        """ Subscribe before others, so they sample already invalidated state """
+        self.cursor_from_events = source.pushed
+        source.subscribe(self.on_window_event)
+
+    def on_window_event(self, event: WindowEvent):
+        if event.kind == CURSOR_MOVED:
+            self.cursor_dirty = True
+        elif event.kind == NAME_CHANGED:
+            self.titles.invalidate(event.hwnd)
+        elif event.kind == FOREGROUND_CHANGED:
+            # z-order changed, other window may be under cursor now
+            self.hit_test_time = -math.inf
+
+    def sample(self) -> Tuple[int, str]:
+        """ Hovered (hwnd, title) """
+        now = time.perf_counter()
+        moved = False
+        if self.cursor_dirty or not self.cursor_from_events:
+            self.cursor_dirty = False
+            cursor = backend.api.GetCursorPos()
+            if cursor != self.cursor:
+                if self.cursor is None or math.dist(self.cursor, cursor) > self.ignore_distance_px:
+                    self.last_move_time = now
+                self.cursor = cursor
+                moved = True
+
+        if moved or now - self.hit_test_time >= self.hit_test_ttl_sec:
+            self.hit_tests += 1
+            self.hwnd = backend.api.WindowFromPoint(self.cursor)
+            self.hit_test_time = now
+
+        return self.hwnd, self.titles.get(self.hwnd, now)
+
+    def idle_sec(self) -> float:
+        """ Since the last move noticed by sample() """
+        return time.perf_counter() - self.last_move_time
@@ -0,0 +1,73 @@
+from typing import List, Dict, Set
+
+from src.helpers.winapi.processes import WindowInfo, get_process_windows, get_child_windows, sort_windows
+
+
+class WindowHierarchy:
+    """
+    Top-level windows are enumerated eagerly, children of a top-level window only when requested.
+    Most of enumeration time is spent on children of apps nobody looks at.
+
+    Expanded roots are kept between refreshes: their children are enumerated again on refresh,
+    all other cached children are dropped.
+    """
+
+    def __init__(self):
+        self.top_level: List[WindowInfo] = []
+        self.top_level_hwnds: Set[int] = set()
+        self.children_cache: Dict[int, List[WindowInfo]] = {}
+        self.expanded: Set[int] = set()
+
+    def refresh(self):
+        self.top_level = get_process_windows(include_children=False)
+        self.top_level_hwnds = {wnd.hwnd for wnd in self.top_level}
+        self.expanded &= self.top_level_hwnds
+        self.children_cache = {}
+        for root_hwnd in self.expanded:
+            self.children(root_hwnd)
+
+    def assign(self, wnds: List[WindowInfo], children_of: Set[int]):
+        """
+        Same as refresh, but with windows enumerated elsewhere.
+        children_of: roots whose children are in wnds, other expanded roots are enumerated on request
+        """
+        self.top_level = [wnd for wnd in wnds if not wnd.root_parent_hwnd]
+        self.top_level_hwnds = {wnd.hwnd for wnd in self.top_level}
+        self.expanded &= self.top_level_hwnds
+        self.children_cache = {root_hwnd: [] for root_hwnd in children_of & self.top_level_hwnds}
+        for wnd in wnds:
+            if wnd.root_parent_hwnd in self.children_cache:
+                self.children_cache[wnd.root_parent_hwnd] += [wnd]
+
+    def children(self, root_hwnd) -> List[WindowInfo]:
+        """ Nested children of top-level window, enumerated on first request """
+        wnds = self.children_cache.get(root_hwnd)
+        if wnds is None:
+            wnds = get_child_windows(root_hwnd)
+            self.children_cache[root_hwnd] = wnds
+        return wnds
+
+    def is_expanded(self, root_hwnd) -> bool:
+        return root_hwnd in self.expanded
+
+    def expand(self, root_hwnd):
+        assert root_hwnd in self.top_level_hwnds
+        self.expanded.add(root_hwnd)
+        self.children(root_hwnd)
+
+    def collapse(self, root_hwnd):
+        self.expanded.discard(root_hwnd)
+
+    def toggle(self, root_hwnd):
+        if self.is_expanded(root_hwnd):
+            self.collapse(root_hwnd)
+        else:
+            self.expand(root_hwnd)
+
+    def flat(self) -> List[WindowInfo]:
+        """ Top-level and expanded windows in the same order as get_process_windows() """
+        combined = list(self.top_level)
+        for root_hwnd in self.expanded:
+            combined += self.children(root_hwnd)
+        sort_windows(combined)
+        return combined
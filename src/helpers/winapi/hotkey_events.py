@@ -1,8 +1,10 @@
-from contextlib import contextmanager
-
-from win32con import *
-from win32api import *
+from contextlib import contextmanager, ExitStack
+from typing import Optional, List, Tuple
 
+import src.helpers.winapi.backend as backend
+from src.helpers.winapi.consts import WM_KEYDOWN, WM_KEYUP, KEYEVENTF_KEYUP
+from src.helpers.winapi.keyboard import keyboard_tables, MODIFIER_VKS, KeyboardTable
+from src.helpers.winapi.send_input import InputBatch
 from src.helpers.winapi.windows import hwnd_unsafe_op
 
 
@@ -16,38 +18,49 @@ def press_key(hwnd, key_code, only_down, post_delay_sec=0.1):
     # specifically for browsers with multiple tabs,
     # PostMessage requres focus active or it may send to the wrong tab
     with hwnd_unsafe_op(post_delay_sec, hwnd, require_focus=True, keep_state=True):
-        PostMessage(hwnd, WM_KEYDOWN, key_code, 0)
+        backend.api.PostMessage(hwnd, WM_KEYDOWN, key_code, 0)
 
     if only_down:
         return
 
     with hwnd_unsafe_op(post_delay_sec, hwnd, require_focus=True, keep_state=True):
-        PostMessage(hwnd, WM_KEYUP, key_code, 0)
+        backend.api.PostMessage(hwnd, WM_KEYUP, key_code, 0)
 
 
-def virtual_code(char):
+def virtual_code(char, hwnd=None, table: Optional[KeyboardTable] = None) -> Optional[int]:
+    """
+    None if char is not on keyboard layout of hwnd or of current thread
+    table: resolved layout, pass it when translating many chars to skip GetKeyboardLayout per char
+    """
     assert len(char) == 1
-    # Not working
-    # Extract virtual-key code from the result (low byte) and apply shift state
-    # shift_state = not char.islower()
-    # (virtual_key_code & 0xFF) | (shift_state << 8)
-    # virtual_key_code = VkKeyScan(char) & 0xFF
-    return VkKeyScan(char) & 0xFF
+    return (table or keyboard_tables.current(hwnd)).vk_of(char)
 
 
 def press_char(hwnd, char: str, only_down=True, delay_sec=0.1):
     """
-    Can send a-z, A-Z, 0-9, ' '
+    Can send any char of hwnd keyboard layout, shift state modifiers are pressed around it
     only_down: during tests WM_KEYUP on some sites like Google.com fired 2nd press
     """
+    key = keyboard_tables.current(hwnd).key_of(char)
+    if key is None:
+        raise NotImplementedError(f'Char is not on keyboard layout: {char!r}')
+
+    vk, shift = key
+    with ExitStack() as modifiers:
+        for bit, modifier_vk in MODIFIER_VKS:
+            if shift & bit:
+                modifiers.enter_context(press_modifier(hwnd, modifier_vk))
+        press_key(hwnd, vk, only_down, delay_sec)
+
+
+def send_key_events(events: List[Tuple[int, int]]) -> int:
+    """ (virtual key, flags) as from KeyboardTable.text_to_key_events, to focused window with one SendInput """
+    return InputBatch().key_events(events).send()
+
 
-    if 'a' < char < 'z' or '0' < char < '9' or char in [' ']:
-        press_key(hwnd, virtual_code(char), only_down, delay_sec)
-    elif 'A' < char < 'Z':
-        with press_modifier(hwnd, VK_LSHIFT):
-            press_key(hwnd, virtual_code(char), only_down, delay_sec)
-    else:
-        raise NotImplementedError
+def type_text(text, hwnd=None) -> int:
+    """ Translated to key events at once, so no per char lookups or WinApi calls except input itself """
+    return send_key_events(keyboard_tables.current(hwnd).text_to_key_events(text))
 
 
 @contextmanager
@@ -59,8 +72,8 @@ def press_modifier(hwnd, modifier_key_code, delay_sec=0.1):
 
     with hwnd_unsafe_op(delay_sec, hwnd, require_focus=True, keep_state=True):
         # PostMessage not catched in combo
-        keybd_event(modifier_key_code, 0, 0, 0)
+        backend.api.keybd_event(modifier_key_code, 0, 0, 0)
     yield
     with hwnd_unsafe_op(delay_sec, hwnd, require_focus=True, keep_state=True):
-        keybd_event(modifier_key_code, 0, KEYEVENTF_KEYUP, 0)
+        backend.api.keybd_event(modifier_key_code, 0, KEYEVENTF_KEYUP, 0)
 
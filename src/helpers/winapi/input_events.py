@@ -0,0 +1,92 @@
+import ctypes
+from ctypes import wintypes
+from typing import NamedTuple, Sequence, Union
+
+"""
+ Synthetic input events in SendInput terms, shared by backends.
+ ctypes structures are only declared here, nothing is called, so the module imports on any OS.
+"""
+
+INPUT_MOUSE = 0
+INPUT_KEYBOARD = 1
+
+KEYEVENTF_KEYUP = 0x0002
+KEYEVENTF_UNICODE = 0x0004
+
+MOUSEEVENTF_MOVE = 0x0001
+MOUSEEVENTF_LEFTDOWN = 0x0002
+MOUSEEVENTF_LEFTUP = 0x0004
+MOUSEEVENTF_RIGHTDOWN = 0x0008
+MOUSEEVENTF_RIGHTUP = 0x0010
+MOUSEEVENTF_WHEEL = 0x0800
+MOUSEEVENTF_ABSOLUTE = 0x8000
+
+
+class KeyInput(NamedTuple):
+    vk: int
+    # UTF-16 code unit if flags has KEYEVENTF_UNICODE
+    scan: int
+    flags: int
+
+
+class MouseInput(NamedTuple):
+    # relative mickeys, or 0..65535 if flags has MOUSEEVENTF_ABSOLUTE
+    dx: int
+    dy: int
+    data: int
+    flags: int
+
+
+InputEvent = Union[KeyInput, MouseInput]
+
+
+class KEYBDINPUT(ctypes.Structure):
+    _fields_ = [('wVk', wintypes.WORD), ('wScan', wintypes.WORD), ('dwFlags', wintypes.DWORD),
+                ('time', wintypes.DWORD), ('dwExtraInfo', wintypes.WPARAM)]
+
+
+class MOUSEINPUT(ctypes.Structure):
+    _fields_ = [('dx', wintypes.LONG), ('dy', wintypes.LONG), ('mouseData', wintypes.DWORD),
+                ('dwFlags', wintypes.DWORD), ('time', wintypes.DWORD), ('dwExtraInfo', wintypes.WPARAM)]
+
+
+class HARDWAREINPUT(ctypes.Structure):
+    _fields_ = [('uMsg', wintypes.DWORD), ('wParamL', wintypes.WORD), ('wParamH', wintypes.WORD)]
+
+
+class INPUT_UNION(ctypes.Union):
+    _fields_ = [('mi', MOUSEINPUT), ('ki', KEYBDINPUT), ('hi', HARDWAREINPUT)]
+
+
+class INPUT(ctypes.Structure):
+    _fields_ = [('type', wintypes.DWORD), ('union', INPUT_UNION)]
+
+
+def to_input_array(events: Sequence[InputEvent]) -> ctypes.Array:
+    """ One contiguous INPUT array, so all events cross into the OS in one SendInput call """
+    inputs = (INPUT * len(events))()
+    for item, event in zip(inputs, events):
+        if isinstance(event, KeyInput):
+            item.type = INPUT_KEYBOARD
+            ki = item.union.ki
+            ki.wVk, ki.wScan, ki.dwFlags = event
+        else:
+            item.type = INPUT_MOUSE
+            mi = item.union.mi
+            mi.dx, mi.dy, mi.mouseData, mi.dwFlags = event
+    return inputs
+
+
+def key_events_to_inputs(key_events: Sequence) -> list:
+    """ (vk, keybd_event flags) as from KeyboardTable.text_to_key_events """
+    return [KeyInput(vk, 0, flags) for vk, flags in key_events]
+
+
+def unicode_inputs(text) -> list:
+    """ Chars typed regardless of keyboard layout, down and up per UTF-16 code unit """
+    events = []
+    encoded = text.encode('utf-16-le')
+    for i in range(0, len(encoded), 2):
+        code = encoded[i] | (encoded[i + 1] << 8)
+        events += [KeyInput(0, code, KEYEVENTF_UNICODE), KeyInput(0, code, KEYEVENTF_UNICODE | KEYEVENTF_KEYUP)]
+    return events
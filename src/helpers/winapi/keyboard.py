@@ -0,0 +1,158 @@
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Tuple, List, Optional
+
+import src.helpers.winapi.backend as backend
+import src.helpers.winapi.consts as win32con
+from src.helpers.winapi.const_tables import named_consts
+
+# shift state bits of VkKeyScan high byte
+SHIFT, CONTROL, ALT = 1, 2, 4
+MODIFIER_VKS = ((SHIFT, win32con.VK_SHIFT), (CONTROL, win32con.VK_CONTROL), (ALT, win32con.VK_MENU))
+
+# probed on each layout: control keys, ASCII, Latin-1 and Latin Extended-A, Greek and Cyrillic
+PROBED_RANGES = ((0x08, 0x0E), (0x1B, 0x1C), (0x20, 0x7F), (0xA0, 0x180), (0x370, 0x500), (0x20AC, 0x20AD))
+
+CACHE_DIR = Path(__file__).parents[3] / 'data' / 'cache'
+
+# 'VK_TAB' -> 0x09, same for all layouts
+vk_names: Dict[str, int] = dict(named_consts('VK'))
+
+
+@dataclass(init=True)
+class KeyboardTable:
+    """ Keys of one keyboard layout, resolved with one VkKeyScanEx per probed char when built """
+    layout_id: int
+    # char -> (virtual key, shift state of SHIFT | CONTROL | ALT)
+    chars: Dict[str, Tuple[int, int]]
+    names: Dict[str, int] = field(default_factory=lambda: vk_names, repr=False)
+
+    @classmethod
+    def build(cls, layout_id) -> 'KeyboardTable':
+        api = backend.api
+        chars = {}
+        for first, end in PROBED_RANGES:
+            for code in range(first, end):
+                char = chr(code)
+                scan = api.VkKeyScanEx(char, layout_id)
+                if scan == -1 or scan & 0xFFFF == 0xFFFF:
+                    continue
+                chars[char] = (scan & 0xFF, (scan >> 8) & 0xFF)
+        # VkKeyScan maps line feed to Ctrl+Enter, typed text expects plain Enter
+        chars['\n'] = (win32con.VK_RETURN, 0)
+        return cls(layout_id, chars)
+
+    def to_json(self) -> Dict:
+        return {'layout_id': self.layout_id, 'chars': self.chars}
+
+    @classmethod
+    def from_json(cls, data: Dict) -> 'KeyboardTable':
+        return cls(data['layout_id'], {char: tuple(key) for char, key in data['chars'].items()})
+
+    def key_of(self, char) -> Optional[Tuple[int, int]]:
+        """ (virtual key, shift state), None if char can't be typed on this layout """
+        return self.chars.get(char)
+
+    def vk_of(self, char) -> Optional[int]:
+        key = self.chars.get(char)
+        return key[0] if key else None
+
+    def vk_of_name(self, name) -> Optional[int]:
+        return self.names.get(name)
+
+    def missing_chars(self, text) -> str:
+        return ''.join(sorted(set(text) - self.chars.keys()))
+
+    def text_to_key_events(self, text) -> List[Tuple[int, int]]:
+        """
+        (virtual key, keybd_event flags) to type text, modifiers are pressed only when shift state changes.
+        Raises RuntimeWarning before anything is translated if some char is not on the layout.
+        """
+        missing = self.missing_chars(text)
+        if missing:
+            raise RuntimeWarning(f"Chars not on keyboard layout {self.layout_id:#x}: {missing!r}")
+
+        events = []
+        held = 0
+        for char in text:
+            vk, shift = self.chars[char]
+            if shift != held:
+                events += modifier_events(held, shift)
+                held = shift
+            events += [(vk, 0), (vk, win32con.KEYEVENTF_KEYUP)]
+        events += modifier_events(held, 0)
+        return events
+
+
+def modifier_events(held, wanted) -> List[Tuple[int, int]]:
+    """ Releases held modifiers which are not wanted, then presses missing ones """
+    events = []
+    for bit, vk in MODIFIER_VKS:
+        if held & bit and not wanted & bit:
+            events += [(vk, win32con.KEYEVENTF_KEYUP)]
+    for bit, vk in MODIFIER_VKS:
+        if wanted & bit and not held & bit:
+            events += [(vk, 0)]
+    return events
+
+
+class KeyboardTables:
+    """
+    Tables are built once per layout and cached in memory,
+    and in cache_dir if given, so a restart with the same layout makes no VkKeyScanEx calls.
+    Both caches are keyed by backend system too, so simulated layouts never replace real ones.
+    """
+    FORMAT_VERSION = 1
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self.cache_dir = cache_dir
+        # (backend system, layout id): table
+        self.tables: Dict[Tuple[str, int], KeyboardTable] = {}
+
+    def cache_path(self, system, layout_id) -> Path:
+        return self.cache_dir / f'keyboard_{system}_{layout_id & 0xFFFFFFFFFFFFFFFF:016x}.json'
+
+    def load(self, system, layout_id) -> Optional[KeyboardTable]:
+        try:
+            data = json.loads(self.cache_path(system, layout_id).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        if data.get('version') != self.FORMAT_VERSION:
+            return None
+        return KeyboardTable.from_json(data)
+
+    def save(self, system, table: KeyboardTable):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            data = dict(table.to_json(), version=self.FORMAT_VERSION)
+            self.cache_path(system, table.layout_id).write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+        except OSError as e:
+            print(f'Keyboard table is not cached: {e}')
+
+    def get(self, layout_id) -> KeyboardTable:
+        """ Table of layout on the current backend """
+        key = (backend.api.system, layout_id)
+        table = self.tables.get(key)
+        if table:
+            return table
+
+        table = self.load(*key) if self.cache_dir else None
+        if not table:
+            table = KeyboardTable.build(layout_id)
+            if self.cache_dir:
+                self.save(key[0], table)
+        self.tables[key] = table
+        return table
+
+    def current(self, hwnd=None) -> KeyboardTable:
+        """ Layout of hwnd thread, which may differ from ours, or of current thread """
+        api = backend.api
+        thread_id = api.GetWindowThreadProcessId(hwnd)[0] if hwnd else 0
+        return self.get(api.GetKeyboardLayout(thread_id))
+
+    def clear(self):
+        self.tables.clear()
+
+
+keyboard_tables = KeyboardTables(CACHE_DIR)
@@ -1,7 +1,5 @@
-import win32api
-
-from win32gui import ScreenToClient, GetWindowRect
-from winxpgui import GetClientRect
+import src.helpers.winapi.backend as backend
+from src.helpers.command_registry import register_command
 
 MOUSEEVENTF_MOVE = 0x0001  # mouse move
 MOUSEEVENTF_ABSOLUTE = 0x8000  # absolute move
@@ -24,10 +22,11 @@ def send_click(hwnd, x, y):
     """
 
     # PostMessage expects relative to Client which offsets from window corner
-    l, t, r, b = GetWindowRect(hwnd)
-    cx, cy = ScreenToClient(hwnd, (x + l, y + t))
+    api = backend.api
+    l, t, r, b = api.GetWindowRect(hwnd)
+    cx, cy = api.ScreenToClient(hwnd, (x + l, y + t))
 
-    cl, ct, cr, cb = GetClientRect(hwnd)
+    cl, ct, cr, cb = api.GetClientRect(hwnd)
     cw, ch = cr - cl, cb - ct
 
     if not cl < cx < cr or not ct < cy < cb:
@@ -37,6 +36,15 @@ def send_click(hwnd, x, y):
         return False
 
     print(f'Sending mouse click to Window xy: {x} {y} Screen xy: {cx} {cy}')
-    win32api.PostMessage(hwnd, WM_LBUTTONDOWN, 1, make_lparam(cx, cy))
-    win32api.PostMessage(hwnd, WM_LBUTTONUP, 0, make_lparam(cx, cy))
+    api.PostMessage(hwnd, WM_LBUTTONDOWN, 1, make_lparam(cx, cy))
+    api.PostMessage(hwnd, WM_LBUTTONUP, 0, make_lparam(cx, cy))
     return True
+
+
+@register_command(send_click)
+def run_send_click(hwnd, key, enum_value):
+    """ Clicks at current cursor position, relative to window corner if top-level hwnd """
+    api = backend.api
+    l, t, r, b = api.GetWindowRect(hwnd)
+    cx, cy = api.GetCursorPos()
+    return send_click(hwnd, cx - l, cy - t)
@@ -1,32 +1,35 @@
 import math
-from datetime import datetime
-
-import win32api
-from win32gui import WindowFromPoint
+import time
 
+import src.helpers.winapi.backend as backend
 from src.helpers.winapi.windows import get_title
 
 
 class MouseTracker:
+    """ For hovered window and idle time sampled often, see CursorTracker """
+
     def __init__(self):
-        self.prev_cursor = win32api.GetCursorPos()
-        self.last_move = datetime.now()
+        self.prev_cursor = backend.api.GetCursorPos()
+        # monotonic, wall clock can jump
+        self.last_move = time.monotonic()
 
     def track(self, ignore_distance_px):
         """ returns idle time based on previous calls """
 
-        cursor = win32api.GetCursorPos()
+        cursor = backend.api.GetCursorPos()
         dist = math.dist(self.prev_cursor, cursor)
         self.prev_cursor = cursor
 
+        now = time.monotonic()
         if dist > ignore_distance_px:
-            self.last_move = datetime.now()
+            self.last_move = now
 
-        return (datetime.now() - self.last_move).total_seconds()
+        return now - self.last_move
 
 
 def get_window_info_under_cursor():
-    cursor = win32api.GetCursorPos()
-    hwnd = WindowFromPoint(cursor)
+    """ Three WinApi calls each time, CursorTracker caches them """
+    cursor = backend.api.GetCursorPos()
+    hwnd = backend.api.WindowFromPoint(cursor)
     title = get_title(hwnd)
     return hwnd, title
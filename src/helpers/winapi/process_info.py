@@ -0,0 +1,114 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Any
+
+import src.helpers.winapi.backend as backend
+from src.helpers.winapi.consts import PROCESS_QUERY_LIMITED_INFORMATION, PROCESS_QUERY_INFORMATION, PROCESS_VM_READ
+
+
+@dataclass(init=True)
+class ProcessInfo:
+    pid: int
+    creation_time: Any  # None if process could not be opened
+    module_path: Optional[str]
+    # ProcessInfoCache.generation when info was validated last time
+    generation: int = 0
+
+
+def get_unprotected_module_path(pid) -> Optional[str]:
+    """ Legacy way, GetModuleFileNameEx requires rights which protected processes deny """
+    api = backend.api
+    try:
+        proc = api.OpenProcess(PROCESS_QUERY_INFORMATION | PROCESS_VM_READ, 0, pid)
+    except:
+        # print("Process {0:d} couldn't be opened: {1:}".format(pid, traceback.format_exc()))
+        return None
+
+    try:
+        return api.GetModuleFileNameEx(proc, None)
+    except:
+        # print("Error getting process name: {0:}".format(traceback.format_exc()))
+        return None
+    finally:
+        api.CloseHandle(proc)
+
+
+def query_module_path(pid, proc) -> Optional[str]:
+    try:
+        return backend.api.QueryFullProcessImageName(proc)
+    except:
+        return get_unprotected_module_path(pid)
+
+
+def query_process_info(pid, known: Optional[ProcessInfo] = None) -> ProcessInfo:
+    """
+    Opens process with least privileges, which is also allowed for most of protected processes.
+    known: if creation time matches, module path is not queried again
+    """
+    api = backend.api
+    try:
+        proc = api.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, 0, pid)
+    except:
+        return ProcessInfo(pid, None, None)
+
+    try:
+        try:
+            creation_time = api.GetProcessTimes(proc)['CreationTime']
+        except:
+            creation_time = None
+
+        if known and creation_time is not None and known.creation_time == creation_time:
+            return known
+        return ProcessInfo(pid, creation_time, query_module_path(pid, proc))
+    finally:
+        api.CloseHandle(proc)
+
+
+class ProcessInfoCache:
+    """
+    Process windows are enumerated per hwnd, but process info is same for dozens of windows.
+    During one generation (usually one enumeration pass) each pid is queried once.
+    On a new generation, cached pids are validated by creation time: pid can be recycled.
+    Shared by UI thread and background refresh, so access is locked.
+    """
+
+    def __init__(self, max_size=2048):
+        self.max_size = max_size
+        self.generation = 1
+        self.infos: OrderedDict[int, ProcessInfo] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def new_generation(self):
+        with self.lock:
+            self.generation += 1
+
+    def clear(self):
+        with self.lock:
+            self.infos.clear()
+
+    def get(self, pid) -> ProcessInfo:
+        """ Process is queried without lock, so UI thread lookups do not wait for queries of refresh """
+        with self.lock:
+            info = self.infos.get(pid)
+            generation = self.generation
+            if info and info.generation == generation:
+                self.infos.move_to_end(pid)
+                return info
+
+        # concurrent misses of one pid may both query it, the later insert wins
+        queried = query_process_info(pid, known=info)
+
+        with self.lock:
+            queried.generation = generation
+            self.infos[pid] = queried
+            self.infos.move_to_end(pid)
+            if len(self.infos) > self.max_size:
+                self.infos.popitem(last=False)
+        return queried
+
+    def get_module_path(self, pid) -> Optional[str]:
+        return self.get(pid).module_path
+
+
+process_cache = ProcessInfoCache()
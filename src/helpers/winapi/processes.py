@@ -1,37 +1,12 @@
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import List, Optional, Union
 
-from win32api import CloseHandle, OpenProcess, GetWindowLong
-from win32con import PROCESS_ALL_ACCESS, GWL_STYLE, WS_VISIBLE
-from win32gui import GetWindowText, EnumWindows, EnumChildWindows
-from win32process import GetModuleFileNameEx, GetWindowThreadProcessId
-
-
-def get_unprotected_module_path(pid):
-    try:
-        proc = OpenProcess(PROCESS_ALL_ACCESS, 0, pid)
-    except:
-        # print("Process {0:d} couldn't be opened: {1:}".format(pid, traceback.format_exc()))
-        return None
-
-    try:
-        return GetModuleFileNameEx(proc, None)
-    except:
-        # print("Error getting process name: {0:}".format(traceback.format_exc()))
-        return None
-    finally:
-        CloseHandle(proc)
-
-
-@dataclass(init=True)
-class WindowInfo:
-    hwnd: int
-    root_parent_hwnd: int  # root parent can be nested
-    pid: int
-    module_path: str
-    style: int
-    visible: bool
-    title: str
+import src.helpers.winapi.backend as backend
+from src.helpers.winapi.consts import GWL_STYLE, WS_VISIBLE
+from src.helpers.winapi.process_info import process_cache
+from src.helpers.winapi.registry import WindowRegistry
+from src.helpers.winapi.window_columns import WindowColumns
+from src.helpers.winapi.window_info import WindowInfo
 
 
 @dataclass(init=True)
@@ -41,45 +16,94 @@ class EnumArgs:
 
 
 def on_enum_window(hwnd, args: EnumArgs):
+    api = backend.api
     root_parent = args.known_root_parent
-    pid = GetWindowThreadProcessId(hwnd)[1]
-    module_path = get_unprotected_module_path(pid) if pid else None
-    title = GetWindowText(hwnd)
-    style = GetWindowLong(hwnd, GWL_STYLE)
+    pid = api.GetWindowThreadProcessId(hwnd)[1]
+    module_path = process_cache.get_module_path(pid) if pid else None
+    title = api.GetWindowText(hwnd)
+    style = api.GetWindowLong(hwnd, GWL_STYLE)
     visible = bool(WS_VISIBLE & style)
 
     args.wnds += [WindowInfo(hwnd, root_parent, pid, module_path, style, visible, title)]
     return True
 
 
-def filter_process_windows(data: List[WindowInfo],
+@dataclass(init=True)
+class EnumColumnsArgs:
+    columns: WindowColumns
+    known_root_parent: Optional[int]
+
+
+def on_enum_window_columns(hwnd, args: EnumColumnsArgs):
+    """ Same as on_enum_window, but without WindowInfo objects """
+    api = backend.api
+    pid = api.GetWindowThreadProcessId(hwnd)[1]
+    module_path = process_cache.get_module_path(pid) if pid else None
+    title = api.GetWindowText(hwnd)
+    style = api.GetWindowLong(hwnd, GWL_STYLE)
+
+    args.columns.append(hwnd, args.known_root_parent, pid, module_path, style, title)
+    return True
+
+
+def filter_process_windows(data: Union[List[WindowInfo], WindowRegistry],
                            pid: int = None,
                            module_exe: str = None,
                            remove_invisible=True) -> List[WindowInfo]:
-    filtered = []
-    for wnd in data:
-        if pid and wnd.pid != pid:
-            continue
-        if module_exe and (wnd.module_path is None or module_exe.lower() not in wnd.module_path.lower()):
-            continue
-        if remove_invisible and not wnd.visible:
-            continue
-        filtered += [wnd]
-
-    before, after = len(data), len(filtered)
+    """ Prefer to pass WindowRegistry when filtering same windows multiple times """
+    registry = data if isinstance(data, WindowRegistry) else WindowRegistry(data)
+    filtered = registry.query(pid=pid, module_exe=module_exe, visible=True if remove_invisible else None)
+
+    before, after = len(registry), len(filtered)
     if before > after:
         print(f'get_process_windows filter: {before} to {after}')
 
     return filtered
 
 
-def get_process_windows() -> List[WindowInfo]:
+def get_process_windows(include_children=True) -> List[WindowInfo]:
+    api = backend.api
+    process_cache.new_generation()
     data, nested_data = EnumArgs([], None), EnumArgs([], None)
-    EnumWindows(on_enum_window, data)
-    for wnd in data.wnds:
-        nested_data.known_root_parent = wnd.hwnd
-        EnumChildWindows(wnd.hwnd, on_enum_window, nested_data)
+    api.EnumWindows(on_enum_window, data)
+    if include_children:
+        for wnd in data.wnds:
+            nested_data.known_root_parent = wnd.hwnd
+            api.EnumChildWindows(wnd.hwnd, on_enum_window, nested_data)
     combined = data.wnds + nested_data.wnds
-    # sort can be done with priority on wnd.pid or wnd.hwnd
-    combined.sort(key=lambda wnd: (wnd.pid, wnd.hwnd if not wnd.root_parent_hwnd else wnd.root_parent_hwnd))
+    sort_windows(combined)
     return combined
+
+
+def window_sort_key(wnd: WindowInfo):
+    # sort can be done with priority on wnd.pid or wnd.hwnd
+    return wnd.pid, wnd.hwnd if not wnd.root_parent_hwnd else wnd.root_parent_hwnd
+
+
+def sort_windows(wnds: List[WindowInfo]):
+    wnds.sort(key=window_sort_key)
+
+
+def get_child_windows(root_hwnd) -> List[WindowInfo]:
+    """ Nested children of one top-level window, in enumeration order """
+    data = EnumArgs([], root_hwnd)
+    backend.api.EnumChildWindows(root_hwnd, on_enum_window, data)
+    return data.wnds
+
+
+def get_window_registry(include_children=True) -> WindowRegistry:
+    return WindowRegistry(get_process_windows(include_children))
+
+
+def get_process_window_columns(include_children=True) -> WindowColumns:
+    """ Compact alternative of get_process_windows for large desktops, same order """
+    api = backend.api
+    process_cache.new_generation()
+    args = EnumColumnsArgs(WindowColumns(), None)
+    api.EnumWindows(on_enum_window_columns, args)
+    if include_children:
+        # children are appended to same columns
+        for hwnd in args.columns.hwnds[:len(args.columns)]:
+            args.known_root_parent = hwnd
+            api.EnumChildWindows(hwnd, on_enum_window_columns, args)
+    return args.columns.take(args.columns.sort_order())
@@ -0,0 +1,111 @@
+from collections import defaultdict
+from pathlib import PureWindowsPath
+from typing import List, Dict, Optional, Set
+
+from src.helpers.winapi.window_info import WindowInfo
+
+
+def normalize_module(module_path: Optional[str]) -> Optional[str]:
+    """ 'C:\\Program Files\\App\\App.EXE' -> 'app.exe' """
+    return PureWindowsPath(module_path).name.lower() if module_path else None
+
+
+class WindowRegistry:
+    """
+    Windows of one enumeration with secondary indexes.
+    Queries start from the smallest matching index, so cost is proportional to result, not to all windows.
+    Results are kept in enumeration order.
+    """
+
+    def __init__(self, wnds: List[WindowInfo]):
+        self.wnds = wnds
+        self.order: Dict[int, int] = {}
+        self.by_hwnd: Dict[int, WindowInfo] = {}
+        self.by_pid: Dict[int, List[WindowInfo]] = defaultdict(list)
+        self.by_module: Dict[Optional[str], List[WindowInfo]] = defaultdict(list)
+        # lowercase full path, for substring queries like filter_process_windows(module_exe=...)
+        self.by_module_path: Dict[Optional[str], List[WindowInfo]] = defaultdict(list)
+        self.by_root: Dict[int, List[WindowInfo]] = defaultdict(list)
+        self.visible: List[WindowInfo] = []
+        self.top_level: List[WindowInfo] = []
+        self.children: List[WindowInfo] = []
+
+        self.lower_paths: Dict[Optional[str], Optional[str]] = {None: None}
+        lower_paths = self.lower_paths
+        # one pass with bound methods, this is rebuilt on every refresh
+        for i, wnd in enumerate(wnds):
+            hwnd = wnd.hwnd
+            self.order[hwnd] = i
+            self.by_hwnd[hwnd] = wnd
+            self.by_pid[wnd.pid].append(wnd)
+
+            lower_path = lower_paths.get(wnd.module_path)
+            if lower_path is None and wnd.module_path:
+                lower_path = lower_paths[wnd.module_path] = wnd.module_path.lower()
+            self.by_module_path[lower_path].append(wnd)
+
+            root = wnd.root_parent_hwnd
+            if root:
+                self.by_root[root].append(wnd)
+                self.children.append(wnd)
+            else:
+                self.top_level.append(wnd)
+            if wnd.visible:
+                self.visible.append(wnd)
+
+        for lower_path, path_wnds in self.by_module_path.items():
+            self.by_module[normalize_module(lower_path)] += path_wnds
+
+    def __len__(self):
+        return len(self.wnds)
+
+    def get(self, hwnd) -> Optional[WindowInfo]:
+        return self.by_hwnd.get(hwnd)
+
+    def of_pid(self, pid) -> List[WindowInfo]:
+        return self.by_pid.get(pid, [])
+
+    def of_module(self, module_name) -> List[WindowInfo]:
+        """ Exact module file name, case insensitive: 'chrome.exe' """
+        return self.by_module.get(normalize_module(module_name), [])
+
+    def of_root(self, root_hwnd) -> List[WindowInfo]:
+        """ Nested children of top-level window """
+        return self.by_root.get(root_hwnd, [])
+
+    def matching_paths(self, module_substr: str) -> Set[str]:
+        """ Lowercase module paths containing substring, checked once per distinct module """
+        module_substr = module_substr.lower()
+        return {path for path in self.by_module_path if path and module_substr in path}
+
+    def of_paths(self, lower_paths: Set[str]) -> List[WindowInfo]:
+        groups = [self.by_module_path[path] for path in lower_paths]
+        if len(groups) == 1:
+            return groups[0]
+        return sorted((wnd for wnds in groups for wnd in wnds), key=lambda wnd: self.order[wnd.hwnd])
+
+    def query(self, pid: int = None, module_exe: str = None, visible: bool = None,
+              top_level: bool = None) -> List[WindowInfo]:
+        """
+        None means any value, all specified conditions must match.
+        module_exe: substring of module path, case insensitive
+        """
+        candidates = [self.wnds]
+        matched_paths = None
+        if pid:
+            candidates += [self.of_pid(pid)]
+        if module_exe:
+            matched_paths = self.matching_paths(module_exe)
+            candidates += [self.of_paths(matched_paths)]
+        if visible:
+            candidates += [self.visible]
+        if top_level is not None:
+            candidates += [self.top_level if top_level else self.children]
+
+        smallest = min(candidates, key=len)
+        lower_paths = self.lower_paths
+        return [wnd for wnd in smallest
+                if (not pid or wnd.pid == pid)
+                and (matched_paths is None or lower_paths.get(wnd.module_path) in matched_paths)
+                and (visible is None or wnd.visible == visible)
+                and (top_level is None or (not wnd.root_parent_hwnd) == top_level)]
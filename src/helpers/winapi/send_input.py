@@ -0,0 +1,75 @@
+from typing import List, Sequence, Tuple
+
+import src.helpers.winapi.backend as backend
+from src.helpers.winapi.backend_base import WinApiBackend
+from src.helpers.winapi.input_events import InputEvent, KeyInput, MouseInput, KEYEVENTF_KEYUP, MOUSEEVENTF_MOVE, \
+    MOUSEEVENTF_LEFTDOWN, MOUSEEVENTF_LEFTUP, MOUSEEVENTF_RIGHTDOWN, MOUSEEVENTF_RIGHTUP, key_events_to_inputs, \
+    unicode_inputs
+
+
+class InputBatch:
+    """
+    Collects synthetic input and submits it with one SendInput call:
+    a long string or a drag gesture is one OS call instead of one per event.
+    Backends without batched SendInput fall back to keybd_event and mouse_event per event.
+    """
+
+    def __init__(self):
+        self.events: List[InputEvent] = []
+
+    def __len__(self):
+        return len(self.events)
+
+    def key(self, vk, up=False) -> 'InputBatch':
+        self.events += [KeyInput(vk, 0, KEYEVENTF_KEYUP if up else 0)]
+        return self
+
+    def key_press(self, vk) -> 'InputBatch':
+        return self.key(vk).key(vk, up=True)
+
+    def key_events(self, key_events: Sequence[Tuple[int, int]]) -> 'InputBatch':
+        """ (vk, keybd_event flags), as from KeyboardTable.text_to_key_events """
+        self.events += key_events_to_inputs(key_events)
+        return self
+
+    def unicode_text(self, text) -> 'InputBatch':
+        """ Any chars, regardless of keyboard layout """
+        self.events += unicode_inputs(text)
+        return self
+
+    def mouse_move(self, dx, dy) -> 'InputBatch':
+        self.events += [MouseInput(dx, dy, 0, MOUSEEVENTF_MOVE)]
+        return self
+
+    def mouse_button(self, down, right=False) -> 'InputBatch':
+        if right:
+            flags = MOUSEEVENTF_RIGHTDOWN if down else MOUSEEVENTF_RIGHTUP
+        else:
+            flags = MOUSEEVENTF_LEFTDOWN if down else MOUSEEVENTF_LEFTUP
+        self.events += [MouseInput(0, 0, 0, flags)]
+        return self
+
+    def click(self, right=False) -> 'InputBatch':
+        return self.mouse_button(True, right).mouse_button(False, right)
+
+    def drag(self, dx, dy, steps=10) -> 'InputBatch':
+        """ Left button drag from cursor position by dx, dy in equal relative moves """
+        self.mouse_button(True)
+        moved_x = moved_y = 0
+        for i in range(1, steps + 1):
+            x, y = dx * i // steps, dy * i // steps
+            self.mouse_move(x - moved_x, y - moved_y)
+            moved_x, moved_y = x, y
+        return self.mouse_button(False)
+
+    def send(self, batched=True) -> int:
+        """
+        Returns number of inserted events, batch is cleared.
+        batched: False forces per event path, for targets which drop SendInput arrays
+        """
+        events, self.events = self.events, []
+        if not events:
+            return 0
+        if not batched:
+            return WinApiBackend.SendInput(backend.api, events)
+        return backend.api.SendInput(events)
@@ -0,0 +1,396 @@
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple, Deque, Sequence
+
+from src.helpers.winapi.backend_base import WinApiBackend, WinApiError, WinEventCallback
+from src.helpers.winapi.consts import WS_VISIBLE, WS_CHILD, WS_OVERLAPPEDWINDOW, GWL_STYLE, SW_SHOWNORMAL, \
+    WM_KEYDOWN, WM_KEYUP, KEYEVENTF_KEYUP, WM_SETTEXT, PROCESS_QUERY_LIMITED_INFORMATION, \
+    PROCESS_QUERY_INFORMATION, PROCESS_VM_READ, WM_CHAR, WM_LBUTTONDOWN, WM_LBUTTONUP, WM_RBUTTONDOWN, WM_RBUTTONUP, \
+    EVENT_SYSTEM_FOREGROUND, EVENT_OBJECT_LOCATIONCHANGE, EVENT_OBJECT_NAMECHANGE, OBJID_WINDOW, OBJID_CURSOR
+from src.helpers.winapi.input_events import InputEvent, KeyInput, KEYEVENTF_UNICODE, MOUSEEVENTF_MOVE, \
+    MOUSEEVENTF_ABSOLUTE, MOUSEEVENTF_LEFTDOWN, MOUSEEVENTF_LEFTUP, MOUSEEVENTF_RIGHTDOWN, MOUSEEVENTF_RIGHTUP
+
+
+@dataclass(init=True)
+class SimProcess:
+    pid: int
+    module_path: str
+    creation_time: int
+    protected: bool = False
+
+
+@dataclass(init=True)
+class SimWindow:
+    hwnd: int
+    pid: int
+    parent: int  # 0 for top-level
+    title: str
+    style: int
+    show_cmd: int
+    rect: Tuple[int, int, int, int]
+    children: List[int] = field(default_factory=list)
+    # (msg, wparam, lparam) of each SendMessage or PostMessage
+    queue: Deque[Tuple[int, int, int]] = field(default_factory=deque)
+
+
+class SimulatedDesktop(WinApiBackend):
+    """
+    In-memory desktop with processes, window trees and per window message queues.
+    Intended for benchmarks and tests outside of Windows, not for exact WinApi emulation.
+    """
+
+    # layouts are approximated, tables of them must not replace real ones in cache
+    system = 'simulated'
+    HWND_STEP = 2
+    # en-US
+    KEYBOARD_LAYOUT = 0x04090409
+    # US layout: shifted char -> unshifted char on the same key
+    US_SHIFTED = dict(zip('~!@#$%^&*()_+{}|:"<>?', '`1234567890-=[]\\;\',./'))
+    US_OEM_VKS = dict(zip('`-=[]\\;\',./', (0xC0, 0xBD, 0xBB, 0xDB, 0xDD, 0xDC, 0xBA, 0xDE, 0xBC, 0xBE, 0xBF)))
+
+    def __init__(self, latency_sec=0.0):
+        """ latency_sec: emulated cost of each WinApi call, busy waited for precision """
+        self.latency_sec = latency_sec
+        self.processes: Dict[int, SimProcess] = {}
+        self.windows: Dict[int, SimWindow] = {}
+        self.top_level: List[int] = []
+        self.foreground_hwnd = 0
+        self.cursor = (0, 0)
+        self.calls = 0
+
+        self.next_hwnd = 0x10010
+        self.next_pid = 4
+        self.last_creation_time = 0
+        # handle: (pid, access)
+        self.handles: Dict[int, Tuple[int, int]] = {}
+        self.next_handle = 0x100
+        # hook: (event_min, event_max, callback), called synchronously on changes instead of via message loop
+        self.win_event_hooks: Dict[int, Tuple[int, int, WinEventCallback]] = {}
+
+    @classmethod
+    def generate(cls, processes=100, windows_per_process=3, children_per_window=30, child_depth=2,
+                 visible_ratio=0.5, protected_ratio=0.05, seed=0, latency_sec=0.0) -> 'SimulatedDesktop':
+        """
+        Synthetic desktop of processes * windows_per_process * (1 + children_per_window) windows.
+        child_depth: children are nested up to this depth below a top-level window
+        """
+        rnd = random.Random(seed)
+        desktop = cls(latency_sec)
+
+        for p in range(processes):
+            proc = desktop.add_process(f'C:\\Program Files\\App{p % 50}\\app{p}.exe',
+                                       protected=rnd.random() < protected_ratio)
+            for w in range(windows_per_process):
+                root = desktop.add_window(proc.pid, f'app{p} window {w}', visible=rnd.random() < visible_ratio)
+                parents = [root.hwnd]
+                for c in range(children_per_window):
+                    parent = rnd.choice(parents)
+                    child = desktop.add_window(proc.pid, f'child {c}', parent=parent,
+                                               visible=rnd.random() < visible_ratio)
+                    if len(parents) < child_depth:
+                        parents += [child.hwnd]
+
+        if desktop.top_level:
+            desktop.foreground_hwnd = desktop.top_level[0]
+        return desktop
+
+    def add_process(self, module_path, protected=False) -> SimProcess:
+        proc = SimProcess(self.next_pid, module_path, self.creation_time(), protected)
+        self.next_pid += 4
+        self.processes[proc.pid] = proc
+        return proc
+
+    def creation_time(self):
+        # unique even for processes created within clock resolution
+        self.last_creation_time = max(time.time_ns(), self.last_creation_time + 1)
+        return self.last_creation_time
+
+    def add_window(self, pid, title, parent=0, visible=True, show_cmd=SW_SHOWNORMAL) -> SimWindow:
+        style = WS_OVERLAPPEDWINDOW
+        if visible:
+            style |= WS_VISIBLE
+        if parent:
+            style |= WS_CHILD
+
+        wnd = SimWindow(self.next_hwnd, pid, parent, title, style, show_cmd, (0, 0, 800, 600))
+        self.next_hwnd += self.HWND_STEP
+        self.windows[wnd.hwnd] = wnd
+
+        if parent:
+            self.windows[parent].children += [wnd.hwnd]
+        else:
+            self.top_level += [wnd.hwnd]
+        return wnd
+
+    def destroy_window(self, hwnd):
+        wnd = self.windows.pop(hwnd)
+        for child in list(wnd.children):
+            self.destroy_window(child)
+
+        if wnd.parent:
+            parent = self.windows.get(wnd.parent)
+            if parent:
+                parent.children.remove(hwnd)
+        else:
+            self.top_level.remove(hwnd)
+
+    def kill_process(self, pid, recycled_module_path=None):
+        """ recycled_module_path: immediately starts another module with same pid, as Windows may do """
+        for hwnd in [w.hwnd for w in self.windows.values() if w.pid == pid and not w.parent]:
+            self.destroy_window(hwnd)
+        del self.processes[pid]
+        if recycled_module_path:
+            self.processes[pid] = SimProcess(pid, recycled_module_path, self.creation_time())
+
+    def pop_messages(self, hwnd) -> List[Tuple[int, int, int]]:
+        queue = self.windows[hwnd].queue
+        messages = list(queue)
+        queue.clear()
+        return messages
+
+    def emulate_call(self):
+        self.calls += 1
+        if self.latency_sec:
+            deadline = time.perf_counter() + self.latency_sec
+            while time.perf_counter() < deadline:
+                pass
+
+    def window(self, hwnd) -> SimWindow:
+        wnd = self.windows.get(hwnd)
+        if not wnd:
+            raise WinApiError(1400, 'Invalid window handle.')
+        return wnd
+
+    def iter_descendants(self, hwnd):
+        for child in self.windows[hwnd].children:
+            yield child
+            yield from self.iter_descendants(child)
+
+    def EnumWindows(self, callback, extra):
+        self.emulate_call()
+        for hwnd in list(self.top_level):
+            if not callback(hwnd, extra):
+                return
+
+    def EnumChildWindows(self, hwnd, callback, extra):
+        self.emulate_call()
+        for child in list(self.iter_descendants(hwnd)):
+            if not callback(child, extra):
+                return
+
+    def GetWindowText(self, hwnd) -> str:
+        self.emulate_call()
+        wnd = self.windows.get(hwnd)
+        return wnd.title if wnd else ''
+
+    def SetWindowText(self, hwnd, text):
+        self.emulate_call()
+        self.window(hwnd).title = text
+        self.fire_win_event(EVENT_OBJECT_NAMECHANGE, hwnd, OBJID_WINDOW)
+
+    def GetWindowLong(self, hwnd, index) -> int:
+        self.emulate_call()
+        assert index == GWL_STYLE
+        return self.window(hwnd).style
+
+    def GetWindowThreadProcessId(self, hwnd) -> Tuple[int, int]:
+        self.emulate_call()
+        wnd = self.windows.get(hwnd)
+        return (hwnd + 1, wnd.pid) if wnd else (0, 0)
+
+    def GetWindowPlacement(self, hwnd) -> Tuple:
+        self.emulate_call()
+        wnd = self.window(hwnd)
+        return 0, wnd.show_cmd, (-1, -1), (-1, -1), wnd.rect
+
+    def GetWindowRect(self, hwnd) -> Tuple[int, int, int, int]:
+        self.emulate_call()
+        return self.window(hwnd).rect
+
+    def GetClientRect(self, hwnd) -> Tuple[int, int, int, int]:
+        self.emulate_call()
+        l, t, r, b = self.window(hwnd).rect
+        return 0, 0, r - l, b - t
+
+    def ScreenToClient(self, hwnd, point) -> Tuple[int, int]:
+        self.emulate_call()
+        l, t, _, _ = self.window(hwnd).rect
+        return point[0] - l, point[1] - t
+
+    def IsWindow(self, hwnd) -> bool:
+        self.emulate_call()
+        return hwnd in self.windows
+
+    def GetForegroundWindow(self) -> int:
+        self.emulate_call()
+        return self.foreground_hwnd
+
+    def SetForegroundWindow(self, hwnd):
+        self.emulate_call()
+        wnd = self.window(hwnd)
+        while wnd.parent:
+            wnd = self.windows[wnd.parent]
+        if self.foreground_hwnd != wnd.hwnd:
+            self.foreground_hwnd = wnd.hwnd
+            self.fire_win_event(EVENT_SYSTEM_FOREGROUND, wnd.hwnd, OBJID_WINDOW)
+
+    def WindowFromPoint(self, point) -> int:
+        self.emulate_call()
+        return self.window_from_point(point)
+
+    def window_from_point(self, point) -> int:
+        x, y = point
+        for hwnd in self.top_level:
+            wnd = self.windows[hwnd]
+            l, t, r, b = wnd.rect
+            if WS_VISIBLE & wnd.style and l <= x < r and t <= y < b:
+                return hwnd
+        return 0
+
+    def GetCursorPos(self) -> Tuple[int, int]:
+        self.emulate_call()
+        return self.cursor
+
+    def move_cursor(self, point):
+        """ As user moves the mouse """
+        if self.cursor != tuple(point):
+            self.cursor = tuple(point)
+            self.fire_win_event(EVENT_OBJECT_LOCATIONCHANGE, 0, OBJID_CURSOR)
+
+    def SetWinEventHook(self, event_min, event_max, callback: WinEventCallback) -> int:
+        hook = self.next_handle
+        self.next_handle += 1
+        self.win_event_hooks[hook] = (event_min, event_max, callback)
+        return hook
+
+    def UnhookWinEvent(self, hook):
+        self.win_event_hooks.pop(hook, None)
+
+    def fire_win_event(self, event, hwnd, id_object):
+        for event_min, event_max, callback in list(self.win_event_hooks.values()):
+            if event_min <= event <= event_max:
+                callback(event, hwnd, id_object, 0)
+
+    def OpenProcess(self, access, inherit, pid):
+        self.emulate_call()
+        proc = self.processes.get(pid)
+        if not proc:
+            raise WinApiError(87, 'The parameter is incorrect.')
+        # like on Windows, protected processes can be queried only with least privileges
+        if proc.protected and access != PROCESS_QUERY_LIMITED_INFORMATION:
+            raise WinApiError(5, 'Access is denied.')
+
+        handle = self.next_handle
+        self.next_handle += 4
+        self.handles[handle] = (pid, access)
+        return handle
+
+    def CloseHandle(self, handle):
+        self.emulate_call()
+        self.handles.pop(handle)
+
+    def process_by_handle(self, handle, required_access) -> SimProcess:
+        if handle not in self.handles:
+            raise WinApiError(6, 'The handle is invalid.')
+        pid, access = self.handles[handle]
+        if access & required_access != required_access:
+            raise WinApiError(5, 'Access is denied.')
+        proc = self.processes.get(pid)
+        if not proc:
+            raise WinApiError(299, 'Only part of a ReadProcessMemory or WriteProcessMemory request was completed.')
+        return proc
+
+    def GetModuleFileNameEx(self, handle, module) -> str:
+        self.emulate_call()
+        return self.process_by_handle(handle, PROCESS_QUERY_INFORMATION | PROCESS_VM_READ).module_path
+
+    def QueryFullProcessImageName(self, handle) -> str:
+        self.emulate_call()
+        return self.process_by_handle(handle, PROCESS_QUERY_LIMITED_INFORMATION).module_path
+
+    def GetProcessTimes(self, handle) -> Dict:
+        self.emulate_call()
+        proc = self.process_by_handle(handle, PROCESS_QUERY_LIMITED_INFORMATION)
+        return {'CreationTime': proc.creation_time, 'ExitTime': 0, 'KernelTime': 0, 'UserTime': 0}
+
+    def SendMessage(self, hwnd, msg, wparam, lparam):
+        self.emulate_call()
+        wnd = self.window(hwnd)
+        wnd.queue.append((msg, wparam, lparam))
+        if msg == WM_SETTEXT:
+            wnd.title = lparam
+        return 0
+
+    def PostMessage(self, hwnd, msg, wparam, lparam):
+        self.emulate_call()
+        self.window(hwnd).queue.append((msg, wparam, lparam))
+
+    def keybd_event(self, vk, scan, flags, extra_info):
+        self.emulate_call()
+        self.apply_key(vk, scan, flags)
+
+    def mouse_event(self, flags, dx, dy, data, extra_info):
+        self.emulate_call()
+        self.apply_mouse(dx, dy, data, flags)
+
+    def SendInput(self, events: Sequence[InputEvent]) -> int:
+        # one call for all events, as in Win32Backend
+        self.emulate_call()
+        for event in events:
+            if isinstance(event, KeyInput):
+                self.apply_key(*event)
+            else:
+                self.apply_mouse(*event)
+        return len(events)
+
+    def apply_key(self, vk, scan, flags):
+        # synthesized input goes to focused window, which is approximated by foreground one
+        wnd = self.windows.get(self.foreground_hwnd)
+        if not wnd:
+            return
+        if flags & KEYEVENTF_UNICODE:
+            if not flags & KEYEVENTF_KEYUP:
+                wnd.queue.append((WM_CHAR, scan, 0))
+            return
+        msg = WM_KEYUP if flags & KEYEVENTF_KEYUP else WM_KEYDOWN
+        wnd.queue.append((msg, vk, 0))
+
+    def apply_mouse(self, dx, dy, data, flags):
+        if flags & MOUSEEVENTF_MOVE and not flags & MOUSEEVENTF_ABSOLUTE:
+            self.move_cursor((self.cursor[0] + dx, self.cursor[1] + dy))
+        # window under cursor receives buttons, client coordinates are not emulated
+        wnd = self.windows.get(self.window_from_point(self.cursor))
+        if not wnd:
+            return
+        for flag, msg in ((MOUSEEVENTF_LEFTDOWN, WM_LBUTTONDOWN), (MOUSEEVENTF_LEFTUP, WM_LBUTTONUP),
+                          (MOUSEEVENTF_RIGHTDOWN, WM_RBUTTONDOWN), (MOUSEEVENTF_RIGHTUP, WM_RBUTTONUP)):
+            if flags & flag:
+                wnd.queue.append((msg, 0, 0))
+
+    def VkKeyScan(self, char) -> int:
+        return self.VkKeyScanEx(char, self.KEYBOARD_LAYOUT)
+
+    def VkKeyScanEx(self, char, hkl) -> int:
+        self.emulate_call()
+        # US layout approximation: high byte is shift state
+        if hkl != self.KEYBOARD_LAYOUT or not char.isascii():
+            return -1
+        if char.isalpha():
+            return ord(char.upper()) | (0x100 if char.isupper() else 0)
+        if char in ' \t\b\r\x1b':
+            return ord(char)
+        if char == '\n':
+            return 0x20D  # ctrl + VK_RETURN
+        shift = 0x100 if char in self.US_SHIFTED else 0
+        unshifted = self.US_SHIFTED.get(char, char)
+        vk = ord(unshifted) if unshifted.isdigit() else self.US_OEM_VKS.get(unshifted)
+        return vk | shift if vk else -1
+
+    def GetKeyboardLayout(self, thread_id) -> int:
+        self.emulate_call()
+        return self.KEYBOARD_LAYOUT
+
+    def press_alt(self):
+        self.emulate_call()
@@ -0,0 +1,80 @@
+from dataclasses import dataclass, field
+from typing import List, Optional, Dict, Set
+
+from src.helpers.winapi.processes import WindowInfo, get_process_windows, window_sort_key
+from src.helpers.winapi.registry import WindowRegistry
+
+
+@dataclass(init=True)
+class SnapshotDiff:
+    added: List[WindowInfo] = field(default_factory=list)
+    # for each of added, hwnd which precedes it in new order, None if first
+    added_after: List[Optional[int]] = field(default_factory=list)
+    removed: List[WindowInfo] = field(default_factory=list)
+    # new infos of windows with changed title, visibility, style or any other field except sort key
+    changed: List[WindowInfo] = field(default_factory=list)
+    # windows with changed sort key (pid or root parent), they are both in removed and added to move their rows
+    moved: Set[int] = field(default_factory=set)
+
+    def is_empty(self):
+        return not (self.added or self.removed or self.changed)
+
+    def summary(self):
+        return f'added: {len(self.added) - len(self.moved)}, removed: {len(self.removed) - len(self.moved)}, ' \
+               f'changed: {len(self.changed)}, moved: {len(self.moved)}'
+
+
+class WindowSnapshot:
+    """ Ordered windows of one enumeration with hwnd lookup """
+
+    def __init__(self, wnds: List[WindowInfo]):
+        self.wnds = wnds
+        self.by_hwnd: Dict[int, WindowInfo] = {wnd.hwnd: wnd for wnd in wnds}
+        self._registry: Optional[WindowRegistry] = None
+
+    @classmethod
+    def capture(cls) -> 'WindowSnapshot':
+        return cls(get_process_windows())
+
+    @property
+    def registry(self) -> WindowRegistry:
+        """ Indexes are built on first query """
+        if not self._registry:
+            self._registry = WindowRegistry(self.wnds)
+        return self._registry
+
+    def __len__(self):
+        return len(self.wnds)
+
+    def __contains__(self, hwnd):
+        return hwnd in self.by_hwnd
+
+    def get(self, hwnd) -> Optional[WindowInfo]:
+        return self.by_hwnd.get(hwnd)
+
+    def diff(self, prev: Optional['WindowSnapshot']) -> SnapshotDiff:
+        """ Changes from prev to self, added and changed are in order of self """
+        result = SnapshotDiff()
+        prev_by_hwnd = prev.by_hwnd if prev else {}
+        prev_hwnd = None
+        for wnd in self.wnds:
+            prev_wnd = prev_by_hwnd.get(wnd.hwnd)
+            if prev_wnd is None:
+                result.added += [wnd]
+                result.added_after += [prev_hwnd]
+            elif prev_wnd != wnd:
+                if window_sort_key(prev_wnd) != window_sort_key(wnd):
+                    # row at old index would break the order
+                    result.moved.add(wnd.hwnd)
+                    result.removed += [prev_wnd]
+                    result.added += [wnd]
+                    result.added_after += [prev_hwnd]
+                else:
+                    result.changed += [wnd]
+            prev_hwnd = wnd.hwnd
+
+        # count check skips the removal scan when nothing was removed
+        if prev and len(prev) + len(result.added) - len(result.moved) != len(self):
+            by_hwnd = self.by_hwnd
+            result.removed += [wnd for wnd in prev.wnds if wnd.hwnd not in by_hwnd]
+        return result
@@ -0,0 +1,121 @@
+import sys
+from array import array
+from typing import List, Dict, Optional, Iterable, Sequence
+
+from src.helpers.winapi.consts import WS_VISIBLE
+from src.helpers.winapi.window_info import WindowInfo
+
+try:
+    # optional, only speeds up filters and sorts
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class WindowColumns:
+    """
+    Struct-of-arrays storage of windows: one typed array per integer field, module paths interned.
+    Compared to List[WindowInfo] there are no per window objects except titles,
+    filters and sorts return row indices and are vectorized when NumPy is available.
+    """
+
+    def __init__(self):
+        self.hwnds = array('q')
+        self.root_parents = array('q')  # 0 for top-level
+        self.pids = array('q')
+        self.styles = array('q')
+        self.module_ids = array('i')
+        self.titles: List[str] = []
+
+        # id 0 is reserved for unknown module
+        self.modules: List[Optional[str]] = [None]
+        self.module_index: Dict[Optional[str], int] = {None: 0}
+
+    @classmethod
+    def from_infos(cls, wnds: Iterable[WindowInfo]) -> 'WindowColumns':
+        columns = cls()
+        for wnd in wnds:
+            columns.append(wnd.hwnd, wnd.root_parent_hwnd, wnd.pid, wnd.module_path, wnd.style, wnd.title)
+        return columns
+
+    def module_id(self, module_path: Optional[str]) -> int:
+        module_id = self.module_index.get(module_path)
+        if module_id is None:
+            module_id = len(self.modules)
+            self.modules += [sys.intern(module_path)]
+            self.module_index[module_path] = module_id
+        return module_id
+
+    def append(self, hwnd, root_parent_hwnd, pid, module_path, style, title):
+        self.hwnds.append(hwnd)
+        self.root_parents.append(root_parent_hwnd or 0)
+        self.pids.append(pid)
+        self.styles.append(style)
+        self.module_ids.append(self.module_id(module_path))
+        self.titles += [title]
+
+    def __len__(self):
+        return len(self.hwnds)
+
+    def info(self, row) -> WindowInfo:
+        style = self.styles[row]
+        return WindowInfo(self.hwnds[row], self.root_parents[row] or None, self.pids[row],
+                          self.modules[self.module_ids[row]], style, bool(style & WS_VISIBLE), self.titles[row])
+
+    def infos(self, rows: Optional[Sequence[int]] = None) -> List[WindowInfo]:
+        """ Materializes WindowInfo only for requested rows """
+        return [self.info(row) for row in (range(len(self)) if rows is None else rows)]
+
+    def take(self, rows: Sequence[int]) -> 'WindowColumns':
+        """ New columns of selected rows in given order, modules table is shared """
+        taken = WindowColumns()
+        taken.modules, taken.module_index = self.modules, self.module_index
+        for src, dst in ((self.hwnds, taken.hwnds), (self.root_parents, taken.root_parents),
+                         (self.pids, taken.pids), (self.styles, taken.styles), (self.module_ids, taken.module_ids)):
+            dst.extend(src[row] for row in rows)
+        taken.titles = [self.titles[row] for row in rows]
+        return taken
+
+    def matching_module_ids(self, module_substr: str) -> List[int]:
+        """ Substring match is done once per distinct module, not per window """
+        module_substr = module_substr.lower()
+        return [i for i, path in enumerate(self.modules) if path and module_substr in path.lower()]
+
+    def filter(self, pid: int = None, module_exe: str = None, remove_invisible=True) -> List[int]:
+        """ Same conditions as filter_process_windows, returns rows """
+        module_ids = set(self.matching_module_ids(module_exe)) if module_exe else None
+
+        if np is not None:
+            mask = np.ones(len(self), dtype=bool)
+            if pid:
+                mask &= np.frombuffer(self.pids, dtype=np.int64) == pid
+            if module_ids is not None:
+                module_mask = np.zeros(len(self.modules), dtype=bool)
+                module_mask[list(module_ids)] = True
+                mask &= module_mask[np.frombuffer(self.module_ids, dtype=np.int32)]
+            if remove_invisible:
+                mask &= (np.frombuffer(self.styles, dtype=np.int64) & WS_VISIBLE) != 0
+            return np.flatnonzero(mask).tolist()
+
+        return [row for row, (row_pid, module_id, style)
+                in enumerate(zip(self.pids, self.module_ids, self.styles))
+                if (not pid or row_pid == pid)
+                and (module_ids is None or module_id in module_ids)
+                and (not remove_invisible or style & WS_VISIBLE)]
+
+    def sort_order(self) -> List[int]:
+        """ Rows in order of get_process_windows: by pid, then by root parent or own hwnd """
+        # tolist() creates ints in one C call, indexing arrays per row is slower than sorting WindowInfo by lambda
+        groups = [root or hwnd for root, hwnd in zip(self.root_parents.tolist(), self.hwnds.tolist())]
+        if np is not None:
+            # lexsort is stable and sorts by last key first
+            return np.lexsort((np.array(groups, dtype=np.int64), np.frombuffer(self.pids, dtype=np.int64))).tolist()
+        # two stable sorts by single keys are cheaper than one by tuples
+        rows = sorted(range(len(self)), key=groups.__getitem__)
+        rows.sort(key=self.pids.tolist().__getitem__)
+        return rows
+
+    def nbytes(self) -> int:
+        """ Approximate memory of columns, without shared strings """
+        arrays = (self.hwnds, self.root_parents, self.pids, self.styles, self.module_ids)
+        return sum(a.buffer_info()[1] * a.itemsize for a in arrays) + sys.getsizeof(self.titles)
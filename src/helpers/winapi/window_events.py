@@ -0,0 +1,161 @@
+import time
+from abc import abstractmethod
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+import src.helpers.winapi.backend as backend
+from src.helpers.winapi.backend import WinApiError
+from src.helpers.winapi.consts import EVENT_SYSTEM_FOREGROUND, EVENT_OBJECT_LOCATIONCHANGE, \
+    EVENT_OBJECT_NAMECHANGE, OBJID_WINDOW, OBJID_CURSOR
+
+"""
+ Notifications about foreground change, cursor move and window title change.
+ WinEvent hooks push them as they happen, without hooks state is polled, cursor with interval adapted to activity.
+ Sources are not thread safe: start, poll and stop them in one thread, callbacks are called in it too.
+"""
+
+FOREGROUND_CHANGED = 1
+CURSOR_MOVED = 2
+NAME_CHANGED = 3
+
+
+class WindowEvent(NamedTuple):
+    kind: int
+    # 0 for CURSOR_MOVED
+    hwnd: int
+    # perf_counter() when noticed
+    time_sec: float
+
+
+WindowEventCallback = Callable[[WindowEvent], None]
+
+
+class WindowEventSource:
+    # True if every change is notified as it happens, so state needs no queries between events
+    pushed = False
+
+    def __init__(self):
+        self.callbacks: List[WindowEventCallback] = []
+
+    def subscribe(self, callback: WindowEventCallback):
+        self.callbacks += [callback]
+
+    def notify(self, kind, hwnd):
+        event = WindowEvent(kind, hwnd, time.perf_counter())
+        for callback in self.callbacks:
+            callback(event)
+
+    @abstractmethod
+    def start(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def stop(self):
+        raise NotImplementedError
+
+    def poll(self) -> Optional[float]:
+        """ Seconds until the next poll is due, None if events are pushed and poll is never needed """
+        return None
+
+
+class HookEventSource(WindowEventSource):
+    """ Costs nothing while nothing changes, thread which started it must pump messages """
+
+    pushed = True
+
+    # foreground, then cursor or window location and name changes, which are adjacent
+    EVENT_RANGES = ((EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_FOREGROUND),
+                    (EVENT_OBJECT_LOCATIONCHANGE, EVENT_OBJECT_NAMECHANGE))
+
+    def __init__(self):
+        super().__init__()
+        self.hooks = []
+
+    def start(self):
+        """ Raises NotImplementedError or WinApiError if hooks are not available """
+        api = backend.api
+        try:
+            for event_min, event_max in self.EVENT_RANGES:
+                self.hooks += [api.SetWinEventHook(event_min, event_max, self.on_win_event)]
+        except:
+            self.stop()
+            raise
+
+    def stop(self):
+        api = backend.api
+        for hook in self.hooks:
+            api.UnhookWinEvent(hook)
+        self.hooks = []
+
+    def on_win_event(self, event, hwnd, id_object, id_child):
+        if event == EVENT_SYSTEM_FOREGROUND:
+            self.notify(FOREGROUND_CHANGED, hwnd)
+        elif event == EVENT_OBJECT_LOCATIONCHANGE and id_object == OBJID_CURSOR:
+            self.notify(CURSOR_MOVED, 0)
+        elif event == EVENT_OBJECT_NAMECHANGE and id_object == OBJID_WINDOW and id_child == 0:
+            self.notify(NAME_CHANGED, hwnd)
+
+
+class PollingEventSource(WindowEventSource):
+    """
+    Fallback which polls foreground window every MIN_INTERVAL_SEC, since focus lag is what picking waits for,
+    and cursor often after a move, backing off to MAX_INTERVAL_SEC while it is idle.
+    Title changes are not polled, since it would need GetWindowText of every window of interest.
+    """
+
+    MIN_INTERVAL_SEC = 0.01
+    # cursor is sampled no slower than fixed 100 ms polling it replaces
+    MAX_INTERVAL_SEC = 0.1
+    BACKOFF = 1.5
+
+    def __init__(self):
+        super().__init__()
+        self.cursor_interval_sec = self.MIN_INTERVAL_SEC
+        # until the next cursor sample
+        self.cursor_wait_sec = 0.0
+        self.cursor: Optional[Tuple[int, int]] = None
+        self.foreground_hwnd = None
+
+    def start(self):
+        api = backend.api
+        self.cursor = api.GetCursorPos()
+        self.foreground_hwnd = api.GetForegroundWindow()
+        self.cursor_interval_sec = self.MIN_INTERVAL_SEC
+        self.cursor_wait_sec = 0.0
+
+    def stop(self):
+        pass
+
+    def poll(self) -> float:
+        api = backend.api
+
+        foreground_hwnd = api.GetForegroundWindow()
+        if foreground_hwnd != self.foreground_hwnd:
+            self.foreground_hwnd = foreground_hwnd
+            self.cursor_wait_sec = 0.0
+            self.notify(FOREGROUND_CHANGED, foreground_hwnd)
+
+        self.cursor_wait_sec -= self.MIN_INTERVAL_SEC
+        if self.cursor_wait_sec <= 0:
+            cursor = api.GetCursorPos()
+            if cursor != self.cursor:
+                self.cursor = cursor
+                self.cursor_interval_sec = self.MIN_INTERVAL_SEC
+                self.notify(CURSOR_MOVED, 0)
+            else:
+                self.cursor_interval_sec = min(self.MAX_INTERVAL_SEC, self.cursor_interval_sec * self.BACKOFF)
+            self.cursor_wait_sec = self.cursor_interval_sec
+        return self.MIN_INTERVAL_SEC
+
+
+def start_event_source(prefer_hooks=True) -> WindowEventSource:
+    """ Started hook source if backend supports hooks, otherwise polling one """
+    if prefer_hooks:
+        source = HookEventSource()
+        try:
+            source.start()
+            return source
+        except (NotImplementedError, WinApiError):
+            pass
+    source = PollingEventSource()
+    source.start()
+    return source
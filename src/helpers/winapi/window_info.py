@@ -0,0 +1,15 @@
+from dataclasses import dataclass
+
+
+@dataclass(init=True)
+class WindowInfo:
+    # no per instance __dict__, desktops can have tens of thousands of windows
+    __slots__ = ('hwnd', 'root_parent_hwnd', 'pid', 'module_path', 'style', 'visible', 'title')
+
+    hwnd: int
+    root_parent_hwnd: int  # root parent can be nested
+    pid: int
+    module_path: str
+    style: int
+    visible: bool
+    title: str
@@ -0,0 +1,124 @@
+from dataclasses import dataclass, field
+from typing import Optional, Callable, List, Dict, Iterator, Set
+
+import src.helpers.winapi.backend as backend
+from src.helpers.winapi.consts import GWL_STYLE, WS_VISIBLE
+from src.helpers.winapi.process_info import process_cache
+from src.helpers.winapi.window_info import WindowInfo
+
+
+@dataclass(init=True)
+class WindowFilter:
+    """
+    Conditions are pushed down into enumeration callback and checked from cheapest:
+    pid, style, module (cached per pid), title is read only for windows which passed,
+    predicate is called last on complete WindowInfo.
+    """
+    pid: Optional[int] = None
+    module_exe: Optional[str] = None  # substring of module path, case insensitive
+    visible: Optional[bool] = None
+    predicate: Optional[Callable[[WindowInfo], bool]] = None
+
+    # module_path: matched, each module is checked once
+    module_matches: Dict[Optional[str], bool] = field(default_factory=dict, repr=False, compare=False)
+
+    def module_matched(self, module_path: Optional[str]) -> bool:
+        matched = self.module_matches.get(module_path)
+        if matched is None:
+            matched = module_path is not None and self.module_exe.lower() in module_path.lower()
+            self.module_matches[module_path] = matched
+        return matched
+
+
+@dataclass(init=True)
+class EnumFilterArgs:
+    flt: WindowFilter
+    known_root_parent: Optional[int]
+    found: List[WindowInfo]
+    # enumeration is stopped when found reaches limit
+    limit: Optional[int] = None
+
+
+def on_enum_window_filtered(hwnd, args: EnumFilterArgs) -> bool:
+    """ Returns False to stop enumeration """
+    api = backend.api
+    flt = args.flt
+
+    pid = api.GetWindowThreadProcessId(hwnd)[1]
+    if flt.pid and pid != flt.pid:
+        return True
+
+    style = api.GetWindowLong(hwnd, GWL_STYLE)
+    visible = bool(WS_VISIBLE & style)
+    if flt.visible is not None and visible != flt.visible:
+        return True
+
+    module_path = process_cache.get_module_path(pid) if pid else None
+    if flt.module_exe and not flt.module_matched(module_path):
+        return True
+
+    title = api.GetWindowText(hwnd)
+    info = WindowInfo(hwnd, args.known_root_parent, pid, module_path, style, visible, title)
+    if flt.predicate and not flt.predicate(info):
+        return True
+
+    args.found += [info]
+    return args.limit is None or len(args.found) < args.limit
+
+
+def on_enum_hwnd(hwnd, hwnds: List[int]) -> bool:
+    hwnds += [hwnd]
+    return True
+
+
+def iter_process_windows(flt: WindowFilter = None, include_children=True,
+                         limit: int = None, children_of: Optional[Set[int]] = None) -> Iterator[WindowInfo]:
+    """
+    Lazy alternative of get_process_windows with pushed down filter.
+    Yields in enumeration order (top-level window, then its children), not sorted.
+    Children of a top-level window are enumerated only when iteration reaches it,
+    so breaking iteration early skips the rest of the desktop.
+    limit: also stops EnumChildWindows in the middle
+    children_of: if include_children is False, children are still enumerated for these top-level windows
+    """
+    api = backend.api
+    flt = flt or WindowFilter()
+    process_cache.new_generation()
+
+    # only handles, cheap compared to per window queries
+    top_hwnds: List[int] = []
+    api.EnumWindows(on_enum_hwnd, top_hwnds)
+
+    remaining = limit
+    for root_hwnd in top_hwnds:
+        args = EnumFilterArgs(flt, None, [])
+        on_enum_window_filtered(root_hwnd, args)
+        with_children = include_children or (children_of and root_hwnd in children_of)
+        if with_children and (remaining is None or remaining > len(args.found)):
+            args.known_root_parent = root_hwnd
+            args.limit = remaining
+            api.EnumChildWindows(root_hwnd, on_enum_window_filtered, args)
+
+        for info in args.found:
+            yield info
+            if remaining is not None:
+                remaining -= 1
+                if remaining == 0:
+                    return
+
+
+def find_windows(flt: WindowFilter, limit=1, include_children=False) -> List[WindowInfo]:
+    """ Enumeration itself is stopped as soon as limit is reached """
+    if include_children:
+        return list(iter_process_windows(flt, include_children=True, limit=limit))
+
+    process_cache.new_generation()
+    args = EnumFilterArgs(flt, None, [], limit)
+    backend.api.EnumWindows(on_enum_window_filtered, args)
+    return args.found
+
+
+def find_first_window(**filter_kwargs) -> Optional[WindowInfo]:
+    """ find_first_window(module_exe='chrome.exe', visible=True) """
+    found = find_windows(WindowFilter(**filter_kwargs), limit=1)
+    return found[0] if found else None
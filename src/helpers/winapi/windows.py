@@ -2,11 +2,9 @@ from contextlib import contextmanager
 from enum import Enum
 from time import sleep
 
-import win32con
-import win32gui
-import pyautogui
-
-from src.helpers.winapi.processes import get_process_windows, filter_process_windows
+import src.helpers.winapi.backend as backend
+from src.helpers.winapi import consts
+from src.helpers.winapi.window_stream import iter_process_windows, WindowFilter
 
 
 class MissingWindowFocusException(Exception):
@@ -14,13 +12,13 @@ class MissingWindowFocusException(Exception):
 
 
 class WindowState(Enum):
-    MAX = win32con.SW_SHOWMAXIMIZED
-    MIN = win32con.SW_SHOWMINIMIZED
-    NORM = win32con.SW_SHOWNORMAL
+    MAX = consts.SW_SHOWMAXIMIZED
+    MIN = consts.SW_SHOWMINIMIZED
+    NORM = consts.SW_SHOWNORMAL
 
 
 def get_dims(hwnd):
-    left, top, right, bottom = win32gui.GetWindowRect(hwnd)
+    left, top, right, bottom = backend.api.GetWindowRect(hwnd)
     w = right - left
     h = bottom - top
     return w, h
@@ -35,7 +33,7 @@ def verboose_sleep(sec):
 def hwnd_unsafe_op(post_delay, hwnd, require_focus=False, keep_state=False):
     # reminder: during sleep windows can be closed, moved, trayed, switched
 
-    if require_focus and win32gui.GetForegroundWindow() != hwnd:
+    if require_focus and backend.api.GetForegroundWindow() != hwnd:
         raise MissingWindowFocusException(f'Window inactive unexpectedly: {hwnd}')
 
     if is_window_closed(hwnd):
@@ -49,23 +47,23 @@ def hwnd_unsafe_op(post_delay, hwnd, require_focus=False, keep_state=False):
         if keep_state and state != get_window_state(hwnd):
             raise Exception(f'Window changed state while sleep: {hwnd}')
 
-        if require_focus and win32gui.GetForegroundWindow() != hwnd:
+        if require_focus and backend.api.GetForegroundWindow() != hwnd:
             raise MissingWindowFocusException(f'Window went inactive while sleep: {hwnd}')
 
 
 @contextmanager
 def switch_focus_window(hwnd, delay=0.1):
-    prev_hwnd = win32gui.GetForegroundWindow()
+    prev_hwnd = backend.api.GetForegroundWindow()
 
     if prev_hwnd != hwnd:
-        pyautogui.press("alt")
-        win32gui.SetForegroundWindow(hwnd)
+        backend.api.press_alt()
+        backend.api.SetForegroundWindow(hwnd)
         verboose_sleep(delay)
 
-    if win32gui.GetForegroundWindow() == hwnd:
+    if backend.api.GetForegroundWindow() == hwnd:
         yield
         if prev_hwnd != hwnd:
-            win32gui.SetForegroundWindow(prev_hwnd)
+            backend.api.SetForegroundWindow(prev_hwnd)
             verboose_sleep(delay)
     else:
         raise MissingWindowFocusException(f'Window activation failed: {hwnd}')
@@ -82,29 +80,29 @@ def safe_call(func, return_on_error):
 
 
 def get_window_state(hwnd) -> WindowState:
-    place = win32gui.GetWindowPlacement(hwnd)
+    place = backend.api.GetWindowPlacement(hwnd)
     state = WindowState(place[1])
     return state
 
 
 def get_title(hwnd):
-    return win32gui.GetWindowText(hwnd)
+    return backend.api.GetWindowText(hwnd)
 
 
 def set_title(hwnd, title):
     """ Be aware that Chrome userscript cannot read this though """
-    win32gui.SetWindowText(hwnd, title)
+    backend.api.SetWindowText(hwnd, title)
 
 
 def is_window_closed(hwnd):
-    return not win32gui.IsWindow(hwnd)
+    return not backend.api.IsWindow(hwnd)
 
 
 def is_any_window_maxed(module=None) -> bool:
     # hwnd = win32gui.GetForegroundWindow()
 
-    wnds = get_process_windows()
-    visible = filter_process_windows(wnds, module_exe=module)
-    maxed: bool = any([get_window_state(wnd.hwnd) == WindowState.MAX for wnd in visible])
+    # child windows are never maximized on their own, any() stops enumeration on first maxed
+    visible = iter_process_windows(WindowFilter(module_exe=module, visible=True), include_children=False)
+    maxed: bool = any(get_window_state(wnd.hwnd) == WindowState.MAX for wnd in visible)
 
     return maxed
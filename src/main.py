@@ -1,21 +1,27 @@
 import sys
 from pathlib import Path
+from typing import Set
 
 # Qt intellisense pip install PySide6-stubs
-from PySide6.QtCore import Qt, Signal, Slot, QtMsgType
-from PySide6.QtGui import QCloseEvent
+from PySide6.QtCore import Qt, Signal, Slot, QModelIndex
+from PySide6.QtGui import QCloseEvent, QKeySequence, QShortcut
 from PySide6.QtWidgets import QApplication, QAbstractSlider
 
 import helpers.os_helpers  # noqa: F401
-from lib.qt.qt import QListWidgetItemEx, QWindowUtils, q_info
-from lib.qt.qt_traced_thread import QSafeThreadedPrint
+from lib.qt.qt import QWindowUtils, q_info
+from lib.qt.qt_log_sink import QLogSink
+from lib.qt.qt_traced_thread import QSafeThreadedPrint, set_thread_trace, settrace
 from src.helpers.winapi.hotkey_events import virtual_code
-from src.helpers.winapi.processes import get_process_windows, filter_process_windows
+from src.helpers.winapi.snapshot import SnapshotDiff
+import src.message_trace as message_trace
 from src.messages import WinMsg, EnumArg
 from src.pick_windows_worker import PickWindowsWorker
+from src.refresh_windows_worker import WindowRefresher, RefreshRequest
 from src.send_messages_worker import SendMessagesWorker, SendData
 from src.ui.main_window import MainWindowFrame, CommandWidget
 
+LOG_PATH = Path(__file__).parents[1] / 'data' / 'logs' / 'winapi_test.log'
+
 
 class MainWindow(MainWindowFrame):
     close_event = Signal()
@@ -27,10 +33,26 @@ class MainWindow(MainWindowFrame):
         self.ui_cg = self.central_widget.command_group
         self.ui_wg = self.central_widget.window_group
 
-        QSafeThreadedPrint.install_safe_qt_message_handler(self.on_log)
+        # top-level windows with shown children, when children are enumerated on demand
+        self.expanded: Set[int] = set()
+
+        self.refresher = WindowRefresher(self)
+        self.refresher.progress.connect(self.on_refresh_progress)
+        self.refresher.refreshed.connect(self.on_windows_refreshed)
+        self.close_event.connect(self.refresher.stop)
+
+        self.log_sink = QLogSink(self.ui_cw.log_text, self, file_path=LOG_PATH)
+        self.close_event.connect(self.log_sink.close)
+        QSafeThreadedPrint.install_safe_qt_message_handler(self.log_sink)
 
-        self.ui_wg.window_listbox.itemSelectionChanged.connect(self.on_window_select)
+        if message_trace.start_recording_from_env():
+            q_info(f'Recording sent messages to {message_trace.recorder.path}')
+        self.close_event.connect(message_trace.stop_recording)
+
+        self.ui_wg.window_table.selectionModel().selectionChanged.connect(self.on_window_select)
+        self.ui_wg.window_table.doubleClicked.connect(self.on_window_double_click)
         self.ui_wg.refresh_windows_button.clicked.connect(self.on_refresh)
+        self.ui_wg.children_on_demand_check.toggled.connect(lambda _: self.update_hwnd_list(hightlight_new=False))
 
         def always_on_top():
             return [QWindowUtils.switch_window_flag(self, Qt.WindowStaysOnTopHint, True)]
@@ -50,6 +72,9 @@ class MainWindow(MainWindowFrame):
         self.ui_cg.send_messages_button.attach_worker(send_worker_factory, create_sync_contexts=always_on_top,
                                                       cb_before_worker=None)
 
+        self.trace_shortcut = QShortcut(QKeySequence("Ctrl+Shift+T"), self)
+        self.trace_shortcut.activated.connect(self.on_attach_trace)
+
         self.update_hwnd_list(hightlight_new=False)
 
     @Slot(object)
@@ -57,38 +82,60 @@ class MainWindow(MainWindowFrame):
         # this slot is useful to safely shedule any ui operation from different threads
         on_lambda()
 
-    @Slot(str)
-    def on_log(self, mode, context, msg):
-        if mode == QtMsgType.QtInfoMsg:
-            self.ui_cw.log_text.append(msg)
-
-        print(msg)
+    @Slot()
+    def on_attach_trace(self):
+        """ Debugger tracing is off by default, this attaches it to running and future threads """
+        set_thread_trace(True)
+        settrace()
+        workers = [self.refresher.worker, self.ui_wg.pick_windows_button.worker, self.ui_cg.send_messages_button.worker]
+        for worker in workers:
+            if worker:
+                worker.trace_requested.emit()
+        q_info('Debugger tracing attached to threads')
 
     def on_refresh(self):
         self.update_hwnd_list()
 
     def update_hwnd_list(self, hightlight_new=True, bold_if_visible=True):
-        wnds = filter_process_windows(get_process_windows(), remove_invisible=False)
-        prev_len = self.ui_wg.window_listbox.count()
-        prev_hwnds = {self.ui_wg.window_listbox.item(x).data(Qt.ItemDataRole.UserRole) for x in
-                      range(self.ui_wg.window_listbox.count())}
-
-        self.ui_wg.window_listbox.clear()
-        for info in wnds:
-            module = Path(info.module_path).name if info.module_path else "-"
-            desc = f"{module}  parent: {info.root_parent_hwnd}  pid: {info.pid}" \
-                   f"   hwnd: {info.hwnd}   visible: {info.visible}   title: {info.title}"
-            if info.root_parent_hwnd:
-                desc = '        ' + desc
-            item = QListWidgetItemEx(key=info.hwnd,
-                                     text=desc,
-                                     font_bold=bold_if_visible and info.visible,
-                                     font_red=hightlight_new and info.hwnd not in prev_hwnds)
-            self.ui_wg.window_listbox.addItem(item)
-        count_diff = len(wnds) - prev_len
-        q_info(f'List of windows updated, changed: {count_diff}.')
-
-    def on_window_select(self):
+        """ Windows are enumerated in background, result is applied in on_windows_refreshed """
+        if self.ui_wg.children_on_demand_check.isChecked():
+            self.refresher.refresh(include_children=False, children_of=self.expanded,
+                                   hightlight_new=hightlight_new, bold_if_visible=bold_if_visible)
+        else:
+            self.refresher.refresh(hightlight_new=hightlight_new, bold_if_visible=bold_if_visible)
+
+    @Slot(int)
+    def on_refresh_progress(self, count):
+        self.ui_wg.refresh_windows_button.setText(f'Refreshing... {count}')
+
+    @Slot(object, object, float)
+    def on_windows_refreshed(self, request: RefreshRequest, diff: SnapshotDiff, elapsed_sec):
+        """ Only difference with previous refresh is applied, so selection and scroll are kept """
+        if not self.refresher.is_running():
+            self.ui_wg.refresh_windows_button.setText('Refresh')
+
+        self.expanded.difference_update(wnd.hwnd for wnd in diff.removed)
+        model = self.ui_wg.window_table.window_model
+        model.bold_if_visible = request.bold_if_visible
+        model.apply_diff(diff, highlight_new=request.hightlight_new)
+        q_info(f'List of windows updated in {elapsed_sec * 1000:.0f} ms, {diff.summary()}, '
+               f'refresh requests coalesced: {self.refresher.coalesced}.')
+
+    @Slot(QModelIndex)
+    def on_window_double_click(self, index: QModelIndex):
+        if not self.ui_wg.children_on_demand_check.isChecked():
+            return
+        model = self.ui_wg.window_table.window_model
+        if model.wnds[index.row()].root_parent_hwnd:
+            return
+
+        # top-level windows are not enumerated again, children of newly expanded one are enumerated by worker
+        hwnd = model.hwnd_at(index.row())
+        self.expanded ^= {hwnd}
+        self.refresher.refresh(include_children=False, children_of=self.expanded, hightlight_new=False,
+                               reuse_top_level=True)
+
+    def on_window_select(self, selected, deselected):
         pass
 
     def on_guess_char(self, text):
@@ -98,15 +145,10 @@ class MainWindow(MainWindowFrame):
 
     @Slot(int)
     def on_pick_hwnd(self, hwnd) -> bool:
-        found = self.ui_wg.window_listbox.find_by_item_data(hwnd)
-        if len(found) > 2:
-            assert False
-        elif len(found) == 1:
-            self.ui_wg.window_listbox.setCurrentItem(found[0])
+        if self.ui_wg.window_table.select_hwnd(hwnd):
             return True
-        else:
-            q_info(f'Item not found, hwnd {hwnd}')
-            return False
+        q_info(f'Item not found, hwnd {hwnd}')
+        return False
 
     def on_pick_windows_start(self):
         self.update_hwnd_list()
@@ -130,8 +172,10 @@ class MainWindow(MainWindowFrame):
             enum_arg_value = cw.enum_param_dropdown.currentData() if cw.enum_param else None
             messages += [WinMsg(cw.cmd, str_arg, EnumArg([], enum_arg_value))]
 
-        hwnds = self.ui_wg.window_listbox.get_selected_data()
-        data = SendData(hwnds, messages)
+        hwnds = self.ui_wg.window_table.selected_hwnds()
+        sequence_path = self.ui_cg.sequence_dropdown.currentData()
+        data = SendData(hwnds, messages, self.ui_cg.delay_spin.value(),
+                        sequence_path=Path(sequence_path) if sequence_path else None)
         self.send_message_data.emit(data)
 
 
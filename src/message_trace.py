@@ -0,0 +1,294 @@
+import json
+import mmap
+import os
+import struct
+import threading
+from array import array
+from itertools import islice
+from pathlib import Path
+from typing import List, Dict, Optional, Iterator, Tuple
+
+try:
+    # optional, columns are zero-copy views of the file when available
+    import numpy as np
+except ImportError:
+    np = None
+
+"""
+ Binary trace of dispatched messages: fixed-size records appended to a memory-mapped file.
+ Each thread buffers FLUSH_RECORDS records and writes them as one block, header count is updated once per block.
+ So records are in time order only within a thread: blocks of different threads interleave in the file
+ and a thread which sends rarely writes its block late. TraceColumns.load() sorts them by timestamp,
+ iter_records() streams them in file order.
+ Header keeps record count and names of apis, so a trace is readable while it is still recorded
+ and after a crash up to the last written block.
+"""
+
+MAGIC = b'WMTRACE1'
+HEADER_SIZE = 4096
+# magic, record size, record count, length of api names json which follows
+HEADER = struct.Struct('<8sIQI')
+COUNT = struct.Struct('<Q')
+COUNT_OFFSET = 12
+# monotonic ns, hwnd, api id, msg, wparam, lparam, result, duration ns
+RECORD = struct.Struct('<qqIIqqqq')
+RECORD_FIELDS = ('timestamps_ns', 'hwnds', 'apis', 'msgs', 'wparams', 'lparams', 'results', 'durations_ns')
+RECORD_TYPECODES = ('q', 'q', 'I', 'I', 'q', 'q', 'q', 'q')
+# result of a call which raised
+ERROR_RESULT = -2 ** 63
+INT64_MASK = 2 ** 64 - 1
+
+GROW_RECORDS = 65536
+FLUSH_RECORDS = 1024
+# path of trace file, recording starts with the app when set
+ENV_TRACE = 'WINAPI_TRACE'
+
+
+# api name: id, shared by all recorders, so compiled steps resolve their id once
+api_names: List[str] = []
+api_ids: Dict[str, int] = {}
+api_lock = threading.Lock()
+
+
+def api_id(api: str) -> int:
+    known = api_ids.get(api)
+    if known is not None:
+        return known
+    with api_lock:
+        if api not in api_ids:
+            api_ids[api] = len(api_names)
+            api_names.append(api)
+        return api_ids[api]
+
+
+def to_int64(value) -> int:
+    """ WinApi results and params may be None, bool or unsigned, records keep signed 64 bits """
+    if value is None:
+        return 0
+    value = int(value) & INT64_MASK
+    return value - 2 ** 64 if value >= 2 ** 63 else value
+
+
+def pack_records(records: List[tuple]) -> bytes:
+    pack = RECORD.pack
+    try:
+        return b''.join([pack(*values) for values in records])
+    except (struct.error, TypeError):
+        return b''.join([pack(timestamp_ns, to_int64(hwnd), api, to_int64(msg) & 0xFFFFFFFF, to_int64(wparam),
+                              to_int64(lparam), to_int64(result), duration_ns)
+                         for timestamp_ns, hwnd, api, msg, wparam, lparam, result, duration_ns in records])
+
+
+class TraceRecorder:
+    """
+    Append-only recorder, safe to share between UI and worker threads.
+    record() only appends to a buffer of the calling thread, full buffers are packed without lock
+    and copied to the file under lock. Buffers of all threads are written on close,
+    records appended by other threads while close() runs may be lost.
+    File grows by GROW_RECORDS at a time and is truncated to the written records on close.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        # buffers of all threads, for close()
+        self.buffers: List[List[tuple]] = []
+        self.names_written = 0
+        self.count = 0
+        self.capacity = 0
+
+        self.file = open(path, 'w+b')
+        self.mm: Optional[mmap.mmap] = None
+        self.grow()
+        self.write_header()
+
+    def grow(self):
+        if self.mm:
+            self.mm.close()
+        self.capacity += GROW_RECORDS
+        self.file.truncate(HEADER_SIZE + self.capacity * RECORD.size)
+        self.mm = mmap.mmap(self.file.fileno(), 0)
+
+    def write_header(self):
+        """ Must be called under lock """
+        self.names_written = len(api_names)
+        names = json.dumps(api_names[:self.names_written]).encode('utf-8')
+        if HEADER.size + len(names) > HEADER_SIZE:
+            raise ValueError(f'Too many api names for trace header: {self.names_written}')
+        HEADER.pack_into(self.mm, 0, MAGIC, RECORD.size, self.count, len(names))
+        self.mm[HEADER.size:HEADER.size + len(names)] = names
+
+    def thread_buffer(self) -> List[tuple]:
+        buffer = self.local.buffer = []
+        with self.lock:
+            self.buffers += [buffer]
+        return buffer
+
+    def record(self, timestamp_ns, hwnd, api: int, msg, wparam, lparam, result, duration_ns):
+        """ api: id from api_id() """
+        try:
+            buffer = self.local.buffer
+        except AttributeError:
+            buffer = self.thread_buffer()
+        buffer.append((timestamp_ns, hwnd, api, msg, wparam, lparam, result, duration_ns))
+        if len(buffer) >= FLUSH_RECORDS:
+            self.flush(buffer)
+
+    def flush(self, buffer: List[tuple]):
+        data = pack_records(buffer)
+        count = len(buffer)
+        buffer.clear()
+        with self.lock:
+            self.write_locked(data, count)
+
+    def write_locked(self, data: bytes, count):
+        if self.mm is None:
+            return
+        while self.count + count > self.capacity:
+            self.grow()
+        offset = HEADER_SIZE + self.count * RECORD.size
+        self.mm[offset:offset + len(data)] = data
+        self.count += count
+        # count goes last, so a reader never sees a partially written record
+        if self.names_written != len(api_names):
+            self.write_header()
+        else:
+            COUNT.pack_into(self.mm, COUNT_OFFSET, self.count)
+
+    def close(self):
+        with self.lock:
+            if self.mm is None:
+                return
+            for buffer in self.buffers:
+                records, buffer[:] = list(buffer), []
+                self.write_locked(pack_records(records), len(records))
+            self.buffers = []
+            self.mm.flush()
+            self.mm.close()
+            self.mm = None
+            self.file.truncate(HEADER_SIZE + self.count * RECORD.size)
+            self.file.close()
+
+
+# dispatch checks only this, so there is no cost when not recording
+recorder: Optional[TraceRecorder] = None
+
+
+def start_recording(path: Path) -> TraceRecorder:
+    global recorder
+    stop_recording()
+    recorder = TraceRecorder(path)
+    return recorder
+
+
+def start_recording_from_env() -> Optional[TraceRecorder]:
+    path = os.environ.get(ENV_TRACE)
+    return start_recording(Path(path)) if path else None
+
+
+def stop_recording():
+    """ Buffered records are written and header count is final """
+    global recorder
+    stopped, recorder = recorder, None
+    if stopped:
+        stopped.close()
+
+
+def is_trace(path: Path) -> bool:
+    """ By magic, not by file name """
+    try:
+        with open(path, 'rb') as file:
+            return file.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def read_header(mm) -> Tuple[int, List[str]]:
+    """ Record count and api names """
+    magic, record_size, count, names_len = HEADER.unpack_from(mm, 0)
+    if magic != MAGIC or record_size != RECORD.size:
+        raise ValueError('Not a message trace or unsupported version')
+    api_names = json.loads(bytes(mm[HEADER.size:HEADER.size + names_len]).decode('utf-8'))
+    return count, api_names
+
+
+class TraceColumns:
+    """
+    All records of a trace as one array per field, as in WindowColumns.
+    With NumPy, columns are views of one structured array read at once,
+    otherwise typed arrays filled record by record.
+    """
+
+    def __init__(self, api_names: List[str], columns: Dict[str, 'array']):
+        self.api_names = api_names
+        self.timestamps_ns = columns['timestamps_ns']
+        self.hwnds = columns['hwnds']
+        self.apis = columns['apis']
+        self.msgs = columns['msgs']
+        self.wparams = columns['wparams']
+        self.lparams = columns['lparams']
+        self.results = columns['results']
+        self.durations_ns = columns['durations_ns']
+
+    @classmethod
+    def load(cls, path: Path) -> 'TraceColumns':
+        with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            count, api_names = read_header(mm)
+            data = mm[HEADER_SIZE:HEADER_SIZE + count * RECORD.size]
+
+        if np is not None:
+            dtype = np.dtype([(name, '<' + code.replace('q', 'i8').replace('I', 'u4'))
+                              for name, code in zip(RECORD_FIELDS, RECORD_TYPECODES)])
+            records = np.frombuffer(data, dtype=dtype, count=count)
+            return cls(api_names, {name: records[name] for name in RECORD_FIELDS}).in_time_order()
+
+        columns = {name: array(code) for name, code in zip(RECORD_FIELDS, RECORD_TYPECODES)}
+        appends = [columns[name].append for name in RECORD_FIELDS]
+        for values in RECORD.iter_unpack(data):
+            for append, value in zip(appends, values):
+                append(value)
+        return cls(api_names, columns).in_time_order()
+
+    def in_time_order(self) -> 'TraceColumns':
+        """ Self if records are in order, as for a trace of one thread, otherwise columns stably sorted by timestamp """
+        timestamps = self.timestamps_ns
+        if np is not None:
+            if (timestamps[1:] >= timestamps[:-1]).all():
+                return self
+            order = np.argsort(timestamps, kind='stable')
+            return TraceColumns(self.api_names, {name: getattr(self, name)[order] for name in RECORD_FIELDS})
+
+        if all(prev <= ts for prev, ts in zip(timestamps, islice(timestamps, 1, None))):
+            return self
+        order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+        return TraceColumns(self.api_names, {name: array(code, [getattr(self, name)[i] for i in order])
+                                             for name, code in zip(RECORD_FIELDS, RECORD_TYPECODES)})
+
+    def __len__(self):
+        return len(self.timestamps_ns)
+
+    def api_name(self, row) -> str:
+        return self.api_names[self.apis[row]]
+
+    def summary(self) -> str:
+        if not len(self):
+            return 'empty trace'
+        span_sec = (self.timestamps_ns[-1] - self.timestamps_ns[0]) / 1e9
+        if np is not None:
+            errors = int((self.results == ERROR_RESULT).sum())
+        else:
+            errors = sum(1 for result in self.results if result == ERROR_RESULT)
+        return f'{len(self)} records over {span_sec:.3f}s, apis: {", ".join(self.api_names)}, errors: {errors}'
+
+
+def iter_records(path: Path, chunk_records=4096) -> Iterator[Tuple[str, tuple]]:
+    """ (api name, record fields) streamed in chunks, without loading the whole trace, in file order """
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        count, api_names = read_header(mm)
+        for start in range(0, count, chunk_records):
+            end = min(count, start + chunk_records)
+            chunk = mm[HEADER_SIZE + start * RECORD.size:HEADER_SIZE + end * RECORD.size]
+            for values in RECORD.iter_unpack(chunk):
+                yield api_names[values[2]], values
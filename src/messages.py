@@ -1,25 +1,42 @@
-from dataclasses import dataclass
-from typing import List, Tuple, Callable
-
-import win32con
-from win32api import SendMessage, PostMessage, keybd_event
-from win32gui import GetWindowRect, GetCursorPos
+import time
+from dataclasses import dataclass, field
+from typing import List, Tuple, Callable, Optional
 
+import src.helpers.winapi.backend as backend
+import src.helpers.winapi.consts as win32con
 import src.helpers.winapi.mouse_events as mouse_events
-from src.helpers.python_extensions import get_named_consts
+import src.message_trace as message_trace
+from src.helpers.command_registry import register_command, get_command_handler, CommandHandler
+from src.helpers.winapi.const_tables import named_consts
 from src.helpers.winapi.hotkey_events import virtual_code
+from src.helpers.winapi.keyboard import vk_names, keyboard_tables, KeyboardTable
+from src.helpers.winapi.send_input import InputBatch
 
 common_vks = [win32con.VK_LSHIFT, win32con.VK_LCONTROL, win32con.VK_LMENU, win32con.VK_RETURN, win32con.VK_TAB]
-vk_args = get_named_consts(win32con, 'VK_*', int, common_vks)
+vk_args = named_consts('VK', common_vks)
 
 common_wms = [win32con.WM_KEYDOWN, win32con.WM_CHAR, win32con.WM_KEYUP]
-wm_args = get_named_consts(win32con, 'WM_*', int, common_wms, exclude=['WM_KEYFIRST'])
+wm_args = named_consts('WM', common_wms)
 
 KEYEVENTF_KEYDOWN = 0
-common_keyevents = get_named_consts(win32con, 'KEYEVENTF_*', int, [win32con.KEYEVENTF_KEYUP])
+common_keyevents = named_consts('KEYEVENTF', [win32con.KEYEVENTF_KEYUP])
 keyevent_args = [('KEYEVENTF_KEYDOWN', KEYEVENTF_KEYDOWN)] + common_keyevents
 
 
+# commands are module functions, not backend methods:
+# their identity and __name__ must not change when backend is switched
+def SendMessage(hwnd, msg, wparam, lparam):
+    return backend.api.SendMessage(hwnd, msg, wparam, lparam)
+
+
+def PostMessage(hwnd, msg, wparam, lparam):
+    return backend.api.PostMessage(hwnd, msg, wparam, lparam)
+
+
+def keybd_event(vk, scan, flags, extra_info):
+    return backend.api.keybd_event(vk, scan, flags, extra_info)
+
+
 @dataclass(init=True)
 class EnumArg:
     named_values: List[Tuple[str, int]]
@@ -35,10 +52,14 @@ class WinMsg:
                 self.str_arg1 = arg
             if type(arg) is EnumArg:
                 self.enum_arg1 = arg
+            if type(arg) is float:
+                self.delay_sec = arg
 
     cmd: Callable
     enum_arg1: EnumArg = None
     str_arg1: str = None
+    # delay after message, default of send is used if None
+    delay_sec: float = None
 
 
 message_presets: List[WinMsg] = [
@@ -68,10 +89,14 @@ def is_hex(s):
         return False
 
 
-def key_code(key: str):
+def key_code(key: str, table: Optional[KeyboardTable] = None):
+    """ table: layout of chars, current one if None """
     if len(key) == 1:
         # 'a', '1'
-        return virtual_code(key)
+        code = virtual_code(key, table=table)
+        if code is None:
+            raise RuntimeWarning(f"Char is not on keyboard layout: {key}")
+        return code
     elif key.isnumeric():
         # '143'
         return int(key)
@@ -79,33 +104,131 @@ def key_code(key: str):
         return int(key, 16)
     else:
         # 'VK_TAB'
-        found_key = [arg for arg in vk_args if arg[0] == key]
-        if len(found_key) == 0:
+        code = vk_names.get(key)
+        if code is None:
             raise RuntimeWarning(f"Code not found: {key}")
-        return found_key[0][1]
+        return code
 
 
-def run_test_message(hwnd, win_msg: WinMsg):
-    # cmd also can have any custom user function like mouse_events.send_click
+@register_command(SendMessage)
+def run_send_message(hwnd, key, enum_value):
+    return SendMessage(hwnd, enum_value, key, 0)
 
-    key = key_code(win_msg.str_arg1) if win_msg.str_arg1 else None
-    enum_arg_value = win_msg.enum_arg1.value if win_msg.enum_arg1 else None
 
-    if win_msg.cmd == mouse_events.send_click:
-        l, t, r, b = GetWindowRect(hwnd)
-        cx, cy = GetCursorPos()
-        # relative to window corner if top-level hwnd
-        rx, ry = cx - l, cy - t
-        mouse_events.send_click(hwnd, rx, ry)
+@register_command(PostMessage, background=True)
+def run_post_message(hwnd, key, enum_value):
+    return PostMessage(hwnd, enum_value, key, 0)
 
-    elif win_msg.cmd == SendMessage:
-        SendMessage(hwnd, enum_arg_value, key, 0)
 
-    elif win_msg.cmd == PostMessage:
-        PostMessage(hwnd, enum_arg_value, key, 0)
+@register_command(keybd_event)
+def run_keybd_event(hwnd, key, enum_value):
+    return keybd_event(key, 0, enum_value, 0)
 
-    elif win_msg.cmd == keybd_event:
-        keybd_event(key, 0, enum_arg_value, 0)
 
-    else:
-        raise NotImplementedError
+@dataclass(init=True, frozen=True)
+class PlanStep:
+    handler: CommandHandler
+    key: Optional[int]
+    enum_value: Optional[int]
+    # source message, for logs
+    msg: WinMsg
+    delay_sec: float = 0.0
+    # all source messages if steps were merged by batch_input_steps
+    batched: Tuple[WinMsg, ...] = ()
+    # id of command name in traces, resolved once per step instead of once per recorded call
+    trace_api: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, 'trace_api', message_trace.api_id(step_api(self)))
+
+    def describe(self) -> str:
+        if self.batched:
+            return f'SendInput of {len(self.batched)}: ' + ', '.join(str(msg) for msg in self.batched)
+        return str(self.msg)
+
+
+class InputBatchHandler:
+    """ Handler of keybd_event steps merged by batch_input_steps """
+
+    def __init__(self, key_events: List[Tuple[int, int]]):
+        self.key_events = key_events
+
+    def __call__(self, hwnd, key, enum_value):
+        return InputBatch().key_events(self.key_events).send()
+
+
+def batch_input_steps(plan: Tuple[PlanStep, ...]) -> Tuple[PlanStep, ...]:
+    """ Consecutive keybd_event steps with no delay between them become one SendInput step """
+    batched = []
+    i = 0
+    while i < len(plan):
+        end = i
+        while plan[end].handler is run_keybd_event and end + 1 < len(plan) \
+                and plan[end + 1].handler is run_keybd_event and plan[end].delay_sec == 0:
+            end += 1
+        if end == i:
+            batched += [plan[i]]
+        else:
+            steps = plan[i:end + 1]
+            handler = InputBatchHandler([(step.key, step.enum_value) for step in steps])
+            batched += [PlanStep(handler, None, None, steps[0].msg, steps[-1].delay_sec,
+                                 tuple(step.msg for step in steps))]
+        i = end + 1
+    return tuple(batched)
+
+
+def compile_step(win_msg: WinMsg, default_delay_sec=0.0, table: Optional[KeyboardTable] = None) -> PlanStep:
+    key = key_code(win_msg.str_arg1, table) if win_msg.str_arg1 else None
+    enum_value = win_msg.enum_arg1.value if win_msg.enum_arg1 else None
+    delay_sec = win_msg.delay_sec if win_msg.delay_sec is not None else default_delay_sec
+    return PlanStep(get_command_handler(win_msg.cmd), key, enum_value, win_msg, delay_sec)
+
+
+def compile_messages(messages: List[WinMsg], default_delay_sec=0.0, batch_input=True) -> Tuple[PlanStep, ...]:
+    """
+    Resolves keys and handlers once per send instead of once per hwnd and message.
+    Unknown key raises RuntimeWarning, unknown command NotImplementedError, before anything is sent.
+    default_delay_sec: delay after messages which have no own delay_sec
+    batch_input: merge keybd_event steps without delay into one SendInput
+    """
+    # layout is resolved once, not per char
+    table = keyboard_tables.current()
+    plan = tuple(compile_step(msg, default_delay_sec, table) for msg in messages)
+    return batch_input_steps(plan) if batch_input else plan
+
+
+def step_api(step: PlanStep) -> str:
+    return getattr(step.msg.cmd, '__name__', str(step.msg.cmd))
+
+
+def run_traced_step(recorder: message_trace.TraceRecorder, hwnd, step: PlanStep):
+    start_ns = time.perf_counter_ns()
+    result = message_trace.ERROR_RESULT
+    try:
+        result = step.handler(hwnd, step.key, step.enum_value)
+        return result
+    finally:
+        duration_ns = time.perf_counter_ns() - start_ns
+        # None of PostMessage and of unused args is kept as 0
+        result = result or 0
+        if step.batched:
+            # one record per merged key event, so trace can be replayed without the plan
+            for vk, flags in step.handler.key_events:
+                recorder.record(start_ns, hwnd, step.trace_api, flags, vk, 0, result, duration_ns)
+                duration_ns = 0
+        else:
+            recorder.record(start_ns, hwnd, step.trace_api, step.enum_value or 0, step.key or 0, 0, result,
+                            duration_ns)
+
+
+def run_plan_step(hwnd, step: PlanStep):
+    recorder = message_trace.recorder
+    if recorder is None:
+        return step.handler(hwnd, step.key, step.enum_value)
+    return run_traced_step(recorder, hwnd, step)
+
+
+def run_test_message(hwnd, win_msg: WinMsg):
+    """ Single message, prefer compile_messages() when the same messages are sent repeatedly """
+    # cmd also can have any custom user function like mouse_events.send_click, see register_command
+    return run_plan_step(hwnd, compile_step(win_msg))
@@ -1,12 +1,13 @@
-import win32gui
-from PySide6.QtCore import Signal, Slot
+from typing import Optional, Tuple
+
+from PySide6.QtCore import Signal, Slot, QTimer, Qt
 
 from lib.qt.qt import q_info
-from src.helpers.python_extensions import ChangeTracker
-from lib.qt.qt_n_timer import QNTimer
 from lib.qt.qt_async_button import QWorker
 from src.helpers.virtual_methods import override
-from src.helpers.winapi.other import get_window_info_under_cursor
+from src.helpers.winapi.cursor_tracker import CursorTracker
+from src.helpers.winapi.window_events import WindowEventSource, WindowEvent, start_event_source, \
+    FOREGROUND_CHANGED, CURSOR_MOVED, NAME_CHANGED
 
 
 class PickWindowsWorker(QWorker):
@@ -16,34 +17,46 @@ class PickWindowsWorker(QWorker):
 
     pick_hwnd = Signal(int)
 
+    PICK_TIMEOUT_MSEC = 10000
+
     def __init__(self):
         super(PickWindowsWorker, self).__init__()
-        self.cursor_wnd_tracker = None
-        self.focused_wnd_tracker = None
+        self.events: Optional[WindowEventSource] = None
+        self.hovered: Optional[Tuple[int, str]] = None
+        self.cursor: Optional[CursorTracker] = None
 
-        self.check_timer = QNTimer(self)
-        self.check_timer.timeout_n.connect(self.on_check_timer)
-        self.check_timer.finished.connect(self.finished)
+        self.timeout_timer = QTimer(self)
+        self.timeout_timer.setSingleShot(True)
+        self.timeout_timer.timeout.connect(self.finished)
 
-    def check_window_under_cursor(self) -> bool:
-        changed, (hwnd, title) = self.cursor_wnd_tracker.track()
+        # only used if WinEvent hooks are not available
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setSingleShot(True)
+        self.poll_timer.setTimerType(Qt.PreciseTimer)
+        self.poll_timer.timeout.connect(self.on_poll_timer)
 
-        if changed:
-            q_info(f'Hwnd: {hwnd}, title: {title}')
+    def on_window_event(self, event: WindowEvent):
+        if not self.events or not self.cursor:
+            return
 
-        changed_focus, _ = self.focused_wnd_tracker.track()
-        if changed_focus:
+        if event.kind == FOREGROUND_CHANGED:
+            # focus change is the pick, window under cursor is the picked one
+            hwnd, _ = self.cursor.sample()
             self.pick_hwnd.emit(hwnd)
-            return False
-        return True
+            self.finished.emit()
+        elif event.kind == CURSOR_MOVED or (event.kind == NAME_CHANGED and event.hwnd == self.hovered[0]):
+            hovered = self.cursor.sample()
+            if hovered != self.hovered:
+                self.hovered = hovered
+                q_info(f'Hwnd: {hovered[0]}, title: {hovered[1]}')
 
-    def on_check_timer(self, n):
-        # it was also possible to skip QTimer and threads
-        # but event based approach makes a proper experimental sandbox for future tests
-        with self.check_timer.qntimer_timeout_guard() as loop:
-            if not self.check_window_under_cursor():
-                self.finished.emit()
-                loop.break_loop()
+    @Slot()
+    def on_poll_timer(self):
+        if not self.events:
+            return
+        interval_sec = self.events.poll()
+        if interval_sec is not None and self.events:
+            self.poll_timer.start(int(interval_sec * 1000))
 
     @Slot()
     @override
@@ -52,12 +65,22 @@ class PickWindowsWorker(QWorker):
                "Move cursor around next 10s and check log.\n"
                "Change focus (click) to select hwnd in the list.\n")
 
-        self.cursor_wnd_tracker = ChangeTracker(get_window_info_under_cursor)
-        self.focused_wnd_tracker = ChangeTracker(win32gui.GetForegroundWindow)
-
-        self.check_timer.start(loop_n=100, interval_msec=100)
+        # hooks are set in worker thread, which pumps messages by its Qt event loop
+        self.events = start_event_source()
+        self.cursor = CursorTracker()
+        self.cursor.attach(self.events)
+        self.events.subscribe(self.on_window_event)
+        self.hovered = self.cursor.sample()
+        self.timeout_timer.start(self.PICK_TIMEOUT_MSEC)
+        self.on_poll_timer()
 
     @Slot()
     @override
     def on_finished(self):
+        self.timeout_timer.stop()
+        self.poll_timer.stop()
+        if self.events:
+            self.events.stop()
+            self.events = None
+        self.cursor = None
         q_info('Pick over')
@@ -0,0 +1,174 @@
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Set
+
+from PySide6.QtCore import QObject, Signal, Slot, Qt, qDebug
+
+from lib.qt.qt_traced_thread import QTracedThread, QWorker
+from src.helpers.virtual_methods import override
+from src.helpers.winapi.hierarchy import WindowHierarchy
+from src.helpers.winapi.processes import WindowInfo, sort_windows
+from src.helpers.winapi.snapshot import WindowSnapshot, SnapshotDiff
+from src.helpers.winapi.window_stream import iter_process_windows
+
+
+@dataclass(init=True)
+class RefreshRequest:
+    request_id: int
+    include_children: bool
+    # top-level windows to enumerate children of, when include_children is False
+    children_of: Set[int] = field(default_factory=set)
+    # only expanded roots changed: top-level windows of the last refresh are kept, new children are enumerated
+    reuse_top_level: bool = False
+
+    # not used by worker, passed back to UI with result
+    hightlight_new: bool = True
+    bold_if_visible: bool = True
+
+
+class RefreshWindowsWorker(QWorker):
+    """
+    Lives in own thread for the whole app lifetime and waits for queued requests.
+    Enumeration, OpenProcess calls, sort and diff never run on UI thread:
+    the worker keeps the last snapshot and sends only its difference, the UI applies it as is.
+    """
+    # progress is reported at most once per frame at 60 fps
+    PROGRESS_INTERVAL_SEC = 1 / 60
+
+    # request id, windows enumerated so far
+    progress = Signal(int, int)
+    # request id, SnapshotDiff from the previous refresh, elapsed seconds
+    refresh_done = Signal(int, object, float)
+
+    def __init__(self):
+        super(RefreshWindowsWorker, self).__init__()
+        # set from UI thread, checked between windows
+        self.stop_requested = False
+        # state of the UI list, only touched in worker thread
+        self.snapshot: Optional[WindowSnapshot] = None
+        self.hierarchy = WindowHierarchy()
+
+    @Slot()
+    @override
+    def on_run(self):
+        qDebug('RefreshWindowsWorker waits for requests')
+
+    def enumerate(self, request: RefreshRequest) -> Optional[List[WindowInfo]]:
+        """ None if stopped """
+        wnds: List[WindowInfo] = []
+        progress_time = time.perf_counter()
+        for info in iter_process_windows(include_children=request.include_children,
+                                         children_of=request.children_of):
+            if self.stop_requested:
+                return None
+            wnds += [info]
+            now = time.perf_counter()
+            if now - progress_time >= self.PROGRESS_INTERVAL_SEC:
+                self.progress.emit(request.request_id, len(wnds))
+                progress_time = now
+        return wnds
+
+    @Slot(object)
+    def on_refresh_request(self, request: RefreshRequest):
+        started = time.perf_counter()
+
+        if request.include_children:
+            wnds = self.enumerate(request)
+            if wnds is None:
+                return
+            sort_windows(wnds)
+            self.hierarchy = WindowHierarchy()
+        else:
+            if request.reuse_top_level and self.hierarchy.top_level:
+                self.hierarchy.expanded = request.children_of & self.hierarchy.top_level_hwnds
+            else:
+                wnds = self.enumerate(request)
+                if wnds is None:
+                    return
+                self.hierarchy.expanded = set(request.children_of)
+                self.hierarchy.assign(wnds, request.children_of)
+            # children of roots expanded since the last enumeration are enumerated here
+            wnds = self.hierarchy.flat()
+
+        snapshot = WindowSnapshot(wnds)
+        diff: SnapshotDiff = snapshot.diff(self.snapshot)
+        self.snapshot = snapshot
+        self.refresh_done.emit(request.request_id, diff, time.perf_counter() - started)
+
+
+class WindowRefresher(QObject):
+    """
+    UI thread side of RefreshWindowsWorker.
+    Requests are coalesced: while a refresh runs, new requests only replace the pending one,
+    which starts when the running one is done. So any number of clicks costs at most one extra pass.
+    Every received diff must be applied, since the worker diffs the next refresh against it.
+    """
+    request_refresh = Signal(object)
+    # windows enumerated so far by running refresh
+    progress = Signal(int)
+    # RefreshRequest, SnapshotDiff, elapsed seconds
+    refreshed = Signal(object, object, float)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.next_request_id = 1
+        self.running: Optional[RefreshRequest] = None
+        self.pending: Optional[RefreshRequest] = None
+        self.coalesced = 0
+
+        self.thread = QTracedThread(self)
+        self.worker = RefreshWindowsWorker()
+        self.worker.moveToThread(self.thread)
+
+        self.thread.started_fix.connect(self.worker.run, Qt.ConnectionType.QueuedConnection)
+        self.thread.finished.connect(self.worker.deleteLater)
+        # worker lives in other thread, so all of these are queued
+        self.request_refresh.connect(self.worker.on_refresh_request)
+        self.worker.progress.connect(self.on_progress)
+        self.worker.refresh_done.connect(self.on_done)
+
+        self.thread.start()
+
+    def is_running(self) -> bool:
+        return self.running is not None
+
+    def refresh(self, include_children=True, children_of: Set[int] = None, hightlight_new=True, bold_if_visible=True,
+                reuse_top_level=False):
+        request = RefreshRequest(self.next_request_id, include_children, set(children_of or ()), reuse_top_level,
+                                 hightlight_new, bold_if_visible)
+        self.next_request_id += 1
+
+        if self.running:
+            if self.pending:
+                self.coalesced += 1
+                # replaced full refresh is not lost
+                request.reuse_top_level = request.reuse_top_level and self.pending.reuse_top_level
+            self.pending = request
+            return
+        self.start(request)
+
+    def start(self, request: RefreshRequest):
+        self.running = request
+        self.request_refresh.emit(request)
+
+    @Slot(int, int)
+    def on_progress(self, request_id, count):
+        if self.running and self.running.request_id == request_id:
+            self.progress.emit(count)
+
+    @Slot(int, object, float)
+    def on_done(self, request_id, diff: SnapshotDiff, elapsed_sec):
+        if not self.running or self.running.request_id != request_id:
+            return
+        request, self.running = self.running, None
+        self.refreshed.emit(request, diff, elapsed_sec)
+
+        if self.pending:
+            pending, self.pending = self.pending, None
+            self.start(pending)
+
+    @Slot()
+    def stop(self):
+        self.pending = None
+        self.worker.stop_requested = True
+        QTracedThread.quit_or_terminate_qthread(self.thread)
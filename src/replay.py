@@ -0,0 +1,143 @@
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Dict, List, Optional
+
+from src.helpers.command_registry import get_command_handler_by_name, CommandHandler
+from src.message_trace import iter_records
+from src.messages import step_api
+from src.send_schedule import wait_until
+from src.sequence_file import MessageSequence
+
+"""
+ Replays a stream of recorded messages to chosen hwnds, keeping recorded intervals scaled by speed.
+ Events come from a message trace or from a sequence file at its planned times,
+ they are consumed one by one, so traces of any length replay in constant memory.
+ python -m src.run_headless --replay --speed 2 session.trace --hwnd 0x10010
+"""
+
+# lag above which an event counts as late in stats
+LATE_SEC = 0.001
+
+
+class ReplayEvent(NamedTuple):
+    timestamp_ns: int
+    hwnd: int
+    api: str
+    # message or flags, passed to handler as enum value
+    msg: int
+    # resolved key, passed to handler as key
+    wparam: int
+    # for analysis only, not replayed: handlers build lparam themselves as when the trace was recorded
+    lparam: int
+
+
+def trace_events(path: Path) -> Iterator[ReplayEvent]:
+    """ In file order, which is time order for traces of one sending thread, as the send worker records """
+    for api, (timestamp_ns, hwnd, _, msg, wparam, lparam, _, _) in iter_records(path):
+        yield ReplayEvent(timestamp_ns, hwnd, api, msg, wparam, lparam)
+
+
+def sequence_events(sequence: MessageSequence, hwnd=0) -> Iterator[ReplayEvent]:
+    """
+    Steps of all repeats at planned times, each step is followed by its delay.
+    Key events are not batched, as in traces. hwnd: 0 to be retargeted
+    """
+    timestamp_ns = 0
+    for step in sequence.plan(batch_input=False):
+        yield ReplayEvent(timestamp_ns, hwnd, step_api(step), step.enum_value or 0, step.key or 0, 0)
+        timestamp_ns += round(step.delay_sec * 1e9)
+
+
+def retarget(events: Iterable[ReplayEvent], hwnd_map: Dict[int, List[int]],
+             default_hwnds: Optional[List[int]] = None) -> Iterator[ReplayEvent]:
+    """
+    Each event of a recorded hwnd is repeated for every hwnd mapped to it, at the same time.
+    Recorded hwnds which are not mapped go to default_hwnds, or are kept if it is None.
+    """
+    for event in events:
+        hwnds = hwnd_map.get(event.hwnd, default_hwnds)
+        if hwnds is None:
+            yield event
+            continue
+        for hwnd in hwnds:
+            yield event._replace(hwnd=hwnd)
+
+
+@dataclass(init=True)
+class ReplayStats:
+    events: int = 0
+    errors: int = 0
+    late: int = 0
+    lag_sum_sec: float = 0.0
+    max_lag_sec: float = 0.0
+    recorded_sec: float = 0.0
+    elapsed_sec: float = 0.0
+
+    def add_lag(self, lag_sec):
+        self.lag_sum_sec += lag_sec
+        self.max_lag_sec = max(self.max_lag_sec, lag_sec)
+        if lag_sec > LATE_SEC:
+            self.late += 1
+
+    def achieved_speed(self) -> float:
+        return self.recorded_sec / self.elapsed_sec if self.elapsed_sec > 0 else 0.0
+
+    def summary(self) -> str:
+        mean_lag_ms = self.lag_sum_sec / self.events * 1000 if self.events else 0.0
+        return (f'Replayed {self.events} events ({self.errors} failed) of {self.recorded_sec:.3f}s recording '
+                f'in {self.elapsed_sec:.3f}s, x{self.achieved_speed():.1f}, '
+                f'lag mean {mean_lag_ms:.3f}ms max {self.max_lag_sec * 1000:.3f}ms, late {self.late}')
+
+
+class Replayer:
+    """
+    Blocking replay, meant for a worker thread or headless runner, stop() is safe from other threads.
+    speed: 1.0 keeps recorded timing, 10.0 is ten times faster, None sends as fast as possible
+    """
+
+    def __init__(self, speed: Optional[float] = 1.0):
+        self.speed = speed
+        self.stop_event = threading.Event()
+        self.handlers: Dict[str, CommandHandler] = {}
+
+    def stop(self):
+        self.stop_event.set()
+
+    def handler(self, api: str) -> CommandHandler:
+        handler = self.handlers.get(api)
+        if handler is None:
+            handler = self.handlers[api] = get_command_handler_by_name(api)
+        return handler
+
+    def run(self, events: Iterable[ReplayEvent]) -> ReplayStats:
+        stats = ReplayStats()
+        first_ns = None
+        start = time.perf_counter()
+        for event in events:
+            if self.stop_event.is_set():
+                break
+            if first_ns is None:
+                first_ns = event.timestamp_ns
+            recorded_sec = (event.timestamp_ns - first_ns) / 1e9
+            stats.recorded_sec = recorded_sec
+
+            if self.speed:
+                deadline = start + recorded_sec / self.speed
+                wait_until(deadline, self.stop_event)
+                if self.stop_event.is_set():
+                    break
+                stats.add_lag(max(0.0, time.perf_counter() - deadline))
+
+            try:
+                # handlers take resolved key as wparam and message or flags as enum value, as they were recorded
+                self.handler(event.api)(event.hwnd, event.wparam, event.msg)
+            except NotImplementedError:
+                raise
+            except:
+                stats.errors += 1
+            stats.events += 1
+
+        stats.elapsed_sec = time.perf_counter() - start
+        return stats
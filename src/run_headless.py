@@ -0,0 +1,157 @@
+import argparse
+import json
+import sys
+import time
+from dataclasses import replace
+from pathlib import Path
+from typing import List, Dict, Any, Tuple
+
+import src.helpers.winapi.backend as backend
+import src.message_trace as message_trace
+from src.helpers.winapi.processes import get_process_windows
+from src.helpers.winapi.registry import WindowRegistry
+from src.messages import run_plan_step
+from src.replay import Replayer, ReplayStats, trace_events, sequence_events, retarget
+from src.send_schedule import is_background_plan, fan_out_schedule, sequential_schedule, run_schedule
+from src.sequence_file import load_sequence, SequenceError, TargetSelector
+
+"""
+ Runs a sequence file without Qt and prints a JSON summary, for scripts and schedulers:
+ python -m src.run_headless data/sequences/example_keys.json --title Untitled --all
+ or replays a message trace, or a sequence file at its planned times, with timing scaled by speed:
+ python -m src.run_headless --replay --speed 2 session.trace --hwnd 0x10010
+ Only WinApi helpers and message engine are imported, compare cold start with python -m benchmarks.bench_startup
+"""
+
+DESCRIPTION = 'Sends a sequence file to matched windows without GUI. ' \
+              'Exit codes: 0 sent, 1 send failed, 2 invalid sequence, 3 no target window.'
+
+EXIT_OK = 0
+EXIT_SEND_FAILED = 1
+EXIT_INVALID = 2
+EXIT_NO_TARGET = 3
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog='python -m src.run_headless', description=DESCRIPTION)
+    parser.add_argument('sequence', type=Path,
+                        help='sequence file, see src/sequence_file.py, or message trace file with --replay')
+    parser.add_argument('--module', help='overrides target: substring of module path')
+    parser.add_argument('--title', help='overrides target: substring of window title')
+    parser.add_argument('--pid', type=int, help='overrides target: process id')
+    parser.add_argument('--hwnd', type=lambda s: int(s, 0), action='append', default=[],
+                        help='explicit target, skips window enumeration, can be repeated')
+    parser.add_argument('--all', action='store_true', help='send to every matched window, not only the first')
+    parser.add_argument('--check', action='store_true', help='validate sequence and resolve targets, send nothing')
+    parser.add_argument('--trace', type=Path, help='record sent messages to this trace file, not with --replay')
+    parser.add_argument('--replay', action='store_true',
+                        help='replay events, every target gets each event at the same time; '
+                             'trace events go to recorded hwnds unless --hwnd is given')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='with --replay: 2 is twice faster than recorded or planned, 0 as fast as possible')
+    return parser.parse_args(argv)
+
+
+def resolve_targets(selector: TargetSelector, send_to_all) -> List[Dict[str, Any]]:
+    """ Windows matched by selector, children are enumerated only if selector may match them """
+    registry = WindowRegistry(get_process_windows(include_children=selector.top_level is not True))
+    wnds = selector.select(registry)
+    if not send_to_all:
+        wnds = wnds[:1]
+    return [{'hwnd': wnd.hwnd, 'pid': wnd.pid, 'module': wnd.module_path, 'title': wnd.title} for wnd in wnds]
+
+
+def replay(args, events, summary: Dict[str, Any]) -> int:
+    stats: ReplayStats = Replayer(args.speed or None).run(events)
+    summary.update(sent=stats.events, failed=stats.errors, recorded_sec=stats.recorded_sec,
+                   elapsed_sec=stats.elapsed_sec, max_lag_ms=stats.max_lag_sec * 1000, late=stats.late)
+    if stats.errors:
+        summary['error'] = f'{stats.errors} events failed'
+        return EXIT_SEND_FAILED
+    return EXIT_OK
+
+
+def run_trace_replay(args, start) -> Tuple[int, Dict[str, Any]]:
+    summary: Dict[str, Any] = {'trace': str(args.sequence)}
+    hwnds = [hwnd for hwnd in args.hwnd if backend.api.IsWindow(hwnd)]
+    if args.hwnd and not hwnds:
+        summary['error'] = 'None of --hwnd windows exists'
+        return EXIT_NO_TARGET, summary
+    summary['targets'] = [{'hwnd': hwnd} for hwnd in hwnds] if hwnds else 'recorded'
+    summary['resolved_ms'] = (time.perf_counter() - start) * 1000
+    if args.check:
+        return EXIT_OK, summary
+
+    try:
+        return replay(args, retarget(trace_events(args.sequence), {}, hwnds or None), summary), summary
+    except (ValueError, OSError, NotImplementedError) as e:
+        summary['error'] = str(e)
+        return EXIT_INVALID, summary
+
+
+def run(args, start) -> Tuple[int, Dict[str, Any]]:
+    if args.replay and message_trace.is_trace(args.sequence):
+        return run_trace_replay(args, start)
+
+    summary: Dict[str, Any] = {'sequence': str(args.sequence)}
+    try:
+        sequence = load_sequence(args.sequence)
+    except (SequenceError, OSError) as e:
+        summary['error'] = str(e)
+        return EXIT_INVALID, summary
+    summary.update(name=sequence.name, cached_plan=sequence.from_cache)
+
+    if args.hwnd:
+        targets = [{'hwnd': hwnd} for hwnd in args.hwnd if backend.api.IsWindow(hwnd)]
+    else:
+        overrides = {name: getattr(args, name) for name in ('module', 'title', 'pid') if getattr(args, name)}
+        selector = replace(sequence.target, **overrides)
+        summary['target'] = vars(selector)
+        if selector == TargetSelector():
+            summary['error'] = 'No target: sequence has no target and none of --module, --title, --pid, --hwnd given'
+            return EXIT_NO_TARGET, summary
+        targets = resolve_targets(selector, args.all)
+    summary['targets'] = targets
+    if not targets:
+        summary['error'] = 'No window matches target'
+        return EXIT_NO_TARGET, summary
+
+    plan = sequence.plan()
+    hwnds = [target['hwnd'] for target in targets]
+    summary['steps'] = len(plan) * len(hwnds)
+    summary['resolved_ms'] = (time.perf_counter() - start) * 1000
+    if args.check:
+        return EXIT_OK, summary
+    if args.replay:
+        return replay(args, retarget(sequence_events(sequence), {}, hwnds), summary), summary
+
+    if args.trace:
+        message_trace.start_recording(args.trace)
+    try:
+        if len(hwnds) > 1 and is_background_plan(plan):
+            schedule = fan_out_schedule(hwnds, plan, run_plan_step)
+        else:
+            schedule = sequential_schedule(hwnds, plan, run_plan_step)
+        stats = run_schedule(schedule)
+    finally:
+        message_trace.stop_recording()
+
+    summary.update(sent=stats.sent, planned_sec=stats.planned_sec, elapsed_sec=stats.elapsed_sec,
+                   max_lag_ms=stats.max_lag_sec * 1000)
+    if stats.error:
+        summary['error'] = stats.error
+        return EXIT_SEND_FAILED, summary
+    return EXIT_OK, summary
+
+
+def main(argv=None) -> int:
+    start = time.perf_counter()
+    args = parse_args(argv)
+    code, summary = run(args, start)
+    summary.update(exit_code=code, total_ms=(time.perf_counter() - start) * 1000, qt_loaded='PySide6' in sys.modules)
+    print(json.dumps(summary, indent=2))
+    return code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
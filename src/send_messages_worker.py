@@ -1,19 +1,29 @@
 from dataclasses import dataclass
-from typing import List
+from pathlib import Path
+from typing import List, Optional
 
-from PySide6.QtCore import Slot, QThread, Signal, qWarning
+from PySide6.QtCore import Slot, Signal, qWarning
 
 from lib.qt.qt import q_info
 from lib.qt.qt_async_button import QWorker
+from lib.qt.qt_deadline_scheduler import QDeadlineScheduler
 from lib.qt.qt_n_timer import QNTimer
 from src.helpers.virtual_methods import override
-from src.messages import run_test_message, WinMsg
+from src.messages import WinMsg, compile_messages, run_plan_step, PlanStep
+from src.send_schedule import is_background_plan, fan_out_schedule, sequential_schedule, planned_sec
+from src.sequence_file import load_sequence, SequenceError
 
 
 @dataclass(init=True)
 class SendData:
     hwnds: List[int]
     messages: List[WinMsg]
+    # after each message without own delay, may be 0
+    delay_sec: float = 0.15
+    # interleave hwnds if all messages are background ones like PostMessage
+    fan_out: bool = True
+    # sent instead of messages if set, with own delays and repeats
+    sequence_path: Optional[Path] = None
 
 
 class SendMessagesWorker(QWorker):
@@ -27,26 +37,44 @@ class SendMessagesWorker(QWorker):
         super(SendMessagesWorker, self).__init__()
         self.request_timer = QNTimer(self)
 
-        # qntimer_timeout_guard() can be attached to request_send_data or to on_recieve_data,
-        # affects who ensures QWorker.finished()
+        # request_timer waits for continue_loop() until scheduler has sent all messages,
+        # so QWorker.finished() is ensured by request_timer
         self.request_timer.timeout_n.connect(self.request_send_data)
         self.request_timer.finished.connect(self.finished)
 
+        self.scheduler = QDeadlineScheduler(self)
+        self.scheduler.finished.connect(self.on_send_finished)
+
     @staticmethod
-    def send_messages(data: SendData):
+    def send_step(hwnd, step: PlanStep):
+        run_plan_step(hwnd, step)
+        q_info(step.describe())
+
+    def send_messages(self, data: SendData) -> bool:
+        """ Returns False if nothing is scheduled """
         if len(data.hwnds) < 1:
             q_info(f'\nNo hwnds selected, send canceled.\n')
-            return
+            return False
         else:
             q_info(f'\nTrying to send to hwnds: {data.hwnds}')
 
         # key_override_str = self.ui.key_entry.text()
         # key_hex = int(key_override_str, 16) if key_override_str else None
-        for hwnd in data.hwnds:
-            for msg in data.messages:
-                run_test_message(hwnd, msg)
-                q_info(f"{msg}")
-                QThread.msleep(150)
+        # invalid keys fail here, before the first message is sent
+        if data.sequence_path:
+            sequence = load_sequence(data.sequence_path)
+            q_info(f'Sequence {sequence.name}, {len(sequence.steps)} steps x{sequence.repeat}'
+                   f'{", cached plan" if sequence.from_cache else ""}')
+            plan = sequence.plan()
+        else:
+            plan = compile_messages(data.messages, data.delay_sec)
+        # others need focus of one target at a time
+        if data.fan_out and len(data.hwnds) > 1 and is_background_plan(plan):
+            q_info('Only background messages, hwnds are interleaved')
+            self.scheduler.start(fan_out_schedule(data.hwnds, plan, self.send_step))
+        else:
+            self.scheduler.start(sequential_schedule(data.hwnds, plan, self.send_step))
+        return True
 
     @Slot()
     def on_recieve_data(self, data: SendData):
@@ -56,10 +84,27 @@ class SendMessagesWorker(QWorker):
         this function recieves UI data
         """
         try:
-            with self.request_timer.qntimer_timeout_guard():
-                self.send_messages(data)
-        except (RuntimeWarning) as e:
+            scheduled = self.send_messages(data)
+        except (RuntimeWarning, NotImplementedError, SequenceError, OSError) as e:
             qWarning(str(e))
+            scheduled = False
+        except:
+            self.request_timer.break_loop()
+            raise
+
+        if not scheduled:
+            self.request_timer.continue_loop()
+
+    @Slot(bool)
+    def on_send_finished(self, completed):
+        scheduler = self.scheduler
+        q_info(f'Sent {scheduler.n} of {len(scheduler.steps)} messages in {scheduler.elapsed_sec():.3f}s '
+               f'(planned {planned_sec(scheduler.steps):.3f}s), {scheduler.achieved_rate():.1f} msg/s, '
+               f'max lag {scheduler.max_lag_sec * 1000:.1f}ms')
+        if completed:
+            self.request_timer.continue_loop()
+        else:
+            self.request_timer.break_loop()
 
     @Slot()
     @override
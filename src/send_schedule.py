@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from functools import partial
+from typing import List, Tuple, Callable, Sequence, Deque, Optional
+
+from src.helpers.command_registry import is_background_handler
+from src.messages import PlanStep
+
+# (action, delay in seconds after it), as expected by QDeadlineScheduler
+Schedule = List[Tuple[Callable, float]]
+# send(hwnd, step)
+SendStep = Callable[[int, PlanStep], None]
+
+# last part of every wait is spun instead of slept, OS sleep may overshoot by a timer tick
+SPIN_SEC = 0.002
+
+
+def is_background_plan(plan: Sequence[PlanStep]) -> bool:
+    """ Plan of PostMessage-like steps only: targets don't compete for focus and order between targets is free """
+    return all(is_background_handler(step.handler) for step in plan)
+
+
+def sequential_schedule(hwnds: List[int], plan: Sequence[PlanStep], send: SendStep) -> Schedule:
+    """ Whole plan for one hwnd, then for the next one, total time grows with number of hwnds """
+    return [(partial(send, hwnd, step), step.delay_sec) for hwnd in hwnds for step in plan]
+
+
+def fan_out_schedule(hwnds: List[int], plan: Sequence[PlanStep], send: SendStep) -> Schedule:
+    """
+    Round-robin over per-target queues: each round sends the next step of every target,
+    then waits the longest delay of the round once. Order of steps within a target is kept,
+    total time grows with plan length, not with number of hwnds.
+    """
+    queues: List[Tuple[int, Deque[PlanStep]]] = [(hwnd, deque(plan)) for hwnd in hwnds]
+    schedule: Schedule = []
+    while queues:
+        round_delay_sec = 0.0
+        for hwnd, queue in queues:
+            step = queue.popleft()
+            schedule += [(partial(send, hwnd, step), 0.0)]
+            round_delay_sec = max(round_delay_sec, step.delay_sec)
+
+        action, _ = schedule[-1]
+        schedule[-1] = (action, round_delay_sec)
+        queues = [(hwnd, queue) for hwnd, queue in queues if queue]
+    return schedule
+
+
+def planned_sec(schedule: Sequence[Tuple[Callable, float]]) -> float:
+    """ Time all steps should take without lag, trailing delay excluded: nothing is sent after it """
+    return sum(delay_sec for _, delay_sec in schedule[:-1])
+
+
+def wait_until(deadline, stop_event: threading.Event):
+    """ Until perf_counter() deadline, wakes early on stop_event """
+    remaining = deadline - time.perf_counter()
+    if remaining > SPIN_SEC:
+        stop_event.wait(remaining - SPIN_SEC)
+    while time.perf_counter() < deadline and not stop_event.is_set():
+        pass
+
+
+@dataclass(init=True)
+class ScheduleStats:
+    sent: int = 0
+    planned_sec: float = 0.0
+    elapsed_sec: float = 0.0
+    max_lag_sec: float = 0.0
+    # of the action which stopped the run
+    error: Optional[str] = None
+
+
+def run_schedule(schedule: Schedule, stop_event: Optional[threading.Event] = None) -> ScheduleStats:
+    """
+    Blocking counterpart of QDeadlineScheduler for runs without Qt event loop,
+    deadlines are absolute, so a late step shortens the following delay instead of shifting the rest.
+    Exception of an action stops the run and is reported in stats.
+    """
+    stop_event = stop_event or threading.Event()
+    stats = ScheduleStats(planned_sec=planned_sec(schedule))
+    start = time.perf_counter()
+    deadline = start
+    for action, delay_sec in schedule:
+        wait_until(deadline, stop_event)
+        if stop_event.is_set():
+            break
+        stats.max_lag_sec = max(stats.max_lag_sec, time.perf_counter() - deadline)
+        try:
+            action()
+        except Exception as e:
+            stats.error = f'{type(e).__name__}: {e}'
+            break
+        stats.sent += 1
+        deadline += delay_sec
+    stats.elapsed_sec = time.perf_counter() - start
+    return stats
@@ -0,0 +1,308 @@
+import hashlib
+import json
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple, Any
+
+import src.helpers.winapi.backend as backend
+from src.helpers.command_registry import get_command_handler_by_name, get_command_by_name
+from src.helpers.winapi.keyboard import keyboard_tables, KeyboardTable
+from src.helpers.winapi.processes import WindowInfo
+from src.helpers.winapi.registry import WindowRegistry
+from src.messages import WinMsg, EnumArg, PlanStep, wm_args, keyevent_args, key_code, batch_input_steps
+
+"""
+ Message sequences as JSON files, shared by GUI and headless runs:
+
+ {
+   "name": "ctrl+a in notepad",
+   "target": {"module": "notepad.exe", "title": "Untitled", "visible": true},
+   "delay_sec": 0.05,
+   "repeat": 2,
+   "steps": [
+     {"api": "keybd_event", "key": "VK_LCONTROL", "flags": "KEYEVENTF_KEYDOWN"},
+     {"api": "PostMessage", "msg": "WM_KEYDOWN", "key": "a", "delay_sec": 0.1, "repeat": 3},
+     {"api": "keybd_event", "key": "VK_LCONTROL", "flags": "KEYEVENTF_KEYUP"}
+   ]
+ }
+
+ Validation reports every invalid field at once. Compiled steps are cached in binary form by hash of file
+ and keyboard layout, since chars are resolved to virtual keys of the current layout.
+"""
+
+CACHE_DIR = Path(__file__).parents[1] / 'data' / 'cache' / 'sequences'
+SEQUENCES_DIR = Path(__file__).parents[1] / 'data' / 'sequences'
+
+# api: (name of enum field, its named values)
+ENUM_FIELDS = {
+    'SendMessage': ('msg', wm_args),
+    'PostMessage': ('msg', wm_args),
+    'keybd_event': ('flags', keyevent_args),
+}
+STEP_FIELDS = {'api', 'key', 'msg', 'flags', 'delay_sec', 'repeat'}
+TARGET_FIELDS = {'module', 'title', 'pid', 'visible', 'top_level'}
+SEQUENCE_FIELDS = {'name', 'target', 'delay_sec', 'repeat', 'steps'}
+
+PLAN_MAGIC = b'WMSEQPL1'
+# magic, count of strings, count of steps
+PLAN_HEADER = struct.Struct('<8sII')
+STRING_LENGTH = struct.Struct('<I')
+# api, key, enum value, delay, source key string; strings are indices in string table
+PLAN_STEP = struct.Struct('<IqqdI')
+NO_VALUE = -2 ** 63
+
+
+class SequenceError(ValueError):
+    """ All problems of a sequence file, one per line """
+
+
+@dataclass(init=True)
+class TargetSelector:
+    """ Conditions on windows, all given ones must match """
+    module: Optional[str] = None
+    # case insensitive substring
+    title: Optional[str] = None
+    pid: Optional[int] = None
+    visible: Optional[bool] = None
+    top_level: Optional[bool] = None
+
+    def select(self, registry: WindowRegistry) -> List[WindowInfo]:
+        wnds = registry.query(pid=self.pid, module_exe=self.module, visible=self.visible, top_level=self.top_level)
+        if self.title:
+            title = self.title.lower()
+            wnds = [wnd for wnd in wnds if title in wnd.title.lower()]
+        return wnds
+
+
+@dataclass(init=True)
+class MessageSequence:
+    name: str
+    target: TargetSelector
+    repeat: int
+    # resolved steps with step repeats expanded, not batched
+    steps: Tuple[PlanStep, ...]
+    from_cache: bool = False
+
+    def plan(self, batch_input=True) -> Tuple[PlanStep, ...]:
+        """ Whole sequence with repeats, ready for the scheduler """
+        steps = batch_input_steps(self.steps) if batch_input else self.steps
+        return steps * self.repeat
+
+    def messages(self) -> List[WinMsg]:
+        return [step.msg for step in self.steps]
+
+
+def check_type(errors: List[str], where, value, types, name):
+    if value is not None and not isinstance(value, types) or isinstance(value, bool) and bool not in types:
+        errors += [f'{where}: {name} must be {" or ".join(t.__name__ for t in types)}, got {value!r}']
+        return False
+    return True
+
+
+def check_number(errors: List[str], where, value, types, name, minimum) -> bool:
+    """ As check_type, but null is rejected too and value must be at least minimum """
+    if value is None:
+        errors += [f'{where}: {name} must be {" or ".join(t.__name__ for t in types)}, got null']
+        return False
+    if not check_type(errors, where, value, types, name):
+        return False
+    if value < minimum:
+        errors += [f'{where}: {name} must be at least {minimum}, got {value!r}']
+        return False
+    return True
+
+
+def parse_target(data: Any, errors: List[str]) -> TargetSelector:
+    if data is None:
+        return TargetSelector()
+    if not isinstance(data, dict):
+        errors += [f'target: must be an object, got {data!r}']
+        return TargetSelector()
+    for name in data.keys() - TARGET_FIELDS:
+        errors += [f'target: unknown field {name!r}']
+    for name, types in (('module', (str,)), ('title', (str,)), ('pid', (int,)),
+                        ('visible', (bool,)), ('top_level', (bool,))):
+        check_type(errors, 'target', data.get(name), types, name)
+    return TargetSelector(**{name: data.get(name) for name in TARGET_FIELDS})
+
+
+def parse_step(where, data: Any, default_delay_sec, table: KeyboardTable, errors: List[str]) -> List[PlanStep]:
+    """ Step repeated by its repeat count, nothing if invalid """
+    if not isinstance(data, dict):
+        errors += [f'{where}: must be an object, got {data!r}']
+        return []
+    errors_before = len(errors)
+    for name in data.keys() - STEP_FIELDS:
+        errors += [f'{where}: unknown field {name!r}']
+
+    api = data.get('api')
+    handler = None
+    try:
+        handler = get_command_handler_by_name(api)
+    except NotImplementedError as e:
+        errors += [f'{where}: {e}']
+
+    key_str = data.get('key')
+    key = None
+    if check_type(errors, where, key_str, (str,), 'key') and key_str is not None:
+        try:
+            key = key_code(key_str, table)
+        except RuntimeWarning as e:
+            errors += [f'{where}: {e}']
+
+    enum_field, named_values = ENUM_FIELDS.get(api, (None, []))
+    enum_arg = None
+    for name in ('msg', 'flags'):
+        if handler and name in data and name != enum_field:
+            errors += [f'{where}: {name!r} is not used by {api}']
+    if enum_field:
+        enum_name = data.get(enum_field)
+        value = dict(named_values).get(enum_name)
+        if value is None:
+            expected = ', '.join(name for name, _ in named_values[:5])
+            errors += [f'{where}: {enum_field} {enum_name!r} is unknown, expected a name like {expected}']
+        else:
+            enum_arg = EnumArg(named_values, value)
+
+    delay_sec = data.get('delay_sec', default_delay_sec)
+    check_number(errors, where, delay_sec, (int, float), 'delay_sec', 0)
+    repeat = data.get('repeat', 1)
+    check_number(errors, where, repeat, (int,), 'repeat', 1)
+
+    if len(errors) > errors_before:
+        return []
+    step = PlanStep(handler, key, enum_arg.value if enum_arg else None,
+                    source_msg(api, key_str, enum_arg, delay_sec), float(delay_sec))
+    return [step] * repeat
+
+
+def source_msg(api, key_str: Optional[str], enum_arg: Optional[EnumArg], delay_sec) -> WinMsg:
+    """ Same as if the step was a WinMsg literal, for logs and GUI """
+    args = [arg for arg in (key_str, enum_arg) if arg is not None]
+    return WinMsg(get_command_by_name(api), *args, float(delay_sec))
+
+
+def parse_sequence(data: Any, name: str) -> MessageSequence:
+    """ Raises SequenceError listing all invalid fields """
+    errors: List[str] = []
+    if not isinstance(data, dict):
+        raise SequenceError(f'{name}: sequence must be an object')
+    for field_name in data.keys() - SEQUENCE_FIELDS:
+        errors += [f'unknown field {field_name!r}']
+
+    target = parse_target(data.get('target'), errors)
+    default_delay_sec = data.get('delay_sec', 0.0)
+    if not check_number(errors, 'sequence', default_delay_sec, (int, float), 'delay_sec', 0):
+        # reported once, not again for every step which inherits it
+        default_delay_sec = 0.0
+    repeat = data.get('repeat', 1)
+    check_number(errors, 'sequence', repeat, (int,), 'repeat', 1)
+
+    steps_data = data.get('steps')
+    steps: List[PlanStep] = []
+    if not isinstance(steps_data, list) or not steps_data:
+        errors += ['steps: must be a non-empty list']
+    else:
+        # layout is resolved once, not per char
+        table = keyboard_tables.current()
+        for i, step_data in enumerate(steps_data):
+            steps += parse_step(f'steps[{i}]', step_data, default_delay_sec, table, errors)
+
+    if errors:
+        raise SequenceError(f'{name}:\n' + '\n'.join(errors))
+    return MessageSequence(data.get('name', name), target, repeat, tuple(steps))
+
+
+def cache_key(text: bytes) -> str:
+    """ Keys of chars depend on keyboard layout, so compiled steps are valid only for the same one """
+    layout_id = backend.api.GetKeyboardLayout(0) & 0xFFFFFFFFFFFFFFFF
+    return hashlib.sha256(PLAN_MAGIC + text + layout_id.to_bytes(8, 'little')).hexdigest()
+
+
+def save_plan(path: Path, sequence: MessageSequence):
+    strings: List[str] = [json.dumps({'name': sequence.name, 'repeat': sequence.repeat,
+                                      'target': vars(sequence.target)})]
+    string_ids: Dict[str, int] = {}
+
+    def string_id(s: Optional[str]) -> int:
+        if s is None:
+            return 0
+        if s not in string_ids:
+            string_ids[s] = len(strings)
+            strings.append(s)
+        return string_ids[s]
+
+    step_data = b''.join(PLAN_STEP.pack(string_id(step.msg.cmd.__name__),
+                                        NO_VALUE if step.key is None else step.key,
+                                        NO_VALUE if step.enum_value is None else step.enum_value,
+                                        step.delay_sec, string_id(step.msg.str_arg1))
+                         for step in sequence.steps)
+    encoded = [s.encode('utf-8') for s in strings]
+    data = PLAN_HEADER.pack(PLAN_MAGIC, len(strings), len(sequence.steps)) \
+        + b''.join(STRING_LENGTH.pack(len(s)) + s for s in encoded) + step_data
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    except OSError as e:
+        print(f'Sequence plan is not cached: {e}')
+
+
+def load_plan(path: Path) -> Optional[MessageSequence]:
+    """ None if there is no valid cached plan, commands are resolved by name again """
+    try:
+        data = path.read_bytes()
+        magic, string_count, step_count = PLAN_HEADER.unpack_from(data, 0)
+        if magic != PLAN_MAGIC:
+            return None
+        offset = PLAN_HEADER.size
+        strings = []
+        for _ in range(string_count):
+            (length,) = STRING_LENGTH.unpack_from(data, offset)
+            offset += STRING_LENGTH.size
+            strings += [data[offset:offset + length].decode('utf-8')]
+            offset += length
+        meta = json.loads(strings[0])
+
+        steps = []
+        # steps are immutable, equal records share one step, sequences mostly repeat a few keys
+        known_steps: Dict[tuple, PlanStep] = {}
+        for record in PLAN_STEP.iter_unpack(data[offset:offset + step_count * PLAN_STEP.size]):
+            step = known_steps.get(record)
+            if step is None:
+                api_id, key, enum_value, delay_sec, key_str_id = record
+                api = strings[api_id]
+                enum_field, named_values = ENUM_FIELDS.get(api, (None, []))
+                enum_arg = EnumArg(named_values, enum_value) if enum_field else None
+                msg = source_msg(api, strings[key_str_id] if key_str_id else None, enum_arg, delay_sec)
+                step = known_steps[record] = PlanStep(get_command_handler_by_name(api),
+                                                      None if key == NO_VALUE else key,
+                                                      None if enum_value == NO_VALUE else enum_value, msg, delay_sec)
+            steps += [step]
+    except (OSError, ValueError, KeyError, IndexError, NotImplementedError, struct.error):
+        return None
+    return MessageSequence(meta['name'], TargetSelector(**meta['target']), meta['repeat'], tuple(steps),
+                           from_cache=True)
+
+
+def load_sequence(path: Path, use_cache=True) -> MessageSequence:
+    """ Parsed and validated once, later loads of the unchanged file read the cached plan """
+    text = path.read_bytes()
+    plan_path = CACHE_DIR / f'{cache_key(text)}.plan'
+    if use_cache:
+        sequence = load_plan(plan_path)
+        if sequence:
+            return sequence
+
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        raise SequenceError(f'{path.name}: {e}')
+    sequence = parse_sequence(data, path.stem)
+    if use_cache:
+        save_plan(plan_path, sequence)
+    return sequence
+
+
+def sequence_files(directory: Path = SEQUENCES_DIR) -> List[Path]:
+    return sorted(directory.glob('*.json')) if directory.is_dir() else []
@@ -1,9 +1,13 @@
-from PySide6.QtWidgets import QMainWindow, QWidget, QGroupBox, QTextEdit, QSizePolicy, QGridLayout, QListWidget, \
-    QPushButton, QVBoxLayout, QLineEdit, QCheckBox, QAbstractItemView, QHBoxLayout
+from typing import List
 
-from lib.qt.qt import QComboBoxEx, QListWidgetEx, QTextEditEx
+from PySide6.QtWidgets import QMainWindow, QWidget, QGroupBox, QTextEdit, QSizePolicy, QGridLayout, QTreeView, \
+    QPushButton, QVBoxLayout, QLineEdit, QCheckBox, QAbstractItemView, QHBoxLayout, QHeaderView, QDoubleSpinBox
+
+from lib.qt.qt import QComboBoxEx, QTextEditEx
 from lib.qt.qt_async_button import QAsyncButton
 from src.messages import EnumArg, message_presets
+from src.sequence_file import sequence_files
+from src.ui.window_table_model import WindowTableModel
 
 
 class CommandWidget(QWidget):
@@ -48,26 +52,76 @@ class CommandGroup(QGroupBox):
             cmd_widgets += [CommandWidget(self, name=name, cmd=msg.cmd,
                                           str_param=msg.str_arg1, enum_param=msg.enum_arg1)]
 
+        # delay after each message, 0 sends as fast as scheduler allows
+        self.delay_spin = QDoubleSpinBox(self)
+        self.delay_spin.setPrefix("Delay: ")
+        self.delay_spin.setSuffix(" s")
+        self.delay_spin.setDecimals(3)
+        self.delay_spin.setRange(0.0, 10.0)
+        self.delay_spin.setSingleStep(0.05)
+        self.delay_spin.setValue(0.15)
+
+        # sequence files of data/sequences are sent instead of checked commands when chosen
+        sequences = [('Checked commands', None)] + [(path.stem, str(path)) for path in sequence_files()]
+        self.sequence_dropdown = QComboBoxEx(self, values=sequences, default_value=None)
+
         self.command_layout = QVBoxLayout(self)
         for w in cmd_widgets:
             self.command_layout.addWidget(w)
 
+        self.command_layout.addWidget(self.delay_spin)
+        self.command_layout.addWidget(self.sequence_dropdown)
         self.command_layout.addWidget(self.send_messages_button)
 
 
+class WindowTableView(QTreeView):
+    """ Flat table with uniform rows, only visible rows are rendered and measured """
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.window_model = WindowTableModel(self)
+        self.setModel(self.window_model)
+
+        self.setUniformRowHeights(True)
+        self.setRootIsDecorated(False)
+        self.setItemsExpandable(False)
+        self.setAllColumnsShowFocus(True)
+        self.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+
+        header = self.header()
+        header.setStretchLastSection(True)
+        for column in range(WindowTableModel.TITLE):
+            header.setSectionResizeMode(column, QHeaderView.ResizeMode.Interactive)
+
+    def selected_hwnds(self) -> List[int]:
+        return self.window_model.hwnds_of(self.selectionModel().selectedRows())
+
+    def select_hwnd(self, hwnd) -> bool:
+        index = self.window_model.index_of(hwnd)
+        if not index.isValid():
+            return False
+        self.setCurrentIndex(index)
+        self.scrollTo(index)
+        return True
+
+
 class WindowGroup(QGroupBox):
     def __init__(self, text, parent):
         super().__init__(text, parent)
 
         # self.window_group.setFrameStyle(QFrame.StyledPanel)
-        self.window_listbox = QListWidgetEx(self)
+        self.window_table = WindowTableView(self)
 
-        self.window_listbox.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.children_on_demand_check = QCheckBox("Child windows on demand", self)
+        self.children_on_demand_check.setToolTip("Only top-level windows are listed, "
+                                                 "double click on one to list or hide its children")
         self.pick_windows_button = QAsyncButton(text="Pick under cursor...", parent=self)
         self.refresh_windows_button = QPushButton("Refresh", self)
 
         self.window_layout = QVBoxLayout(self)
-        self.window_layout.addWidget(self.window_listbox)
+        self.window_layout.addWidget(self.window_table)
+        self.window_layout.addWidget(self.children_on_demand_check)
         self.window_layout.addWidget(self.pick_windows_button)
         self.window_layout.addWidget(self.refresh_windows_button)
 
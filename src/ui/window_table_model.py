@@ -0,0 +1,162 @@
+from bisect import bisect_left
+from pathlib import Path
+from typing import List, Dict, Optional, Set, Tuple
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PySide6.QtGui import QColor, QFont
+
+from src.helpers.winapi.processes import WindowInfo
+from src.helpers.winapi.snapshot import SnapshotDiff
+
+
+class WindowTableModel(QAbstractTableModel):
+    """
+    Rows are WindowInfo in enumeration order, changed only by snapshot diffs.
+    Nothing is created per row, view requests data only for visible rows.
+    """
+    COLUMNS = ('Module', 'Pid', 'Hwnd', 'Visible', 'Title')
+    MODULE, PID, HWND, VISIBLE, TITLE = range(len(COLUMNS))
+    CHILD_INDENT = '    '
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.wnds: List[WindowInfo] = []
+        # rebuilt lazily after a diff inserted or removed rows
+        self.rows_by_hwnd: Optional[Dict[int, int]] = {}
+        self.highlighted: Set[int] = set()
+        self.bold_if_visible = True
+
+        self.module_names: Dict[Optional[str], str] = {None: '-'}
+        self.bold_font = QFont()
+        self.bold_font.setBold(True)
+        self.red = QColor("red")
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.wnds)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.COLUMNS[section]
+        return None
+
+    def module_name(self, module_path):
+        name = self.module_names.get(module_path)
+        if name is None:
+            name = Path(module_path).name
+            self.module_names[module_path] = name
+        return name
+
+    def display(self, info: WindowInfo, column):
+        if column == self.MODULE:
+            module = self.module_name(info.module_path)
+            return self.CHILD_INDENT + module if info.root_parent_hwnd else module
+        elif column == self.PID:
+            return str(info.pid)
+        elif column == self.HWND:
+            return str(info.hwnd)
+        elif column == self.VISIBLE:
+            return str(info.visible)
+        else:
+            return info.title
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        info = self.wnds[index.row()]
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.display(info, index.column())
+        elif role == Qt.ItemDataRole.UserRole:
+            return info.hwnd
+        elif role == Qt.ItemDataRole.FontRole:
+            return self.bold_font if self.bold_if_visible and info.visible else None
+        elif role == Qt.ItemDataRole.ForegroundRole:
+            return self.red if info.hwnd in self.highlighted else None
+        return None
+
+    def row_of(self, hwnd) -> Optional[int]:
+        if self.rows_by_hwnd is None:
+            self.rows_by_hwnd = {wnd.hwnd: row for row, wnd in enumerate(self.wnds)}
+        return self.rows_by_hwnd.get(hwnd)
+
+    def hwnd_at(self, row) -> int:
+        return self.wnds[row].hwnd
+
+    def emit_row_changed(self, row):
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.COLUMNS) - 1))
+
+    def remove_rows(self, rows: List[int]):
+        """ rows: sorted. Contiguous ranges are removed at once, from the bottom to keep rows valid """
+        rows = rows[::-1]
+        i = 0
+        while i < len(rows):
+            last = first = rows[i]
+            i += 1
+            while i < len(rows) and rows[i] == first - 1:
+                first = rows[i]
+                i += 1
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self.wnds[first:last + 1]
+            self.endRemoveRows()
+
+    def plan_runs(self, added: List[WindowInfo], added_after: List[Optional[int]],
+                  removed_rows: List[int]) -> List[Tuple[int, int, int]]:
+        """
+        (row, first, end) of added[first:end] runs: consecutive added windows go as one range after the anchor
+        of the first one. Anchors are looked up before removed_rows (sorted) are removed and shifted by them.
+        """
+        runs = []
+        i = 0
+        while i < len(added):
+            end = i + 1
+            while end < len(added) and added_after[end] == added[end - 1].hwnd:
+                end += 1
+
+            anchor_row = self.row_of(added_after[i]) if added_after[i] is not None else None
+            if anchor_row is None:
+                row = 0
+            else:
+                row = anchor_row - bisect_left(removed_rows, anchor_row) + 1
+            runs += [(row, i, end)]
+            i = end
+        return runs
+
+    def insert_runs(self, added: List[WindowInfo], runs: List[Tuple[int, int, int]]):
+        """ From the bottom, so rows of the runs above stay valid """
+        for row, first, end in sorted(runs, reverse=True):
+            self.beginInsertRows(QModelIndex(), row, row + end - first - 1)
+            self.wnds[row:row] = added[first:end]
+            self.endInsertRows()
+
+    def apply_diff(self, diff: SnapshotDiff, highlight_new=True):
+        """ All rows are looked up before rows move, so the hwnd index is rebuilt once per diff, not per run """
+        prev_highlighted = self.highlighted
+        self.highlighted = {info.hwnd for info in diff.added} - diff.moved if highlight_new else set()
+
+        for info in diff.changed:
+            row = self.row_of(info.hwnd)
+            self.wnds[row] = info
+            self.emit_row_changed(row)
+
+        for hwnd in prev_highlighted:
+            row = self.row_of(hwnd)
+            if row is not None:
+                self.emit_row_changed(row)
+
+        removed_rows = sorted(row for row in (self.row_of(wnd.hwnd) for wnd in diff.removed) if row is not None)
+        runs = self.plan_runs(diff.added, diff.added_after, removed_rows)
+        if removed_rows or runs:
+            self.rows_by_hwnd = None
+        self.remove_rows(removed_rows)
+        self.insert_runs(diff.added, runs)
+
+    def hwnds_of(self, indexes: List[QModelIndex]) -> List[int]:
+        rows = sorted({index.row() for index in indexes})
+        return [self.wnds[row].hwnd for row in rows]
+
+    def index_of(self, hwnd) -> QModelIndex:
+        row = self.row_of(hwnd)
+        return self.index(row, 0) if row is not None else QModelIndex()